@@ -3,17 +3,26 @@ import sys
 import time  
 from pygame.locals import *  
 from datetime import datetime  
+from occupancy import compile_obstacles
+from render_cache import get_static_layer, map_key
+from event_loop import wait_events
+from text_cache import TextCache
+from path_render import PathLayer
 
 # ================= 字体配置 =================  
 FONT_PATH = "C:/Windows/Fonts/simhei.ttf"  
 def get_font(size):  
     return pygame.font.Font(FONT_PATH, size)  
 
+# 所有页面共用的文字缓存（字体在第一次使用时才加载）
+TEXT_CACHE = TextCache(get_font, 24)  
+
 # ================= 全局配置 =================  
 SCREEN_SIZE = (1200, 800)  
 GRID_SIZE = 49  
 CELL_SIZE = 15  
 GAME_SIZE = GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待输入，没有输入、页面也没切换时不重画
 
 COLORS = {  
     'background': (255, 255, 255),  
@@ -65,43 +74,52 @@ class PathGame:
         
         self.current_pos = list(self.config['start'])  
         self.path = [tuple(self.current_pos)]  
+        # 常驻路径层：移动只画新线段，撤回只重画局部  
+        self.path_layer = PathLayer(self.convert_coords, (GAME_SIZE, GAME_SIZE), (0,0,0), 3, self.path)  
         self.active = False  
         self.finished = False  
+        # 每张地图的障碍物只编译一次（坐标范围 0..GRID_SIZE，半开区间）
+        self.occupancy = compile_obstacles(self.config['obstacles'], GRID_SIZE + 1)
+        # 静态背景层按地图配置缓存，换地图时键变化、背景重绘
+        self.map_key = map_key(GRID_SIZE, CELL_SIZE, self.config['obstacles'], self.config['start'], COLORS)
 
     def convert_coords(self, x, y):  
         return (x * CELL_SIZE, (GRID_SIZE - y) * CELL_SIZE)  
     
-    def draw_grid(self):  
+    def draw_grid(self, surface):  
         for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(self.game_surface, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                              (i * CELL_SIZE, 0), (i * CELL_SIZE, GAME_SIZE))  
-            pygame.draw.line(self.game_surface, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                              (0, i * CELL_SIZE), (GAME_SIZE, i * CELL_SIZE))  
     
-    def draw_obstacles(self):  
+    def draw_obstacles(self, surface):  
         for x, y, w, h in self.config['obstacles']:  
             rect_x = x * CELL_SIZE  
             rect_y = (GRID_SIZE - y - h) * CELL_SIZE  
-            pygame.draw.rect(self.game_surface, COLORS['obstacle'],  
+            pygame.draw.rect(surface, COLORS['obstacle'],  
                              (rect_x, rect_y, w*CELL_SIZE, h*CELL_SIZE))  
     
-    def draw_points(self):  
+    def draw_points(self, surface):  
         start_pos = self.convert_coords(*self.config['start'])  
-        pygame.draw.circle(self.game_surface, COLORS['start'], start_pos, 8)  
-        
+        pygame.draw.circle(surface, COLORS['start'], start_pos, 8)  # 移除目标点的绘制
+    
+    def build_background(self, surface):  
+        """静态背景层：网格、障碍物和起点，只在缓存失效时绘制"""  
+        surface.fill(COLORS['background'])  
+        self.draw_grid(surface)  
+        self.draw_obstacles(surface)  
+        self.draw_points(surface)  
+    
+    def draw_current(self):  
         current_pos = self.convert_coords(*self.current_pos)  
-        pygame.draw.circle(self.game_surface, COLORS['current'], current_pos, 8)  # 移除目标点的绘制
+        pygame.draw.circle(self.game_surface, COLORS['current'], current_pos, 8)  
     
     def draw_path(self):  
-        if len(self.path) > 1:  
-            points = [self.convert_coords(x, y) for x, y in self.path]  
-            pygame.draw.lines(self.game_surface, (0,0,0), False, points, 3)  
+        self.path_layer.draw(self.game_surface, self.path)  
     
     def is_obstructed(self, x, y):  
-        for ox, oy, w, h in self.config['obstacles']:  
-            if ox <= x < ox + w and oy <= y < oy + h:  
-                return True  
-        return False  
+        return self.occupancy.is_blocked(x, y)  
     
     def handle_input(self, events):  
         if not self.active or self.finished:  
@@ -142,10 +160,9 @@ class PathGame:
     
     def update(self, events):  
         self.handle_input(events)  
-        self.game_surface.fill(COLORS['background'])  
-        self.draw_grid()  
-        self.draw_obstacles()  
-        self.draw_points()  
+        background = get_static_layer(self.map_key, (GAME_SIZE, GAME_SIZE), self.build_background)  
+        self.game_surface.blit(background, (0, 0))  
+        self.draw_current()  
         self.draw_path()  
 
 # ================= 页面系统 =================  
@@ -155,20 +172,21 @@ class GamePage:
         self.content = content  
         self.map_index = map_index  
         self.is_game = is_game  
-        self.font = get_font(24)  
-        self.title_font = get_font(36)  
         self.game_instance = None  
+        # 标题和正文是静态的，整页预渲染后缓存
+        self.full_page = None  
+        self.panel_page = None  
+    
+    def page_items(self, x, title_y, content_y):  
+        items = [(self.title, (x, title_y), COLORS['text'], 36)]  
+        for i, line in enumerate(self.content.split('\n')):  
+            items.append((line, (x, content_y + i*30), COLORS['text'], 24))  
+        return items  
     
     def draw_full_text_page(self, screen):  
-        screen.fill(COLORS['panel_bg'])        
-        title_surf = self.title_font.render(self.title, True, COLORS['text'])  
-        screen.blit(title_surf, (50, 50))  
-        
-        y = 150  
-        for line in self.content.split('\n'):  
-            text_surf = self.font.render(line, True, COLORS['text'])  
-            screen.blit(text_surf, (50, y))  
-            y += 30  
+        if self.full_page is None:  
+            self.full_page = TEXT_CACHE.render_page(SCREEN_SIZE, COLORS['panel_bg'], self.page_items(50, 50, 150))  
+        screen.blit(self.full_page, (0, 0))  
         
         # 右下角按钮配置  
         btn_width = 180  
@@ -177,37 +195,25 @@ class GamePage:
         btn_color = COLORS['button_hover'] if btn_rect.collidepoint(mouse_pos) else COLORS['button']  
         
         pygame.draw.rect(screen, btn_color, btn_rect, border_radius=8)  
-        text_surf = self.font.render("下一页", True, (255,255,255))  
-        screen.blit(text_surf, (btn_rect.x+50, btn_rect.y+15))  
+        TEXT_CACHE.blit(screen, "下一页", (btn_rect.x+50, btn_rect.y+15), (255,255,255))  
     
     def draw_panel(self, screen):  
         if self.is_game:  
-            panel = pygame.Surface((400, 800))  
-            panel.fill(COLORS['panel_bg'])  
-            
-            title_surf = self.title_font.render(self.title, True, COLORS['text'])  
-            panel.blit(title_surf, (20, 20))  
-            
-            y = 100  
-            for line in self.content.split('\n'):  
-                text_surf = self.font.render(line, True, COLORS['text'])  
-                panel.blit(text_surf, (20, y))  
-                y += 30  
+            if self.panel_page is None:  
+                self.panel_page = TEXT_CACHE.render_page((400, 800), COLORS['panel_bg'], self.page_items(20, 20, 100))  
+            screen.blit(self.panel_page, (800, 0))  
             
-            # 右侧面板按钮配置  
+            # 右侧面板按钮配置（按钮坐标相对面板，直接画在屏幕上时加上面板偏移）  
             btn_width = 160  
             btn_rect = pygame.Rect(220, 700, btn_width, 60)  
             mouse_pos = pygame.mouse.get_pos()  
             panel_mouse = (mouse_pos[0]-800, mouse_pos[1])  
             
             btn_color = COLORS['button_hover'] if btn_rect.collidepoint(panel_mouse) else COLORS['button']  
-            pygame.draw.rect(panel, btn_color, btn_rect, border_radius=8)  
+            pygame.draw.rect(screen, btn_color, btn_rect.move(800, 0), border_radius=8)  
             
             btn_text = "开始规划" if self.map_index > 0 else "开始"  
-            text_surf = self.font.render(btn_text, True, (255,255,255))  
-            panel.blit(text_surf, (btn_rect.x+40, btn_rect.y+15))  
-            
-            screen.blit(panel, (800, 0))  
+            TEXT_CACHE.blit(screen, btn_text, (btn_rect.x+840, btn_rect.y+15), (255,255,255))  
         else:  
             self.draw_full_text_page(screen)  
     
@@ -251,10 +257,19 @@ def main():
     
     current_page = 0  
     running = True    
+    redraw = True  # 第一帧以及翻页后的下一帧必须重画
     
     while running: 
+        if EVENT_DRIVEN:  
+            events = wait_events()  
+            if not events and not redraw:  
+                continue  
+        else:  
+            events = pygame.event.get()  
+        redraw = False  
+        shown_page = current_page  
+        
         screen.fill(COLORS['background'])  
-        events = pygame.event.get()  
         page = pages[current_page]  
         
         # ========== 事件处理核心逻辑 ==========  
@@ -307,7 +322,10 @@ def main():
                     running = False
         
         pygame.display.flip()  
-        clock.tick(30)  
+        if current_page != shown_page:  
+            redraw = True  
+        if not EVENT_DRIVEN:  
+            clock.tick(30)  
     
     pygame.quit()  
     sys.exit()  
@@ -0,0 +1,144 @@
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from distance_fields import CACHE_DIR, UNREACHABLE, bfs_field, map_hash
+from occupancy import compile_obstacles
+
+# ================= 任意两格之间的距离表 =================
+# distance_fields 只覆盖"到终点"的距离；轨迹分析还经常要问"格子 A 到格子 B 绕开障碍物有多远"。
+# 这里把一张地图所有格子两两之间的最短步数算成一张 N×N 的 uint16 表（N = size²，
+# 格子 (x, y) 的编号为 y * size + x；49×49 的地图 N = 2500，约 12.5 MB），
+# 按源格子分块交给进程池，各进程直接写进同一个 .npy 内存映射文件；查询时以只读内存映射打开，不复制。
+# 障碍物格子到任何格子（包括自己）都是 UNREACHABLE。
+
+CHUNK_ROWS = 1  # 每个任务计算多少行地图（size 个源格子一行）
+
+
+class AllPairs:
+    """一张地图的全源最短距离表
+
+    table[i, j] 是编号 i 的格子到编号 j 的格子的最短步数（uint16，只读内存映射）。
+    """
+
+    def __init__(self, table, size):
+        self.table = table
+        self.size = size
+
+    def index(self, points):
+        """[(x, y), ...] -> 格子编号数组"""
+        points = np.asarray(points, dtype=np.intp).reshape(-1, 2)
+        return points[:, 1] * self.size + points[:, 0]
+
+    def distance(self, a, b):
+        """两个格子之间的最短步数，O(1)；到不了时为 UNREACHABLE"""
+        return int(self.table[a[1] * self.size + a[0], b[1] * self.size + b[0]])
+
+    def distances(self, sources, targets):
+        """成对查询：sources[i] 到 targets[i] 的距离（一次花式索引），返回 uint16 数组"""
+        return self.table[self.index(sources), self.index(targets)]
+
+    def matrix(self, sources, targets):
+        """交叉查询：len(sources) × len(targets) 的距离矩阵"""
+        return self.table[np.ix_(self.index(sources), self.index(targets))]
+
+    def field(self, source):
+        """source 到每个格子的距离，(y, x) 下标的 size × size 视图（与 distance_fields 的距离场同形）"""
+        return self.table[source[1] * self.size + source[0]].reshape(self.size, self.size)
+
+    def path_distances(self, path, target):
+        """路径上每一步到 target 的剩余距离，返回 int32 数组"""
+        return self.table[self.index(path), target[1] * self.size + target[0]].astype(np.int32)
+
+
+# 每个子进程的地图和输出文件，在 _init_worker 里打开一次
+_BLOCKED = None
+_TABLE = None
+
+
+def _init_worker(obstacles, size, inclusive, filename):
+    global _BLOCKED, _TABLE
+    _BLOCKED = compile_obstacles(obstacles, size, inclusive).as_array()
+    _TABLE = np.load(filename, mmap_mode='r+')
+
+
+def _build_rows(rows):
+    """计算地图第 rows 行上所有源格子的距离，写入共享的内存映射文件"""
+    size = _BLOCKED.shape[0]
+    for y in rows:
+        for x in range(size):
+            source = y * size + x
+            if _BLOCKED[y, x]:
+                _TABLE[source] = UNREACHABLE
+            else:
+                _TABLE[source] = bfs_field(_BLOCKED, (x, y)).ravel()
+    _TABLE.flush()
+    return len(rows) * size
+
+
+def build_all_pairs(obstacles, size, filename, inclusive=True, workers=None):
+    """计算全源距离表并写入 filename（.npy），按行把源格子分给多个进程"""
+    cells = size * size
+    table = np.lib.format.open_memmap(filename, mode='w+', dtype=np.uint16, shape=(cells, cells))
+    del table
+    chunks = [range(y, min(y + CHUNK_ROWS, size)) for y in range(0, size, CHUNK_ROWS)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(obstacles, size, inclusive, filename)) as pool:
+        return sum(pool.map(_build_rows, chunks))
+
+
+_LOADED = {}
+
+
+def load_all_pairs(obstacles, size, inclusive=True, cache_dir=CACHE_DIR, workers=None):
+    """读取（或计算并写入）地图的全源距离表，以只读内存映射方式返回 AllPairs
+
+    size 与 inclusive 的含义同 occupancy.OccupancyGrid（game_with_obstacle 为 GRID_SIZE + 1、True）。
+    """
+    key = map_hash(obstacles, {}, size, inclusive)
+    loaded = _LOADED.get(key)
+    if loaded is not None:
+        return loaded
+
+    filename = os.path.join(cache_dir, f"all_pairs_{key}.npy")
+    if not os.path.exists(filename):
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写临时文件再替换，没算完的表不会被当成缓存读到
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        build_all_pairs(obstacles, size, tmp, inclusive, workers)
+        os.replace(tmp, filename)
+    loaded = _LOADED[key] = AllPairs(np.load(filename, mmap_mode='r'), size)
+    return loaded
+
+
+def all_pairs_for_module(module, inclusive=True, cache_dir=CACHE_DIR, workers=None):
+    """游戏脚本（障碍地图、game_with_obstacle 等）的全源距离表"""
+    return load_all_pairs(getattr(module, "ALL_OBSTACLES", ()), module.GRID_SIZE + 1,
+                          inclusive, cache_dir, workers)
+
+
+if __name__ == "__main__":
+    # 用法：python all_pairs.py 障碍地图 game_with_obstacle -j 8   预先生成缓存并测量批量查询速度
+    parser = argparse.ArgumentParser(description="生成地图的全源距离表缓存")
+    parser.add_argument("maps", nargs="*", default=["障碍地图"], help="游戏脚本名")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args()
+
+    for name in args.maps:
+        module = importlib.import_module(name)
+        start = time.perf_counter()
+        pairs = all_pairs_for_module(module, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        cells = pairs.table.shape[0]
+        print(f"{name}: {cells}×{cells} uint16（{pairs.table.nbytes / 2**20:.1f} MB），{elapsed:.1f} 秒")
+
+        rng = np.random.default_rng(0)
+        queries = rng.integers(0, module.GRID_SIZE + 1, size=(2, 1_000_000, 2))
+        start = time.perf_counter()
+        pairs.distances(queries[0], queries[1])
+        elapsed = time.perf_counter() - start
+        print(f"  批量查询 100 万对：{elapsed * 1000:.1f} ms（每对 {elapsed:.3f} us）")
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from path_codec import SUFFIX, load_arrays
+from path_state import count_turns_batch
+from snapshots import snapshot_indices
+
+# ================= 存档批量分析 =================
+# 在一个或多个目录里查找 archive_*.json / archive_*.mpath，用进程池并行解析，
+# 每个会话算出一行指标（NumPy 向量化），按文件名顺序逐行写出 CSV。
+# 同时在途的任务数有上限，结果算完就写出，内存占用与存档数量无关。
+#
+# 用法：python analyze_archives.py 数据目录 ... -o summary.csv [--workers 8]
+
+SEGMENTS = (0.3, 0.5, 0.7)  # 记录路径走到这些比例时的位置（下标与 30%、50%、70% 快照图相同）
+
+COLUMNS = [
+    "file", "timestamp", "steps", "turns", "turns_recorded", "duration",
+    "revisits", "revisit_rate", "unique_cells", "time_per_step", "median_step_time",
+    "start_x", "start_y", "end_x", "end_y", "min_x", "max_x", "min_y", "max_y",
+] + [f"{name}_{int(f * 100)}" for f in SEGMENTS for name in ("x", "y")]
+
+
+def find_archives(paths):
+    """展开目录（递归）和通配符，返回排好序的存档文件列表"""
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in ("archive_*.json", f"archive_*{SUFFIX}"):
+                found.update(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+        else:
+            found.update(glob.glob(path))
+    return sorted(found)
+
+
+def load_path(filename):
+    """读取存档，返回 (坐标数组 (N, 2), 各路径点时间或 None, 存档其余字段)"""
+    if filename.endswith(SUFFIX):
+        arrays = load_arrays(filename)
+        return np.column_stack([arrays["x"], arrays["y"]]), arrays["times"], arrays["archive"]
+    with open(filename, encoding="utf-8") as f:
+        archive = json.load(f)
+    points = np.asarray(archive["path"], dtype=np.int32).reshape(-1, 2)
+    times = archive.get("step_times")
+    return points, None if times is None else np.asarray(times, dtype=np.float64), archive
+
+
+def session_metrics(filename):
+    """单个存档的指标字典（在子进程里执行）"""
+    points, times, archive = load_path(filename)
+    meta = archive.get("meta", {})
+    steps = len(points) - 1
+
+    # 坐标编码成一个整数后去重，得到不同格子的数量
+    keys = (points[:, 0].astype(np.int64) << 32) | (points[:, 1].astype(np.int64) & 0xffffffff)
+    unique_cells = len(np.unique(keys))
+    revisits = len(points) - unique_cells
+
+    duration = meta.get("duration")
+    if duration is None and times is not None:
+        duration = float(times[-1])
+
+    row = {
+        "file": filename,
+        "timestamp": meta.get("timestamp", ""),
+        "steps": steps,
+        "turns": int(count_turns_batch([points])[0]),
+        "turns_recorded": meta.get("turns", ""),
+        "duration": duration if duration is not None else "",
+        "revisits": revisits,
+        "revisit_rate": round(revisits / steps, 4) if steps else 0.0,
+        "unique_cells": unique_cells,
+        "time_per_step": round(duration / steps, 4) if steps and duration is not None else "",
+        "median_step_time": round(float(np.median(np.diff(times))), 4) if times is not None and steps else "",
+        "start_x": int(points[0, 0]), "start_y": int(points[0, 1]),
+        "end_x": int(points[-1, 0]), "end_y": int(points[-1, 1]),
+        "min_x": int(points[:, 0].min()), "max_x": int(points[:, 0].max()),
+        "min_y": int(points[:, 1].min()), "max_y": int(points[:, 1].max()),
+    }
+    for fraction, index in zip(SEGMENTS, snapshot_indices(len(points), SEGMENTS)):
+        x, y = points[index]
+        row[f"x_{int(fraction * 100)}"] = int(x)
+        row[f"y_{int(fraction * 100)}"] = int(y)
+    return row
+
+
+def _safe_metrics(filename):
+    try:
+        return session_metrics(filename), None
+    except Exception as exc:
+        return None, f"{filename}: {exc}"
+
+
+def iter_metrics(files, workers=None, window=None):
+    """按 files 的顺序逐个产出 (指标, 错误信息)
+
+    同时提交给进程池的任务最多 window 个（默认 workers 的 4 倍），
+    前面的结果取走后才提交新的，文件再多内存也不会增长。
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    if workers == 1:
+        for filename in files:
+            yield _safe_metrics(filename)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for filename in files:
+            pending.append(pool.submit(_safe_metrics, filename))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def analyze(files, output, workers=None):
+    """把所有存档的指标写成一张 CSV 表，返回 (成功数, 失败数)"""
+    writer = csv.DictWriter(output, fieldnames=COLUMNS)
+    writer.writeheader()
+    done = failed = 0
+    for row, error in iter_metrics(files, workers):
+        if error:
+            print(f"跳过 {error}", file=sys.stderr)
+            failed += 1
+            continue
+        writer.writerow(row)
+        done += 1
+    return done, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="并行分析 archive_*.json / .mpath 存档")
+    parser.add_argument("paths", nargs="*", default=["."], help="存档文件、通配符或目录（递归查找）")
+    parser.add_argument("-o", "--output", help="输出 CSV 文件，默认写到标准输出")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    files = find_archives(args.paths)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            done, failed = analyze(files, f, args.workers)
+    else:
+        done, failed = analyze(files, sys.stdout, args.workers)
+    print(f"共 {len(files)} 个存档，成功 {done}，失败 {failed}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import atexit
+import queue
+import threading
+import traceback
+
+# ================= 后台存档写入 =================
+# 到达终点时的 JSON 存档和路径图片（重新绘制 + PNG 编码）放到后台线程里执行，
+# 主循环继续绘制结束画面；队列有上限，写盘跟不上时 submit 会阻塞而不是无限堆积。
+# 程序退出前（包括直接关闭窗口）close() 会等待队列里的任务全部写完。
+
+
+class ArchiveWriter:
+    """单线程后台写入器，任务按提交顺序执行"""
+
+    def __init__(self, maxsize=16):
+        self.tasks = queue.Queue(maxsize)
+        self.errors = []
+        self.closed = False
+        self.thread = threading.Thread(target=self._worker, name="archive-writer", daemon=True)
+        self.thread.start()
+        # 兜底：即使调用方忘了 close，解释器退出前也会把剩余任务写完
+        atexit.register(self.close)
+
+    def submit(self, func, *args, **kwargs):
+        if self.closed:
+            raise RuntimeError("ArchiveWriter 已关闭")
+        self.tasks.put((func, args, kwargs))
+
+    def pending(self):
+        """尚未写完的任务数"""
+        return self.tasks.unfinished_tasks
+
+    def flush(self):
+        """阻塞到目前为止提交的任务全部完成"""
+        self.tasks.join()
+
+    def close(self):
+        """写完剩余任务并结束后台线程（可重复调用）"""
+        if self.closed:
+            return
+        self.closed = True
+        self.tasks.put(None)
+        self.thread.join()
+
+    def _worker(self):
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                func, args, kwargs = task
+                try:
+                    func(*args, **kwargs)
+                except Exception as exc:
+                    self.errors.append(exc)
+                    traceback.print_exc()
+            finally:
+                self.tasks.task_done()
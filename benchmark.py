@@ -0,0 +1,287 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ================= 热点基准测试 =================
+# 在正式实验前测一遍游戏里的热点函数，和保存的基准结果比较，变慢超过容差就报出来。
+# 覆盖：draw_grid、draw_obstacles、不同路径长度下每帧的 draw_path、is_obstructed、
+# 转弯检测（原来的 calculate_angle，现在是 PathStats.push）、generate_archive、save_archive 和 save_path_image。
+# 每个组合（网格尺寸 × 障碍物数量）临时改写游戏脚本的模块常量（GRID_SIZE、CELL_SIZE、ALL_OBSTACLES、POINTS 等）
+# 后新建 PathGame，障碍物和坐标点由 planner.random_map 按固定种子生成，结果可以重复。
+# 绘制和碰撞检测测 game_with_obstacle，转弯检测和存档测 障碍地图（写文件在临时目录里进行）。
+# 每项重复若干轮取中位数，单位毫秒；结果写成 JSON。
+#
+# 用法：python benchmark.py -o benchmark.json                      跑全部组合并与 benchmark_baseline.json 比较
+#       python benchmark.py --sizes 49 --save-baseline              在实验电脑上保存基准结果
+#       python benchmark.py --tolerance 0.5                         比基准慢 50% 以上才算变慢
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+GRID_SIZES = (49, 200, 1000)
+OBSTACLE_COUNTS = (0, 34, 300)  # 34 与实验地图的障碍物条数相同
+PATH_LENGTHS = (100, 1000, 10000)  # draw_path 测量时的已有路径长度（步）
+ARCHIVE_STEPS = 1000  # 存档相关测试用的路径长度
+VIEW_SIZE = 735  # 网格区域的边长（像素），与实验地图 49 × 15 相同；格子太小时至少 1 像素
+BASELINE_FILE = "benchmark_baseline.json"
+TOLERANCE = 0.25  # 比基准慢 25% 以上算变慢
+REPEAT = 5
+
+
+def measure(func, number, repeat=REPEAT, setup=None):
+    """每轮调用 func number 次，返回各轮每次调用耗时（毫秒）的中位数"""
+    rounds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number * 1000)
+    return statistics.median(rounds)
+
+
+@contextmanager
+def map_config(module, grid_size, obstacles, points):
+    """临时把游戏脚本换成 grid_size 的地图，退出时恢复原来的模块常量"""
+    cell_size = max(1, VIEW_SIZE // grid_size)
+    panel = getattr(module, "PANEL_WIDTH", 0)
+    values = {
+        "GRID_SIZE": grid_size,
+        "CELL_SIZE": cell_size,
+        "WIDTH": grid_size * cell_size + panel,
+        "HEIGHT": grid_size * cell_size,
+        "ALL_OBSTACLES": list(obstacles),
+        "POINTS": dict(points),
+    }
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+# ================= 各项测试 =================
+
+def bench_rendering(module, size, path_lengths):
+    """draw_grid、draw_obstacles 和每帧 draw_path（每帧走一步，每 4 帧撤回一步，与游戏里的路径层用法相同）"""
+    from path_render import random_walk
+
+    game = module.PathGame()
+    surface = pygame.Surface((module.WIDTH, module.HEIGHT))
+    results = {
+        "draw_grid": measure(lambda: game.draw_grid(surface), 20),
+        "draw_obstacles": measure(lambda: game.draw_obstacles(surface), 20),
+    }
+    frames = 200
+    for steps in path_lengths:
+        walk = random_walk(steps + frames * REPEAT, size + 1)
+        state = {}
+
+        def setup():
+            game.path = walk[:steps + 1]
+            game.path_layer.reset(game.path)
+            state["frame"] = 0
+
+        def frame():
+            if state["frame"] % 4 == 3:
+                game.path.pop()
+            else:
+                game.path.append(walk[len(game.path)])
+            state["frame"] += 1
+            game.path_layer.draw(surface, game.path)
+
+        results[f"draw_path[steps={steps}]"] = measure(frame, frames, setup=setup)
+    return results
+
+
+def bench_collision(module, size, queries=20000, seed=0):
+    """is_obstructed：随机坐标（含越界）的每次查询耗时"""
+    game = module.PathGame()
+    rng = random.Random(seed)
+    points = [(rng.randint(-1, size + 1), rng.randint(-1, size + 1)) for _ in range(queries)]
+    is_obstructed = game.is_obstructed
+
+    def query_all():
+        for x, y in points:
+            is_obstructed(x, y)
+
+    return {"is_obstructed": measure(query_all, 1) / queries}
+
+
+def bench_persistence(module, size, steps=ARCHIVE_STEPS, repeat=REPEAT):
+    """转弯检测（PathStats.push，每步）、generate_archive、save_archive 和 save_path_image（每次）"""
+    from path_render import random_walk
+    from path_state import PathStats
+
+    game = module.PathGame()
+    walk = random_walk(steps, size + 1)
+    holder = {}
+
+    def new_stats():
+        holder["stats"] = PathStats(size + 1, walk[:1])
+        holder["i"] = 1
+
+    def push():
+        holder["stats"].push(walk[holder["i"]])
+        holder["i"] += 1
+
+    results = {"turn_detection": measure(push, steps, setup=new_stats)}
+
+    game.path = list(walk)
+    game.current_pos = list(walk[-1])
+    game.step_times = [round(i * 0.3, 3) for i in range(len(walk))]
+    game.stats = PathStats(size + 1, game.path)
+    game.turn_count = game.stats.turns
+    game.start_time = time.time() - game.step_times[-1]
+    game.reset_recognizer()
+
+    results["generate_archive"] = measure(game.generate_archive, 5)
+    archive_data = game.generate_archive()
+    results["save_archive"] = measure(lambda: game.save_archive(archive_data), 1, repeat)
+    results["save_path_image"] = measure(
+        lambda: game.save_path_image(archive_data["meta"]["timestamp"], archive_data["path"], archive_data["step_times"]),
+        1, repeat)
+    game.writer.close()
+    return results
+
+
+def run_suite(sizes=GRID_SIZES, obstacle_counts=OBSTACLE_COUNTS, path_lengths=PATH_LENGTHS, seed=0):
+    """跑全部组合，返回 {测试名: 毫秒}；测试名形如 draw_grid[size=49,obstacles=34]"""
+    from planner import random_map
+
+    render_game = importlib.import_module("game_with_obstacle")
+    archive_game = importlib.import_module("障碍地图")
+    if archive_game.FONT_PATH and not os.path.exists(archive_game.FONT_PATH):
+        archive_game.FONT_PATH = None
+    results = {}
+    for size in sizes:
+        for count in obstacle_counts:
+            spec = random_map(size, count, seed=seed)
+            scenario = f"size={size},obstacles={count}"
+            start = time.perf_counter()
+            timings = {}
+            with map_config(render_game, size, spec["obstacles"], spec["points"]):
+                timings.update(bench_rendering(render_game, size, path_lengths))
+                timings.update(bench_collision(render_game, size, seed=seed))
+            with map_config(archive_game, size, spec["obstacles"], spec["points"]):
+                timings.update(bench_persistence(archive_game, size))
+            for name, ms in timings.items():
+                base, _, option = name.partition("[")
+                key = f"{base}[{scenario},{option[:-1]}]" if option else f"{base}[{scenario}]"
+                results[key] = round(ms, 6)
+            print(f"{scenario}: {len(timings)} 项，{time.perf_counter() - start:.1f} 秒", file=sys.stderr)
+    return results
+
+
+# ================= 与基准比较 =================
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """逐项和基准比较，返回 {测试名: {"ms", "baseline_ms", "ratio", "status"}}
+
+    status：'regression' 比基准慢超过 tolerance，'improved' 快超过 tolerance，'ok'，基准里没有的为 'new'。
+    """
+    report = {}
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if base is None:
+            report[name] = {"ms": ms, "baseline_ms": None, "ratio": None, "status": "new"}
+            continue
+        ratio = ms / base if base else float("inf")
+        if ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 / (1 + tolerance):
+            status = "improved"
+        else:
+            status = "ok"
+        report[name] = {"ms": ms, "baseline_ms": base, "ratio": round(ratio, 3), "status": status}
+    return report
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def load_baseline(filename):
+    """基准文件里的 {测试名: 毫秒}；文件不存在时返回 None"""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量绘制、碰撞检测、转弯检测和存档的耗时，并与保存的基准比较")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(GRID_SIZES), help="网格尺寸")
+    parser.add_argument("--obstacles", nargs="+", type=int, default=list(OBSTACLE_COUNTS), help="障碍物条数")
+    parser.add_argument("--path-lengths", nargs="+", type=int, default=list(PATH_LENGTHS),
+                        help="draw_path 测量时的路径长度（步）")
+    parser.add_argument("--seed", type=int, default=0, help="随机地图和路径的种子")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基准结果文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把这次结果保存为新的基准")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="允许比基准慢的比例")
+    parser.add_argument("-o", "--output", help="把结果和比较写成 JSON 文件（默认打印到标准输出）")
+    args = parser.parse_args(argv)
+
+    baseline_file = os.path.abspath(args.baseline)
+    output = os.path.abspath(args.output) if args.output else None
+    # 存档、图片和距离场缓存写到临时目录，不弄乱工作目录
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run_suite(args.sizes, args.obstacles, args.path_lengths, args.seed)
+    finally:
+        os.chdir(cwd)
+
+    baseline = load_baseline(baseline_file)
+    report = {"environment": environment(), "tolerance": args.tolerance, "results": results}
+    if baseline is not None:
+        report["comparison"] = compare(results, baseline, args.tolerance)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(baseline_file, "w", encoding="utf-8") as f:
+            json.dump({"environment": report["environment"], "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"基准已保存到 {baseline_file}", file=sys.stderr)
+
+    if baseline is None:
+        if not args.save_baseline:
+            print(f"没有基准文件 {baseline_file}（用 --save-baseline 生成）", file=sys.stderr)
+        return 0
+    regressions = [name for name, item in report["comparison"].items() if item["status"] == "regression"]
+    for name in regressions:
+        item = report["comparison"][name]
+        print(f"变慢 {name}: {item['baseline_ms']:.4f} -> {item['ms']:.4f} ms（x{item['ratio']}）", file=sys.stderr)
+    print(f"{len(results)} 项，变慢 {len(regressions)} 项", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# ================= 脚本化的模拟参与者 =================
+# 不用真人按键：用 SDL 的 dummy 驱动在无窗口环境里创建 PathGame，把机器人策略生成的 KEYDOWN 事件
+# 逐帧注入游戏（替换 next_events / pygame.event.get），用来做压力测试和回归测试。
+# 支持 障碍地图、game_with_obstacle 和 UI_GAME 的 PathGame；机器人策略有随机游走、最短路径和
+# "最后欺骗点"绕路（planner.py 按各游戏自己的移动规则规划）。
+# 测量每秒移动步数、每帧耗时和存档写入延迟；--render off 时跳过绘制，只走输入处理和游戏逻辑。
+#
+# 用法：python bots.py --game 障碍地图 game_with_obstacle UI_GAME --policy random shortest deceptive
+#                      --render on off --steps 2000 -o bots.json
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from pygame.locals import KEYDOWN, MOUSEBUTTONDOWN, QUIT, K_UP, K_DOWN, K_LEFT, K_RIGHT  # noqa: E402
+
+GAMES = ("障碍地图", "game_with_obstacle", "UI_GAME")
+POLICIES = ("random", "shortest", "deceptive")
+KEYS = {(0, 1): K_UP, (0, -1): K_DOWN, (-1, 0): K_LEFT, (1, 0): K_RIGHT}
+# UI_GAME 的练习地图没有终点，最短路径和绕路策略借用 game_with_obstacle 的终点
+DEFAULT_GOALS = {'close 1': (20, 18), 'close 2': (31, 29), 'far 1': (5, 1), 'far 2': (48, 44)}
+
+
+def key_event(key):
+    return pygame.event.Event(KEYDOWN, key=key, mod=0, unicode='', scancode=0)
+
+
+def load_game_module(name):
+    """导入游戏脚本；字体文件不存在时改用 pygame 默认字体（FONT_PATH 是实验电脑上的路径）"""
+    module = importlib.import_module(name)
+    if getattr(module, "FONT_PATH", None) and not os.path.exists(module.FONT_PATH):
+        module.FONT_PATH = None
+    return module
+
+
+def movement_rules(name, module):
+    """各游戏自己的移动规则：(障碍物, 每个方向的坐标个数, 障碍物边界是否阻挡, 起点和终点)"""
+    if name == "障碍地图":
+        # 障碍地图 可以穿过障碍物，坐标范围 0..GRID_SIZE - 1
+        return (), module.GRID_SIZE, True, dict(module.POINTS)
+    if name == "UI_GAME":
+        config = module.MAP_CONFIGS[0]
+        return config['obstacles'], module.GRID_SIZE + 1, False, {'start': config['start'], **DEFAULT_GOALS}
+    return module.ALL_OBSTACLES, module.GRID_SIZE + 1, True, dict(module.POINTS)
+
+
+# ================= 机器人策略 =================
+
+class RandomWalk:
+    """每一步随机按一个方向键（撞墙、走回头路由游戏自己拒绝）"""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+
+    def next_key(self, pos):
+        return self.rng.choice(list(KEYS.values()))
+
+
+class FollowPath:
+    """沿规划好的路径按键；到达终点后返回 None"""
+
+    def __init__(self, path):
+        self.path = [tuple(p) for p in path]
+        self.index = {pos: i for i, pos in enumerate(self.path)}
+
+    def next_key(self, pos):
+        i = self.index.get(tuple(pos))
+        if i is None or i + 1 >= len(self.path):
+            return None
+        (x1, y1), (x2, y2) = self.path[i], self.path[i + 1]
+        return KEYS[(x2 - x1, y2 - y1)]
+
+
+def resolve_goal(goal, points):
+    """--goal 对应的该游戏自己的终点名；比较时忽略空格（障碍地图 写 close1，其余游戏写 close 1）"""
+    goals = [name for name in points if name != 'start']
+    for name in goals:
+        if name.replace(" ", "") == goal.replace(" ", ""):
+            return name
+    raise ValueError(f"没有终点 {goal!r}（可选：{', '.join(goals)}）")
+
+
+def make_policy(policy, name, module, goal=None, seed=0):
+    if policy == "random":
+        return RandomWalk(seed)
+    from planner import plan_map
+
+    obstacles, size, inclusive, points = movement_rules(name, module)
+    plans = plan_map(obstacles, points, size, inclusive)
+    goal = resolve_goal(goal, points) if goal else next(g for g, plan in plans.items() if plan is not None)
+    return FollowPath(plans[goal][policy])
+
+
+# ================= 驱动游戏 =================
+
+class Session:
+    """一局模拟游戏的运行记录"""
+
+    def __init__(self, game, policy, steps, check_finish=None):
+        self.game = game
+        self.policy = policy
+        self.steps = steps
+        self.check_finish = check_finish  # 游戏主循环自己不判断终点时，每帧注入前替它判断
+        self.keys = 0
+        self.frame_times = []
+        self.first_frame = self.last_frame = None
+        self.archive_latency = None
+
+    @property
+    def play_time(self):
+        """第一次注入到最后一次注入的时间（不含创建游戏和退出时等待写盘）"""
+        return self.last_frame - self.first_frame
+
+    def position(self):
+        return self.game.current_pos
+
+    def next_batch(self):
+        """下一帧注入的事件；策略结束、按够步数或游戏结束时返回 QUIT"""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+        else:
+            self.first_frame = now
+        self.last_frame = now
+        if self.check_finish is not None:
+            self.check_finish()
+        if self.keys >= self.steps or self.game.finished:
+            return [pygame.event.Event(QUIT)]
+        key = self.policy.next_key(self.position())
+        if key is None:
+            return [pygame.event.Event(QUIT)]
+        self.keys += 1
+        return [key_event(key)]
+
+
+class NoWaitClock:
+    """代替 pygame.time.Clock：不限帧率，测的是游戏本身每帧的耗时"""
+
+    def tick(self, framerate=0):
+        return 0
+
+
+def instrument_archive(game, session):
+    """记录从生成存档到后台线程写完 JSON 和图片的时间"""
+    generate, save = game.generate_archive, game.save_archive
+    started = {}
+
+    def timed_generate():
+        started["t"] = time.perf_counter()
+        return generate()
+
+    def timed_save(archive_data):
+        save(archive_data)
+        session.archive_latency = time.perf_counter() - started["t"]
+
+    game.generate_archive = timed_generate
+    game.save_archive = timed_save
+
+
+def run_obstacle_map(module, policy, steps, render):
+    """障碍地图：点击开始按钮后逐帧注入按键；render 为 False 时只调用 handle_input 和 check_finish，
+    到达终点和退出时仍走游戏自己的 finish_session / close_session（finish 事件、存档、删除检查点）"""
+    game = module.PathGame()
+    session = Session(game, policy, steps)
+    instrument_archive(game, session)
+    start_button = pygame.event.Event(MOUSEBUTTONDOWN, pos=game.start_button_rect().center, button=1)
+    game.handle_input([start_button])
+    if render:
+        game.next_events = session.next_batch
+        game.clock = NoWaitClock()
+        game.run()
+        return session
+    while True:
+        events = session.next_batch()
+        if events[0].type == QUIT:
+            break
+        game.handle_input(events)
+        result = game.check_finish()
+        if result:
+            game.finish_session(result)
+            break
+    game.close_session()
+    return session
+
+
+def run_game_with_obstacle(module, policy, steps, render):
+    game = module.PathGame()
+    # game_with_obstacle 的 run() 不调用 check_finish
+    session = Session(game, policy, steps, game.check_finish)
+    if render:
+        game.next_events = session.next_batch
+        game.clock = NoWaitClock()
+        game.run()
+        return session
+    while True:
+        events = session.next_batch()
+        if events[0].type == QUIT:
+            break
+        game.handle_input(events)
+    return session
+
+
+def run_ui_game(module, policy, steps, render):
+    """UI_GAME：直接驱动练习地图的 PathGame（跳过说明页）；渲染时每帧 update 并贴到屏幕上"""
+    pygame.init()
+    screen = pygame.display.set_mode(module.SCREEN_SIZE)
+    game = module.PathGame(screen, module.ExperimentData(), module.MAP_CONFIGS[0])
+    game.active = True
+    session = Session(game, policy, steps)
+    while True:
+        events = session.next_batch()
+        if events[0].type == QUIT:
+            break
+        if render:
+            screen.fill(module.COLORS['background'])
+            game.update(events)
+            screen.blit(game.game_surface, (0, 0))
+            pygame.display.flip()
+        else:
+            game.handle_input(events)
+    return session
+
+
+RUNNERS = {
+    "障碍地图": run_obstacle_map,
+    "game_with_obstacle": run_game_with_obstacle,
+    "UI_GAME": run_ui_game,
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def drive(name, policy_name, steps=2000, render=True, goal=None, seed=0):
+    """跑一局模拟游戏，返回指标字典"""
+    module = load_game_module(name)
+    policy = make_policy(policy_name, name, module, goal, seed)
+    start = time.perf_counter()
+    session = RUNNERS[name](module, policy, steps, render)
+    elapsed = time.perf_counter() - start
+    moves = len(session.game.path) - 1
+    play = session.play_time
+    frames = session.frame_times
+    return {
+        "game": name,
+        "policy": policy_name,
+        "render": render,
+        "keys": session.keys,
+        "moves": moves,
+        "finished": bool(session.game.finished),
+        "elapsed_s": round(elapsed, 4),
+        "play_s": round(play, 4),
+        "moves_per_s": round(moves / play, 1) if play else None,
+        "keys_per_s": round(session.keys / play, 1) if play else None,
+        "frame_ms_mean": round(sum(frames) / len(frames) * 1000, 4) if frames else None,
+        "frame_ms_p95": round(percentile(frames, 0.95) * 1000, 4) if frames else None,
+        "archive_latency_ms": None if session.archive_latency is None else round(session.archive_latency * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用脚本化的模拟参与者无窗口驱动 PathGame，测量吞吐和延迟")
+    parser.add_argument("--game", nargs="+", choices=GAMES, default=list(GAMES))
+    parser.add_argument("--policy", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--render", nargs="+", choices=("on", "off"), default=["on", "off"],
+                        help="on：完整的绘制流程；off：只处理输入和游戏逻辑")
+    parser.add_argument("--steps", type=int, default=2000, help="每局最多注入的按键数")
+    parser.add_argument("--goal", help="最短路径和绕路策略的目标终点，如 close1（默认第一个终点）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="存档、日志和图片写到这个目录（默认新建临时目录）")
+    parser.add_argument("-o", "--output", help="把结果写成 JSON 文件")
+    args = parser.parse_args(argv)
+    if args.goal:
+        # 先对每个游戏检查终点名，不要跑了几局才报错
+        for name in args.game:
+            module = load_game_module(name)
+            try:
+                resolve_goal(args.goal, movement_rules(name, module)[3])
+            except ValueError as e:
+                parser.error(f"{name}: {e}")
+
+    # -o 相对于调用时的目录，切换到工作目录之前先转成绝对路径
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="bots_"))
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    results = []
+    print(f"{'游戏':<20} {'策略':<10} {'绘制':<4} {'步数':>6} {'步/秒':>10} {'帧(ms)':>8} {'p95':>8} {'存档(ms)':>9}")
+    try:
+        for name in args.game:
+            for policy in args.policy:
+                for render in args.render:
+                    result = drive(name, policy, args.steps, render == "on", args.goal, args.seed)
+                    results.append(result)
+                    print(f"{name:<20} {policy:<10} {render:<4} {result['moves']:>6} {result['moves_per_s']:>10} "
+                          f"{result['frame_ms_mean'] or 0:>8.3f} {result['frame_ms_p95'] or 0:>8.3f} "
+                          f"{result['archive_latency_ms'] if result['archive_latency_ms'] is not None else '-':>9}")
+    finally:
+        os.chdir(cwd)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"存档和日志写在 {workdir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import glob
+import hashlib
+import json
+import os
+
+from session_log import LOG_DIR
+
+# ================= 会话检查点 =================
+# 每隔 CHECKPOINT_EVERY 个事件把会话状态（位置、路径、转弯、暂停和计时）写成一个紧凑的检查点，
+# 同时记下此时事件日志的文件长度。恢复时读取检查点，再从这个位置开始重放日志尾部，
+# 恢复耗时只与尾部长度有关，与整个会话有多长无关。
+# 会话正常到达终点后检查点会被删除，所以目录里剩下的检查点都对应未完成的会话。
+# 几个游戏脚本共用 sessions/ 目录，日志的 start 事件和检查点里都记下游戏名和地图指纹，
+# --resume 只会找到同一游戏、同一张地图的会话，指定了别的游戏的检查点时拒绝恢复。
+
+CHECKPOINT_EVERY = 100
+
+
+def map_identity(game, grid_size, obstacles=(), points=None):
+    """{"game": 游戏脚本名, "map": 地图指纹}；指纹由网格尺寸、障碍物和坐标点算出，地图改了就不同"""
+    config = [grid_size, [list(o) for o in obstacles], sorted((name, list(pos)) for name, pos in (points or {}).items())]
+    digest = hashlib.sha1(json.dumps(config, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+    return {"game": game, "map": digest}
+
+
+def check_identity(state, identity, path):
+    """检查点不属于当前游戏或地图时抛出 ValueError"""
+    found = {key: state.get(key) for key in identity}
+    if found != identity:
+        raise ValueError(f"{path} 是 {found['game'] or '未知游戏'}（地图 {found['map']}）的会话，"
+                         f"不能在 {identity['game']}（地图 {identity['map']}）里恢复")
+
+
+def checkpoint_path(log_path):
+    """sessions/session_<时间戳>.jsonl -> sessions/session_<时间戳>.ckpt.json"""
+    return os.path.splitext(log_path)[0] + ".ckpt.json"
+
+
+def write_checkpoint(path, state, log_path):
+    """原子写入检查点（先写临时文件再替换），在后台写入线程中调用
+
+    写入线程按提交顺序执行任务，此时之前提交的日志批次都已落盘，文件长度就是重放起点。
+    """
+    state = dict(state)
+    state["log_path"] = log_path
+    state["log_offset"] = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def remove_checkpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def read_tail(log_path, offset, seq):
+    """从 offset 开始读取日志尾部中 seq 不小于给定值的事件
+
+    返回 (事件列表, 最后一个完整行的结束位置)。崩溃时写了一半的最后一行不计入，
+    调用方应把日志截断到返回的位置再继续追加。
+    """
+    records = []
+    end = offset
+    if not os.path.exists(log_path):
+        return records, 0
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        for line in iter(f.readline, b""):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            end = f.tell()
+            if record["seq"] >= seq:
+                records.append(record)
+    return records, end
+
+
+def truncate_log(log_path, end):
+    if os.path.exists(log_path) and os.path.getsize(log_path) > end:
+        with open(log_path, "r+b") as f:
+            f.truncate(end)
+
+
+def latest_checkpoint(directory=LOG_DIR, identity=None):
+    """最近一次未完成会话的检查点；identity（map_identity 的结果）不为 None 时只找同一游戏和地图的；没有时返回 None"""
+    paths = sorted(glob.glob(os.path.join(directory, "session_*.ckpt.json")))
+    for path in reversed(paths):
+        if identity is None:
+            return path
+        try:
+            state = read_checkpoint(path)
+        except (OSError, ValueError):
+            continue
+        if all(state.get(key) == value for key, value in identity.items()):
+            return path
+    return None
@@ -0,0 +1,105 @@
+import time
+
+import pygame
+
+# ================= 脏矩形渲染 =================
+# 两次按键之间画面上只有当前位置、最新一段路径和 HUD 文字会变化。
+# 'dirty' 模式下只重画并推送这些区域（pygame.display.update(rects)），
+# 'full' 模式保持原来的整屏重画 + pygame.display.flip()，两者可以切换对比。
+
+RENDER_MODES = ('full', 'dirty')
+
+
+class DirtyRectRenderer:
+    """记录自上一帧以来发生变化的屏幕区域"""
+
+    def __init__(self, mode='full', screen_size=None):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"未知的渲染模式: {mode}")
+        self.mode = mode
+        self.screen_rect = pygame.Rect((0, 0), screen_size or pygame.display.get_surface().get_size())
+        self.rects = []
+        self.full_redraw = True  # 第一帧总是整屏绘制
+        self.hud_rects = {}
+
+        # 统计信息，用于比较两种模式的开销
+        self.frames = 0
+        self.presented_frames = 0
+        self.pushed_pixels = 0
+        self.present_time = 0.0
+
+    def mark(self, rect):
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    def mark_all(self):
+        self.full_redraw = True
+
+    def mark_step(self, p1, p2, pad):
+        """标记一步移动（或撤回）影响的区域：两端的位置标记和中间的路径段，p1/p2 为屏幕坐标"""
+        left, right = min(p1[0], p2[0]), max(p1[0], p2[0])
+        top, bottom = min(p1[1], p2[1]), max(p1[1], p2[1])
+        self.mark((left - pad, top - pad, right - left + 2 * pad + 1, bottom - top + 2 * pad + 1))
+
+    def mark_text(self, slot, text, rect):
+        """HUD 文字：位置 slot 上的文字内容变化时，新旧两个区域都要重画"""
+        rect = pygame.Rect(rect)
+        old = self.hud_rects.get(slot)
+        if old is None or old[0] != text or old[1] != rect:
+            if old is not None:
+                self.mark(old[1])
+            self.mark(rect)
+            self.hud_rects[slot] = (text, rect)
+
+    def has_changes(self):
+        """自上一帧以来是否有需要重画的内容"""
+        return self.full_redraw or bool(self.rects)
+
+    def regions(self):
+        """本帧需要重画的区域；None 表示整屏"""
+        self.frames += 1
+        if self.mode == 'full' or self.full_redraw:
+            return [None]
+        return merge_rects(self.rects)
+
+    def present(self, screen):
+        """把本帧画好的内容推送到窗口，并清空脏区域"""
+        start = time.perf_counter()
+        if self.mode == 'full' or self.full_redraw:
+            pygame.display.flip()
+            self.pushed_pixels += self.screen_rect.width * self.screen_rect.height
+            self.presented_frames += 1
+        elif self.rects:
+            rects = merge_rects(self.rects)
+            pygame.display.update(rects)
+            self.pushed_pixels += sum(r.width * r.height for r in rects)
+            self.presented_frames += 1
+        self.present_time += time.perf_counter() - start
+        self.rects = []
+        self.full_redraw = False
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'frames': self.frames,
+            'presented_frames': self.presented_frames,
+            'pushed_pixels': self.pushed_pixels,
+            'present_time': round(self.present_time, 4),
+        }
+
+
+def merge_rects(rects):
+    """合并相互重叠的矩形，避免同一块区域被重画多次"""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
@@ -0,0 +1,151 @@
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from occupancy import compile_obstacles
+
+# ================= 终点距离场 =================
+# 每个格子到每个终点（POINTS 中除 start 以外的点）的最短四连通步数，绕开 ALL_OBSTACLES。
+# 一张地图只用 NumPy 逐层扩展的 BFS 计算一次，存成 uint16 数组放在磁盘缓存里，
+# 文件名是地图定义（尺寸、障碍物、终点、障碍物边界规则）的哈希；之后以内存映射方式打开。
+# 欺骗性、路径效率等指标里"某一步离某个终点还有多远"就变成一次数组下标访问。
+
+CACHE_DIR = "distance_cache"
+UNREACHABLE = np.iinfo(np.uint16).max  # 到不了终点的格子（以及障碍物内部）
+
+
+def bfs_field(blocked, goal):
+    """blocked：(y, x) 下标的 bool 占用表；goal：(x, y)。返回 uint16 距离场
+
+    每一轮把当前波前向上下左右各移一格，与"可走且未访问"相与得到下一层，
+    轮数等于最远可达格子的距离，每轮都是整张数组的向量运算。终点本身总是视为可走。
+    """
+    free = ~blocked
+    gx, gy = goal
+    free[gy, gx] = True
+    dist = np.full(blocked.shape, UNREACHABLE, dtype=np.uint16)
+    dist[gy, gx] = 0
+    frontier = np.zeros(blocked.shape, dtype=bool)
+    frontier[gy, gx] = True
+    unvisited = free.copy()
+    unvisited[gy, gx] = False
+    step = 0
+    while frontier.any():
+        step += 1
+        grown = np.zeros_like(frontier)
+        grown[1:, :] |= frontier[:-1, :]
+        grown[:-1, :] |= frontier[1:, :]
+        grown[:, 1:] |= frontier[:, :-1]
+        grown[:, :-1] |= frontier[:, 1:]
+        frontier = grown & unvisited
+        dist[frontier] = step
+        unvisited &= ~frontier
+    return dist
+
+
+def map_hash(obstacles, goals, size, inclusive):
+    """地图定义的哈希，作为缓存文件名；障碍物、终点或规则任一变化都会得到新的文件"""
+    definition = {
+        "size": size,
+        "inclusive": inclusive,
+        "obstacles": sorted(list(o) for o in obstacles),
+        "goals": sorted([name, list(pos)] for name, pos in goals.items()),
+    }
+    text = json.dumps(definition, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class DistanceFields:
+    """一张地图到各终点的距离场
+
+    fields[k, y, x] 是坐标 (x, y) 到第 k 个终点 names[k] 的最短步数（uint16，可以是只读的内存映射）。
+    """
+
+    def __init__(self, names, fields):
+        self.names = list(names)
+        self.index = {name: k for k, name in enumerate(self.names)}
+        self.fields = fields
+        self.size = fields.shape[-1]
+
+    def field(self, goal):
+        return self.fields[self.index[goal]]
+
+    def distance(self, goal, pos):
+        """(x, y) 到终点的最短步数，O(1)；到不了时为 UNREACHABLE"""
+        x, y = pos
+        return int(self.fields[self.index[goal], y, x])
+
+    def costs(self, pos):
+        """(x, y) 到每个终点的距离 {终点名: 步数}"""
+        x, y = pos
+        column = self.fields[:, y, x]
+        return {name: int(column[k]) for k, name in enumerate(self.names)}
+
+    def path_costs(self, goal, path):
+        """整条路径上每一步到终点的剩余距离（一次花式索引），返回 int32 数组"""
+        points = np.asarray(path, dtype=np.intp).reshape(-1, 2)
+        return self.field(goal)[points[:, 1], points[:, 0]].astype(np.int32)
+
+    def efficiency(self, goal, path):
+        """路径效率：起点到终点的最短步数 / 实际步数（1.0 为最短路径）"""
+        steps = len(path) - 1
+        if steps <= 0:
+            return 1.0
+        return self.distance(goal, path[0]) / steps
+
+
+def compute_fields(obstacles, goals, size, inclusive=True):
+    blocked = compile_obstacles(obstacles, size, inclusive).as_array()
+    return np.stack([bfs_field(blocked, pos) for pos in goals.values()])
+
+
+_LOADED = {}
+
+
+def load_distance_fields(obstacles, goals, size, inclusive=True, cache_dir=CACHE_DIR):
+    """读取（或计算并写入）地图的距离场缓存，以内存映射方式返回 DistanceFields
+
+    obstacles：(x, y, w, h) 列表；goals：{终点名: (x, y)}；
+    size 与 inclusive 的含义同 occupancy.OccupancyGrid（game_with_obstacle 为 GRID_SIZE + 1、True）。
+    """
+    key = map_hash(obstacles, goals, size, inclusive)
+    loaded = _LOADED.get(key)
+    if loaded is not None:
+        return loaded
+
+    filename = os.path.join(cache_dir, f"distance_{key}.npy")
+    if not os.path.exists(filename):
+        fields = compute_fields(obstacles, goals, size, inclusive)
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写临时文件再替换，多个进程同时计算也不会读到写了一半的缓存
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, fields)
+        os.replace(tmp, filename)
+    loaded = _LOADED[key] = DistanceFields(goals.keys(), np.load(filename, mmap_mode='r'))
+    return loaded
+
+
+def fields_for_module(module, inclusive=True, cache_dir=CACHE_DIR):
+    """游戏脚本（障碍地图、game_with_obstacle 等）的距离场：终点为 POINTS 中除 start 以外的点"""
+    goals = {name: tuple(pos) for name, pos in module.POINTS.items() if name != 'start'}
+    return load_distance_fields(getattr(module, "ALL_OBSTACLES", ()), goals,
+                                module.GRID_SIZE + 1, inclusive, cache_dir)
+
+
+if __name__ == "__main__":
+    # 用法：python distance_fields.py 障碍地图 game_with_obstacle ...   预先生成缓存并打印概况
+    for name in sys.argv[1:] or ["障碍地图"]:
+        module = importlib.import_module(name)
+        start = time.perf_counter()
+        fields = fields_for_module(module)
+        elapsed = (time.perf_counter() - start) * 1000
+        origin = tuple(module.POINTS['start'])
+        print(f"{name}: {fields.fields.shape} uint16, {elapsed:.1f} ms")
+        for goal, cost in fields.costs(origin).items():
+            print(f"  start {origin} -> {goal}: {cost} 步")
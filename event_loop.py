@@ -0,0 +1,25 @@
+import pygame
+
+# ================= 事件驱动的主循环 =================
+# 原来的主循环以固定 30 FPS 轮询并重画，参与者思考时也一直占用 CPU。
+# 事件驱动模式下用 pygame.event.wait 阻塞等待输入，超时只用来刷新计时显示，
+# 没有输入、画面也没有变化时进程处于休眠状态。
+
+IDLE_TIMEOUT_MS = 1000  # 没有计时显示时的最长等待时间
+
+
+def wait_events(timeout_ms=IDLE_TIMEOUT_MS):
+    """阻塞等待事件：超时返回 []，否则返回第一个事件以及队列中已有的其余事件"""
+    if timeout_ms is None:
+        event = pygame.event.wait()
+    else:
+        event = pygame.event.wait(max(1, int(timeout_ms)))
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def ms_until_next_tick(elapsed, resolution=0.1):
+    """计时显示精度为 resolution 秒时，距离显示的数字下一次变化还有多少毫秒"""
+    remaining = resolution - (elapsed % resolution)
+    return int(remaining * 1000) + 1
@@ -0,0 +1,161 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from replay import Replay
+from snapshots import MAPS, SNAPSHOT_FRACTIONS, load_archive, map_style, snapshot_indices
+
+# ================= 路径动画导出 =================
+# 把一次会话导出成路径逐渐生长的动画（PNG 序列或 GIF），用于汇报和编码员培训。
+# 主进程用 replay.Replay 的增量绘制逐帧画出路径（每帧只补画新增的线段），
+# 经 pygame.surfarray 取出 NumPy 数组交给进程池编码；同时在途的帧数有上限，内存不随帧数增长。
+# 可选在路径走到 30%、50%、70% 时留下红色圆点（与 空地图 保存的路径图相同）。
+# GIF 需要安装 Pillow（pip install Pillow）；PNG 序列只需要 pygame。
+#
+# 用法：python export_animation.py archive_*.json --map 空地图 --format gif -o animations --length 15 --markers -j 8
+
+FORMATS = ('png', 'gif')
+DEFAULT_FPS = 10
+DEFAULT_LENGTH = 15.0  # 不指定 --speed 时，把整个会话压缩成这么多秒的动画
+MARKER_RADIUS = 6
+
+
+def frame_times(duration, fps, speed):
+    """每一帧对应的回放时间（秒），最后一帧总是会话结束时刻"""
+    count = int(duration * fps / speed) + 1
+    times = [i * speed / fps for i in range(count)]
+    if times[-1] < duration:
+        times.append(duration)
+    return times
+
+
+def render_frames(replay, fps=DEFAULT_FPS, speed=None, length=DEFAULT_LENGTH,
+                  fractions=(), by='step', scale=1.0):
+    """逐帧产出 surfarray 数组（(宽, 高, 3) 的 uint8），路径按时间增量绘制"""
+    import pygame
+
+    if speed is None:
+        speed = max(replay.duration / length, 1e-6) if replay.duration else 1.0
+    markers = sorted(snapshot_indices(len(replay.path), fractions, replay.times, by)) if fractions else []
+    color = replay.style.colors.get('highlight', (255, 0, 0))
+    target = replay.style.background().copy()
+    for t in frame_times(replay.duration, fps, speed):
+        replay.frame(replay.step_at(t), target)
+        for index in markers:
+            if index > replay.step:
+                break
+            pygame.draw.circle(target, color, replay.style.convert_coords(*replay.path[index]), MARKER_RADIUS)
+        frame = target
+        if scale != 1.0:
+            size = (max(1, round(target.get_width() * scale)), max(1, round(target.get_height() * scale)))
+            frame = pygame.transform.smoothscale(target, size)
+        yield pygame.surfarray.array3d(frame)
+
+
+# ================= 子进程编码 =================
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def _encode_png(task):
+    import pygame
+
+    pixels, filename = task
+    pygame.image.save(pygame.surfarray.make_surface(pixels), filename)
+    return filename
+
+
+def _quantize_gif(pixels):
+    """(宽, 高, 3) 数组 -> 调色板模式的 Pillow 图像（GIF 的每帧最多 256 色）"""
+    from PIL import Image
+
+    return Image.fromarray(pixels.transpose(1, 0, 2)).quantize(colors=256)
+
+
+def _bounded_map(pool, func, tasks, window):
+    """与 pool.map 相同的顺序产出结果，但同时提交的任务最多 window 个"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def export_archive(filename, style, pool, output, fmt='gif', window=16, **options):
+    """导出一个存档的动画，返回 (输出路径, 帧数)"""
+    archive = load_archive(filename)
+    replay = Replay(archive, style)
+    timestamp = archive.get("meta", {}).get("timestamp") or os.path.splitext(os.path.basename(filename))[0]
+    frames = render_frames(replay, **options)
+
+    if fmt == 'png':
+        directory = os.path.join(output, f"path_{timestamp}")
+        os.makedirs(directory, exist_ok=True)
+        tasks = ((pixels, os.path.join(directory, f"frame_{i:05d}.png")) for i, pixels in enumerate(frames))
+        count = sum(1 for _ in _bounded_map(pool, _encode_png, tasks, window))
+        return directory, count
+
+    images = list(_bounded_map(pool, _quantize_gif, frames, window))
+    target = os.path.join(output, f"path_{timestamp}.gif")
+    fps = options.get("fps", DEFAULT_FPS)
+    # 最后一帧停留 2 秒，方便看清完整路径
+    durations = [round(1000 / fps)] * (len(images) - 1) + [2000]
+    images[0].save(target, save_all=True, append_images=images[1:], duration=durations, loop=0)
+    return target, len(images)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把存档导出成路径生长动画（PNG 序列或 GIF，多进程编码）")
+    parser.add_argument("archives", nargs="+", help="archive_*.json / .mpath 文件")
+    parser.add_argument("--map", default="障碍地图", choices=sorted(MAPS), help="存档来自哪个游戏脚本")
+    parser.add_argument("--format", choices=FORMATS, default='gif')
+    parser.add_argument("-o", "--output", default="animations", help="输出目录")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="动画帧率")
+    parser.add_argument("--speed", type=float, default=None, help="播放倍速；不指定时按 --length 自动计算")
+    parser.add_argument("--length", type=float, default=DEFAULT_LENGTH, help="动画总长度（秒）")
+    parser.add_argument("--markers", action="store_true", help="在路径走到 30%%、50%%、70%% 处留下圆点")
+    parser.add_argument("--by", choices=('step', 'time'), default='step', help="圆点位置按步数还是按用时比例")
+    parser.add_argument("--scale", type=float, default=1.0, help="缩放比例，例如 0.5 生成更小的 GIF")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="编码进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    if args.format == 'gif':
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            parser.error("导出 GIF 需要 Pillow：pip install Pillow（或改用 --format png）")
+
+    _init_worker()
+    import pygame
+
+    pygame.init()
+    os.makedirs(args.output, exist_ok=True)
+    style = map_style(args.map)
+    options = {"fps": args.fps, "speed": args.speed, "length": args.length,
+               "fractions": SNAPSHOT_FRACTIONS if args.markers else (), "by": args.by, "scale": args.scale}
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    total = failed = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        for filename in args.archives:
+            try:
+                target, count = export_archive(filename, style, pool, args.output, args.format,
+                                               window=workers * 4, **options)
+            except Exception as exc:
+                print(f"跳过 {filename}: {exc}", file=sys.stderr)
+                failed += 1
+                continue
+            total += count
+            print(f"{filename} -> {target}（{count} 帧）")
+    elapsed = time.perf_counter() - start
+    print(f"共 {len(args.archives)} 个存档，失败 {failed}，{total} 帧，用时 {elapsed:.1f} 秒", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
 import pygame  
 import time  
 from pygame.locals import *  
+from event_loop import wait_events, ms_until_next_tick
+from path_render import PathLayer
 
 
 # 游戏配置  
 GRID_SIZE = 49  # 0-49共50个坐标点  
 CELL_SIZE = 15   # 像素尺寸  
 WIDTH, HEIGHT = GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待输入，只在有输入或计时显示变化时重画
 
 # 颜色  
 COLORS = {  
@@ -30,7 +33,7 @@ POINTS = {
 }  
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("Grid Path Game")  
@@ -40,9 +43,12 @@ class PathGame:
         # 游戏状态初始化  
         self.current_pos = list(POINTS['start'])  
         self.path = [tuple(self.current_pos)]  # 路径记录  
+        # 常驻路径层：移动只画新线段，不再每帧重画整条路径  
+        self.path_layer = PathLayer(self.convert_coords, (WIDTH, HEIGHT), (0,0,0), 2, self.path)  
         self.start_time = time.time()  
         self.running = True  
         self.finished = False  
+        self.event_driven = event_driven  
 
     def convert_coords(self, x, y):  
         """将逻辑坐标转换为屏幕坐标（左下角原点转左上角）"""  
@@ -69,13 +75,17 @@ class PathGame:
 
     def draw_path(self):  
         """绘制玩家路径"""  
-        if len(self.path) > 1:  
-            points = [self.convert_coords(x, y) for x, y in self.path]  
-            pygame.draw.lines(self.screen, (0,0,0), False, points, 2)  
+        self.path_layer.draw(self.screen, self.path)  
 
-    def handle_input(self):  
+    def next_events(self):  
+        """轮询模式直接取事件；事件驱动模式阻塞到有输入或计时显示需要刷新为止"""  
+        if not self.event_driven:  
+            return pygame.event.get()  
+        return wait_events(ms_until_next_tick(time.time() - self.start_time))  
+
+    def handle_input(self, events):  
         """处理键盘输入"""  
-        for event in pygame.event.get():  
+        for event in events:  
             if event.type == QUIT:  
                 self.running = False  
                 
@@ -122,9 +132,16 @@ class PathGame:
 
     def run(self):  
         """主游戏循环"""  
+        last_timer = None  
         while self.running:  
+            events = self.next_events()  
+            self.handle_input(events)  
+            timer = f"时间: {time.time()-self.start_time:.1f}秒"  
+            # 事件驱动模式下没有输入、计时显示也没变化时不重画  
+            if self.event_driven and not events and timer == last_timer:  
+                continue  
+            last_timer = timer  
             self.screen.fill(COLORS['background'])  
-            self.handle_input()  
             
             # 绘制 
             self.draw_grid()  
@@ -132,8 +149,7 @@ class PathGame:
             self.draw_path()  
             
             # 显示统计信息（后期可以去掉显示页面）  
-            time_text = self.font.render(  
-                f"时间: {time.time()-self.start_time:.1f}秒", True, (0,0,0))  
+            time_text = self.font.render(timer, True, (0,0,0))  
             steps_text = self.font.render(  
                 f"步数: {len(self.path)-1}", True, (0,0,0))  
             self.screen.blit(time_text, (10, 10))  
@@ -147,7 +163,8 @@ class PathGame:
                 self.screen.blit(finish_text, (WIDTH//2-150, HEIGHT//2))  
             
             pygame.display.flip()  
-            self.clock.tick(30)  
+            if not self.event_driven:  
+                self.clock.tick(30)  
             
         pygame.quit()  
 
@@ -1,11 +1,21 @@
 import pygame  
 import time  
 from pygame.locals import *  
+from occupancy import compile_obstacles
+from path_state import VisitedCells
+from render_cache import get_static_layer, map_key
+from dirty_rects import DirtyRectRenderer
+from event_loop import wait_events, ms_until_next_tick
+from text_cache import TextCache
+from path_render import PathLayer
 
 # 游戏配置  
 GRID_SIZE = 49  
 CELL_SIZE = 15  
 WIDTH, HEIGHT = GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE  
+RENDER_MODE = 'full'  # 'full' 每帧整屏刷新；'dirty' 只刷新发生变化的区域
+EVENT_DRIVEN = False  # True 时阻塞等待输入，只在状态或计时显示变化时重画
+MARKER_PAD = 8  # 位置标记半径 + 路径线宽，用于计算一步移动的重画区域
 
 # 颜色配置
 COLORS = {  
@@ -49,12 +59,15 @@ MIRRORED_OBSTACLES = [
 ALL_OBSTACLES = ORIGINAL_OBSTACLES + MIRRORED_OBSTACLES  
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, render_mode=RENDER_MODE, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("对称障碍物路径游戏")  
         self.clock = pygame.time.Clock()  
-        self.font = pygame.font.SysFont('Arial', 20)  
+        # 文字渲染结果缓存，计时和步数由缓存的数字字形拼接
+        self.text = TextCache(lambda size: pygame.font.SysFont('Arial', size), 20)  
+        self.renderer = DirtyRectRenderer(render_mode, (WIDTH, HEIGHT))  
+        self.event_driven = event_driven  
         
         # 游戏状态初始化  
         self.current_pos = list(POINTS['start'])  
@@ -63,54 +76,80 @@ class PathGame:
         self.running = True  
         self.finished = False  
 
+        # 障碍物预编译为占用栅格（坐标范围 0..GRID_SIZE，障碍物边界也不可通过）
+        self.occupancy = compile_obstacles(ALL_OBSTACLES, GRID_SIZE + 1, inclusive=True)
+        # 与 self.path 同步的访问计数，重复访问检查为 O(1)
+        self.visited = VisitedCells(GRID_SIZE + 1, self.path)
+        # 常驻路径层：移动只画新线段，撤回只重画局部
+        self.path_layer = PathLayer(self.convert_coords, (WIDTH, HEIGHT), (0,0,0), 2, self.path)
+        # 静态背景层的缓存键，地图配置变化时自动重绘
+        self.map_key = map_key(GRID_SIZE, CELL_SIZE, ALL_OBSTACLES, POINTS, COLORS)
+
     def convert_coords(self, x, y):  
         return (x * CELL_SIZE, (GRID_SIZE - y) * CELL_SIZE)  
 
-    def draw_grid(self):  
+    def draw_grid(self, surface):  
         for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(self.screen, COLORS['grid'],
+            pygame.draw.line(surface, COLORS['grid'],
                             (i * CELL_SIZE, 0), (i * CELL_SIZE, HEIGHT))  
-            pygame.draw.line(self.screen, COLORS['grid'],
+            pygame.draw.line(surface, COLORS['grid'],
                             (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))  
 
-    def draw_obstacles(self):  
+    def draw_obstacles(self, surface):  
         for x, y, w, h in ALL_OBSTACLES:  
             # pygame坐标系默认左上角为原点，需要转换
             rect_x = x * CELL_SIZE
             rect_y = (GRID_SIZE - y - h) * CELL_SIZE  
-            pygame.draw.rect(self.screen, COLORS['obstacle'],
+            pygame.draw.rect(surface, COLORS['obstacle'],
                             (rect_x, rect_y, w*CELL_SIZE, h*CELL_SIZE))
 
-    def draw_points(self):  
+    def draw_points(self, surface):  
         for name, (x, y) in POINTS.items():  
             pos = self.convert_coords(x, y)  
             color = COLORS.get(name, (0,0,0))  
-            pygame.draw.circle(self.screen, color, pos, 6)  
+            pygame.draw.circle(surface, color, pos, 6)  
+
+    def build_background(self, surface):  
+        """静态背景层：网格和障碍物，只在缓存失效时绘制（坐标点画在路径上面，每帧单独画）"""
+        surface.fill(COLORS['background'])  
+        self.draw_grid(surface)  
+        self.draw_obstacles(surface)  
+
+    def draw_background(self):  
+        background = get_static_layer(self.map_key, (WIDTH, HEIGHT), self.build_background)  
+        self.screen.blit(background, (0, 0))  
+
+    def draw_current(self):  
         pygame.draw.circle(self.screen, COLORS['current'],
                           self.convert_coords(*self.current_pos), 6)  
 
     def draw_path(self):  
-        if len(self.path) > 1:  
-            points = [self.convert_coords(x, y) for x, y in self.path]  
-            pygame.draw.lines(self.screen, (0,0,0), False, points, 2)  
+        self.path_layer.draw(self.screen, self.path)  
 
     def is_obstructed(self, x, y):  
         """检查坐标是否在障碍物区域内"""
-        for ox, oy, w, h in ALL_OBSTACLES:
-            if ox <= x <= ox + w and oy <= y <= oy + h:
-                return True
-        return False
+        return self.occupancy.is_blocked(x, y)
 
-    def handle_input(self):  
-        for event in pygame.event.get():  
+    def next_events(self):  
+        """轮询模式直接取事件；事件驱动模式阻塞到有输入或计时显示需要刷新为止"""
+        if not self.event_driven:  
+            return pygame.event.get()  
+        return wait_events(ms_until_next_tick(time.time() - self.start_time))  
+
+    def handle_input(self, events):  
+        for event in events:  
             if event.type == QUIT:  
                 self.running = False  
+            if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):  
+                self.renderer.mark_all()  
                 
             if event.type == KEYDOWN and not self.finished:  
                 if event.key == K_BACKSPACE:  
                     if len(self.path) > 1:  
-                        self.path.pop()  
+                        removed = self.path.pop()  
+                        self.visited.pop(removed)  
                         self.current_pos = list(self.path[-1])  
+                        self.mark_step(removed, self.path[-1])  
                     return  
                 
                 dx, dy = 0, 0  
@@ -129,13 +168,19 @@ class PathGame:
                 
                 if not (0 <= new_x <= GRID_SIZE and 0 <= new_y <= GRID_SIZE):  
                     return  
-                if (new_x, new_y) in self.path:  
+                if (new_x, new_y) in self.visited:  
                     return  
                 if abs(new_x - self.current_pos[0]) + abs(new_y - self.current_pos[1]) != 1:  
                     return  
                 
                 self.current_pos = [new_x, new_y]  
                 self.path.append(tuple(self.current_pos))  
+                self.visited.push(self.path[-1])  
+                self.mark_step(self.path[-2], self.path[-1])  
+
+    def mark_step(self, p1, p2):  
+        """记录一步移动/撤回所影响的屏幕区域（脏矩形模式下只重画这部分）"""
+        self.renderer.mark_step(self.convert_coords(*p1), self.convert_coords(*p2), MARKER_PAD)  
 
     def check_finish(self):  
         current = tuple(self.current_pos)  
@@ -145,33 +190,45 @@ class PathGame:
                 return name  
         return None  
 
+    def hud_texts(self):  
+        """状态信息：(文字, 位置, 颜色) 列表"""
+        texts = [  
+            (f"时间: {time.time()-self.start_time:.1f}秒", (10, 10), (0,0,0)),  
+            (f"步数: {len(self.path)-1}", (10, 35), (0,0,0)),  
+        ]  
+        if result := self.check_finish():  
+            texts.append((f"到达 {result}！总步数: {len(self.path)-1}",  
+                          (WIDTH//2-150, HEIGHT//2), (0,0,255)))  
+        return texts  
+
     def run(self):  
         while self.running:  
-            self.screen.fill(COLORS['background'])  
-            self.handle_input()  
+            self.handle_input(self.next_events())  
             
-            # 绘制
-            self.draw_grid()  
-            self.draw_obstacles()  
-            self.draw_path()  
-            self.draw_points()  
+            # 状态信息显示（文字变化时标记新旧两块区域）
+            hud = self.hud_texts()  
+            for slot, (text, pos, color) in enumerate(hud):  
+                self.renderer.mark_text(slot, text, (pos, self.text.size(text)))  
             
-            # 状态信息显示
-            time_text = self.font.render(
-                f"时间: {time.time()-self.start_time:.1f}秒", True, (0,0,0))  
-            steps_text = self.font.render(
-                f"步数: {len(self.path)-1}", True, (0,0,0))  
-            self.screen.blit(time_text, (10, 10))  
-            self.screen.blit(steps_text, (10, 35))  
+            # 事件驱动模式下画面没有变化就直接回去等待输入
+            if self.event_driven and not self.renderer.has_changes():  
+                continue  
             
-            if result := self.check_finish():  
-                finish_text = self.font.render(
-                    f"到达 {result}！总步数: {len(self.path)-1}", 
-                    True, (0,0,255))  
-                self.screen.blit(finish_text, (WIDTH//2-150, HEIGHT//2))  
+            # 绘制（背景层整张 blit，代替逐帧重画网格和障碍物）
+            # 整屏模式下 regions() 只有一个 None；脏矩形模式下逐块裁剪重画
+            for clip in self.renderer.regions():  
+                self.screen.set_clip(clip)  
+                self.draw_background()  
+                self.draw_path()  
+                self.draw_points(self.screen)  
+                self.draw_current()  
+                for text, pos, color in hud:  
+                    self.text.blit(self.screen, text, pos, color)  
+            self.screen.set_clip(None)  
             
-            pygame.display.flip()  
-            self.clock.tick(30)  
+            self.renderer.present(self.screen)  
+            if not self.event_driven:  
+                self.clock.tick(30)  
             
         pygame.quit()  
 
@@ -0,0 +1,136 @@
+import math
+import random
+import time
+
+# ================= 在线目标识别 =================
+# 参与者要向对手隐藏自己真正的目标，这里用一个"观察者"模型衡量路径的欺骗性：
+# 代价差分贝叶斯识别（cost-difference，Masters & Sardina 的简化形式）。
+# 走了 n 步到达 p 时，目标 g 的代价差为 n + d(p, g) - d(start, g)，
+# 即"经过当前路径再去 g"比"直接去 g"多走的步数；后验 P(g) ∝ prior(g) * exp(-beta * 代价差)。
+# d(·, g) 取自 distance_fields 的缓存距离场，每一步只需查 4 个数，更新是 O(1) 的；
+# 每个路径点的后验压栈保存，撤回时直接弹出。
+
+BETA = 1.0
+
+
+def load_goal_fields(obstacles, points, size, inclusive=True):
+    """地图到各终点的距离场（POINTS 中除 start 以外的点）；没有安装 NumPy 时返回 None"""
+    try:
+        from distance_fields import load_distance_fields
+    except ImportError:
+        return None
+    goals = {name: tuple(pos) for name, pos in points.items() if name != 'start'}
+    return load_distance_fields(obstacles, goals, size, inclusive)
+
+
+class GoalRecognizer:
+    """随路径增量更新的目标后验
+
+    fields：distance_fields.DistanceFields；path：当前路径（至少包含起点）。
+    history[i] 是走到 path[i] 时各目标的后验（与 fields.names 顺序一致）。
+    """
+
+    def __init__(self, fields, path, beta=BETA, prior=None):
+        from distance_fields import UNREACHABLE
+
+        self.names = list(fields.names)
+        self.beta = beta
+        self.prior = list(prior) if prior is not None else [1.0] * len(self.names)
+        self.unreachable = int(UNREACHABLE)
+        # 转成 Python 列表：[y][x] -> 各目标距离，单步查询不再经过 NumPy
+        self.table = fields.fields.transpose(1, 2, 0).tolist()
+        self.start = tuple(path[0])
+        self.base = self._costs(self.start)
+        self.history = []
+        self.history.append(self._posterior(0, self.start))
+        for pos in path[1:]:
+            self.push(pos)
+
+    def _costs(self, pos):
+        x, y = pos
+        return self.table[y][x]
+
+    def _posterior(self, steps, pos):
+        costs = self._costs(pos)
+        weights = []
+        for prior, base, cost in zip(self.prior, self.base, costs):
+            if base == self.unreachable or cost == self.unreachable:
+                weights.append(None)
+            else:
+                weights.append((prior, steps + cost - base))
+        valid = [w for w in weights if w is not None]
+        if not valid:
+            # 站在障碍物里等到不了任何终点的位置：观察者沿用上一步的判断
+            return self.history[-1] if self.history else tuple(1.0 / len(self.names) for _ in self.names)
+        lowest = min(diff for _, diff in valid)
+        scores = [0.0 if w is None else w[0] * math.exp(-self.beta * (w[1] - lowest)) for w in weights]
+        total = sum(scores)
+        return tuple(s / total for s in scores)
+
+    @property
+    def posterior(self):
+        return self.history[-1]
+
+    def push(self, pos):
+        """路径末尾加入 pos，返回新的后验"""
+        posterior = self._posterior(len(self.history), pos)
+        self.history.append(posterior)
+        return posterior
+
+    def pop(self):
+        """撤回最后一步，返回撤回后的后验"""
+        if len(self.history) > 1:
+            self.history.pop()
+        return self.history[-1]
+
+    def most_likely(self):
+        posterior = self.history[-1]
+        return self.names[max(range(len(posterior)), key=posterior.__getitem__)]
+
+    def archive_data(self, digits=4):
+        """写入存档的后验轨迹：每个路径点一行，列顺序为 goals"""
+        return {
+            "goals": self.names,
+            "beta": self.beta,
+            "trajectory": [[round(p, digits) for p in row] for row in self.history],
+        }
+
+
+def posterior_trajectory(fields, path, beta=BETA):
+    """离线重算一条已有路径的后验轨迹（例如从 session_log 推导出的存档）"""
+    return GoalRecognizer(fields, path, beta).archive_data()
+
+
+# ================= 基准测试 =================
+
+def benchmark(module_name="障碍地图", moves=20000, seed=0):
+    """在真实地图上随机游走，测量每次按键的 push 和撤回 pop 的平均耗时（微秒）"""
+    import importlib
+    from path_codec import DIRECTIONS
+
+    module = importlib.import_module(module_name)
+    size = module.GRID_SIZE + 1
+    fields = load_goal_fields(getattr(module, "ALL_OBSTACLES", ()), module.POINTS, size)
+    rng = random.Random(seed)
+    path = [tuple(module.POINTS['start'])]
+    for _ in range(moves):
+        dx, dy = rng.choice(DIRECTIONS)
+        x, y = path[-1][0] + dx, path[-1][1] + dy
+        if 0 <= x < size and 0 <= y < size:
+            path.append((x, y))
+
+    recognizer = GoalRecognizer(fields, path[:1])
+    start = time.perf_counter()
+    for pos in path[1:]:
+        recognizer.push(pos)
+    push_us = (time.perf_counter() - start) / (len(path) - 1) * 1e6
+    start = time.perf_counter()
+    for _ in path[1:]:
+        recognizer.pop()
+    pop_us = (time.perf_counter() - start) / (len(path) - 1) * 1e6
+    return len(path) - 1, push_us, pop_us
+
+
+if __name__ == "__main__":
+    steps, push_us, pop_us = benchmark()
+    print(f"{steps} 步：每步更新 {push_us:.2f} us，撤回 {pop_us:.2f} us（预算 1000 us）")
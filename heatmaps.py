@@ -0,0 +1,221 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analyze_archives import find_archives, load_path
+from snapshots import MAPS
+from zones import ZONE_COUNT, ZONES_PER_SIDE, zone_lookup
+
+# ================= 访问热力图 =================
+# 汇总整个参与者语料：按地图、目标条件（路径最后停在哪个终点）和 7x7 分区统计每个坐标被经过的次数。
+# 存档逐个读取，每条路径转成一维格子编号后用 np.bincount 累加到计数数组里；
+# 各子进程先汇总自己那一批存档，主进程再把部分结果 merge 起来，也可以把多次运行保存的 .npz 合并。
+# 热力图用 pygame.surfarray 把整张颜色数组一次写进叠加层，再贴到缓存的地图背景上，不逐格绘制。
+#
+# 用法：python heatmaps.py 数据目录 --map 障碍地图 -o heatmaps [-j 8] [--merge 旧结果.npz ...]
+
+UNFINISHED = "unfinished"  # 路径没有停在任何终点上的会话
+CHUNK = 64  # 每个子进程任务汇总的存档个数
+HEAT_LOW = (255, 255, 0)  # 访问最少的格子为黄色
+HEAT_HIGH = (255, 0, 0)  # 访问最多的格子为红色
+HEAT_ALPHA = (60, 200)  # 叠加层透明度范围
+
+
+class VisitHeatmap:
+    """按目标条件分开的访问计数
+
+    counts[目标条件] 是长度 size * size 的 int64 数组，坐标 (x, y) 的下标为 y * size + x；
+    sessions[目标条件] 是参与统计的会话数。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.counts = {}
+        self.sessions = {}
+
+    def add(self, goal, points):
+        """累加一条路径（(N, 2) 坐标数组），越界的点忽略"""
+        points = np.asarray(points, dtype=np.intp).reshape(-1, 2)
+        inside = ((points >= 0) & (points < self.size)).all(axis=1)
+        cells = points[inside, 1] * self.size + points[inside, 0]
+        visits = np.bincount(cells, minlength=self.size * self.size)
+        if goal in self.counts:
+            self.counts[goal] += visits
+        else:
+            self.counts[goal] = visits.astype(np.int64)
+        self.sessions[goal] = self.sessions.get(goal, 0) + 1
+
+    def merge(self, other):
+        """把另一份部分结果（同一尺寸的地图）加进来"""
+        if other.size != self.size:
+            raise ValueError(f"地图尺寸不一致: {self.size} != {other.size}")
+        for goal, counts in other.counts.items():
+            if goal in self.counts:
+                self.counts[goal] += counts
+            else:
+                self.counts[goal] = counts.copy()
+            self.sessions[goal] = self.sessions.get(goal, 0) + other.sessions[goal]
+        return self
+
+    def grid(self, goal=None):
+        """(y, x) 下标的计数；goal 为 None 时为所有目标条件之和"""
+        if goal is None:
+            total = sum(self.counts.values()) if self.counts else np.zeros(self.size * self.size, np.int64)
+            return total.reshape(self.size, self.size)
+        return self.counts[goal].reshape(self.size, self.size)
+
+    def zone_counts(self, goal=None):
+        """7x7 分区的访问计数，[zy, zx] 下标"""
+        totals = np.bincount(zone_lookup(self.size).ravel(), weights=self.grid(goal).ravel(),
+                             minlength=ZONE_COUNT)
+        return totals.astype(np.int64).reshape(ZONES_PER_SIDE, ZONES_PER_SIDE)
+
+    def save(self, filename):
+        goals = sorted(self.counts)
+        np.savez_compressed(
+            filename, size=self.size, goals=np.array(goals),
+            sessions=np.array([self.sessions[g] for g in goals], dtype=np.int64),
+            counts=np.stack([self.counts[g] for g in goals]) if goals else np.zeros((0, self.size ** 2), np.int64),
+        )
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            heatmap = cls(int(data["size"]))
+            for goal, sessions, counts in zip(data["goals"].tolist(), data["sessions"], data["counts"]):
+                heatmap.counts[goal] = counts.astype(np.int64)
+                heatmap.sessions[goal] = int(sessions)
+        return heatmap
+
+
+def goal_condition(points, goals):
+    """路径最后一个点所在的终点名（goals 为 {终点名: (x, y)}），没走到终点时为 UNFINISHED"""
+    if len(points):
+        end = tuple(int(v) for v in points[-1])
+        for name, pos in goals.items():
+            if tuple(pos) == end:
+                return name
+    return UNFINISHED
+
+
+def _accumulate_chunk(task):
+    """子进程：汇总一批存档，返回 (部分结果, 错误列表)"""
+    files, size, goals = task
+    heatmap = VisitHeatmap(size)
+    errors = []
+    for filename in files:
+        try:
+            points, _, _ = load_path(filename)
+            heatmap.add(goal_condition(points, goals), points)
+        except Exception as exc:
+            errors.append(f"{filename}: {exc}")
+    return heatmap, errors
+
+
+def accumulate(files, map_name, workers=None):
+    """并行汇总 files 的访问计数，返回 (VisitHeatmap, 错误列表)"""
+    module = importlib.import_module(map_name)
+    size = module.GRID_SIZE + 1
+    goals = {name: tuple(pos) for name, pos in module.POINTS.items() if name != 'start'}
+    tasks = [(files[i:i + CHUNK], size, goals) for i in range(0, len(files), CHUNK)]
+    heatmap = VisitHeatmap(size)
+    errors = []
+    with ProcessPoolExecutor(workers) as pool:
+        for partial, failed in pool.map(_accumulate_chunk, tasks):
+            heatmap.merge(partial)
+            errors.extend(failed)
+    return heatmap, errors
+
+
+# ================= 绘制 =================
+
+def heat_colors(grid):
+    """计数 -> (y, x, 4) 的 RGBA 数组：按 log(1 + 次数) 归一化，从 HEAT_LOW 渐变到 HEAT_HIGH，没访问过的格子全透明"""
+    level = np.log1p(grid.astype(np.float64))
+    peak = level.max()
+    if peak > 0:
+        level /= peak
+    low, high = np.array(HEAT_LOW, np.float64), np.array(HEAT_HIGH, np.float64)
+    rgba = np.zeros(grid.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = (low + (high - low) * level[..., None]).astype(np.uint8)
+    rgba[..., 3] = np.where(grid > 0, HEAT_ALPHA[0] + (HEAT_ALPHA[1] - HEAT_ALPHA[0]) * level, 0).astype(np.uint8)
+    return rgba
+
+
+def render_overlay(style, grid):
+    """把 (y, x) 下标的计数画成热力图贴在地图背景上，返回新的 Surface
+
+    每个路径点（格线交点）对应一块以它为中心、边长 cell_size 的方块；
+    整张叠加层由颜色数组放大后经 surfarray 一次写入。
+    """
+    import pygame
+
+    cell = style.cell_size
+    rgba = heat_colors(grid)[::-1]  # 第 0 行为 y = GRID_SIZE，与屏幕坐标一致
+    pixels = rgba.repeat(cell, axis=0).repeat(cell, axis=1).transpose(1, 0, 2)  # surfarray 为 [x, y] 下标
+    overlay = pygame.Surface(pixels.shape[:2], pygame.SRCALPHA)
+    rgb = pygame.surfarray.pixels3d(overlay)
+    rgb[...] = pixels[..., :3]
+    del rgb
+    alpha = pygame.surfarray.pixels_alpha(overlay)
+    alpha[...] = pixels[..., 3]
+    del alpha
+
+    surface = style.background().copy()
+    surface.blit(overlay, (-(cell // 2), -(cell // 2)))
+    return surface
+
+
+def save_images(heatmap, map_name, directory):
+    """每个目标条件（以及全部会话）各保存一张格子热力图和一张分区热力图，返回文件列表"""
+    import pygame
+    from render_archives import build_style
+
+    style = build_style(map_name, panel=False)
+    lookup = zone_lookup(heatmap.size)
+    saved = []
+    for goal in [None] + sorted(heatmap.counts):
+        label = "all" if goal is None else goal.replace(" ", "_")
+        cells = heatmap.grid(goal)
+        zones = heatmap.zone_counts(goal).ravel()[lookup]
+        for kind, grid in (("cells", cells), ("zones", zones)):
+            filename = os.path.join(directory, f"heatmap_{map_name}_{label}_{kind}.png")
+            pygame.image.save(render_overlay(style, grid), filename)
+            saved.append(filename)
+    return saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总存档的访问热力图（按地图、目标条件和 7x7 分区）")
+    parser.add_argument("paths", nargs="*", default=[], help="存档文件、通配符或目录（递归查找）")
+    parser.add_argument("--map", default="障碍地图", choices=sorted(MAPS), help="存档来自哪个游戏脚本")
+    parser.add_argument("-o", "--output", default=".", help="图片和计数的输出目录")
+    parser.add_argument("--merge", nargs="*", default=[], metavar="NPZ", help="合并之前保存的计数结果")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files = find_archives(args.paths) if args.paths else []
+    heatmap, errors = accumulate(files, args.map, args.workers)
+    for error in errors:
+        print(f"跳过 {error}", file=sys.stderr)
+    for filename in args.merge:
+        heatmap.merge(VisitHeatmap.load(filename))
+
+    os.makedirs(args.output, exist_ok=True)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    heatmap.save(os.path.join(args.output, f"heatmap_{args.map}.npz"))
+    images = save_images(heatmap, args.map, args.output)
+    sessions = sum(heatmap.sessions.values())
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} 个存档，失败 {len(errors)}，共 {sessions} 个会话，{len(images)} 张图，"
+          f"用时 {elapsed:.1f} 秒", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import random
+import time
+
+# ================= 障碍物占用栅格 =================
+# 把 (x, y, w, h) 形式的障碍物列表预编译成一张按坐标索引的占用表，
+# 每次按键的碰撞检测从"遍历所有障碍物"变成一次下标访问。
+
+
+class OccupancyGrid:
+    """预编译的障碍物占用栅格（每个坐标一个字节，按行优先排列）
+
+    size：每个方向上可寻址的坐标个数。游戏里坐标范围是 0..GRID_SIZE，所以传 GRID_SIZE + 1。
+    inclusive：True 时障碍物的右/上边也算占用（game_with_obstacle.py 的 ox <= x <= ox + w），
+               False 时为半开区间（UI_GAME.py 的 ox <= x < ox + w）。
+    """
+
+    def __init__(self, obstacles, size, inclusive=False):
+        self.size = size
+        self.inclusive = inclusive
+        self.obstacles = [tuple(o) for o in obstacles]
+        self.cells = bytearray(size * size)
+        self._array = None
+
+        extra = 1 if inclusive else 0
+        for ox, oy, w, h in self.obstacles:
+            x0, x1 = max(ox, 0), min(ox + w + extra, size)
+            y0, y1 = max(oy, 0), min(oy + h + extra, size)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            row = b'\x01' * (x1 - x0)
+            for y in range(y0, y1):
+                start = y * size + x0
+                self.cells[start:start + len(row)] = row
+
+    def is_blocked(self, x, y):
+        """单点检测，越界的坐标视为没有障碍（与原来的线性扫描一致）"""
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return self.cells[y * self.size + x] == 1
+        return False
+
+    def as_array(self):
+        """以 (y, x) 下标的 NumPy bool 数组形式返回占用表（与 cells 共享内存，不复制）"""
+        if self._array is None:
+            import numpy as np
+            self._array = np.frombuffer(self.cells, dtype=np.uint8).view(bool).reshape(self.size, self.size)
+        return self._array
+
+    def blocked_many(self, xs, ys):
+        """批量检测，供分析代码使用：xs, ys 为等长的坐标序列，返回同形状的 bool 数组"""
+        import numpy as np
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        inside = (xs >= 0) & (xs < self.size) & (ys >= 0) & (ys < self.size)
+        result = np.zeros(xs.shape, dtype=bool)
+        result[inside] = self.as_array()[ys[inside], xs[inside]]
+        return result
+
+    def blocked_points(self, points):
+        """批量检测 [(x, y), ...] 形式的坐标列表（例如存档里的 path）"""
+        import numpy as np
+        points = np.asarray(points, dtype=np.intp).reshape(-1, 2)
+        return self.blocked_many(points[:, 0], points[:, 1])
+
+
+_COMPILED = {}
+
+
+def compile_obstacles(obstacles, size, inclusive=False):
+    """同一张地图只编译一次：按 (障碍物, size, inclusive) 缓存编译结果"""
+    key = (tuple(tuple(o) for o in obstacles), size, inclusive)
+    grid = _COMPILED.get(key)
+    if grid is None:
+        grid = _COMPILED[key] = OccupancyGrid(obstacles, size, inclusive)
+    return grid
+
+
+# ================= 基准测试 =================
+
+def linear_scan(obstacles, x, y, inclusive=False):
+    """原来的逐个障碍物扫描，作为基准对照"""
+    extra = 1 if inclusive else 0
+    for ox, oy, w, h in obstacles:
+        if ox <= x < ox + w + extra and oy <= y < oy + h + extra:
+            return True
+    return False
+
+
+def random_obstacles(grid_size, count, seed=0):
+    """生成随机的条状障碍物地图（与现有地图一样是 1 格宽的横条或竖条）"""
+    rng = random.Random(seed)
+    obstacles = []
+    for _ in range(count):
+        length = rng.randint(2, max(2, grid_size // 6))
+        if rng.random() < 0.5:
+            w, h = length, 1
+        else:
+            w, h = 1, length
+        obstacles.append((rng.randrange(0, grid_size - w + 1), rng.randrange(0, grid_size - h + 1), w, h))
+    return obstacles
+
+
+def benchmark(grid_size, obstacle_count, queries=20000, seed=0):
+    """返回 (线性扫描每次耗时, 占用栅格每次耗时)，单位微秒"""
+    obstacles = random_obstacles(grid_size, obstacle_count, seed)
+    grid = OccupancyGrid(obstacles, grid_size + 1, inclusive=True)
+    rng = random.Random(seed + 1)
+    points = [(rng.randrange(grid_size + 1), rng.randrange(grid_size + 1)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    expected = [linear_scan(obstacles, x, y, True) for x, y in points]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [grid.is_blocked(x, y) for x, y in points]
+    grid_time = time.perf_counter() - start
+
+    assert expected == actual, "占用栅格与线性扫描结果不一致"
+    return scan_time / queries * 1e6, grid_time / queries * 1e6
+
+
+if __name__ == "__main__":
+    print(f"{'网格':>6} {'障碍物':>6} {'线性扫描(us)':>12} {'占用栅格(us)':>12} {'加速比':>8}")
+    for grid_size, count in [(49, 34), (200, 300), (500, 1000), (1000, 3000)]:
+        scan_us, grid_us = benchmark(grid_size, count)
+        print(f"{grid_size:>6} {count:>6} {scan_us:>12.2f} {grid_us:>12.3f} {scan_us / grid_us:>8.1f}x")
@@ -0,0 +1,192 @@
+import json
+import struct
+import sys
+
+# ================= 紧凑的二进制路径存档 =================
+# archive_*.json 把路径存成带缩进的 [x, y] 列表，几百步就有几十 KB。
+# 每一步都是上下左右移动一格，所以路径可以只存起点 + 每步 2 bit 的方向码；
+# 每个路径点的时间（毫秒）做差分后用能放下最大差值的最小整数宽度存储。
+# 其余字段（meta、turn_events 等）原样放在一小段 JSON 里，转换是无损的。
+#
+# 文件结构（小端）：
+#   头部  magic(4s) version(B) start_x(h) start_y(h) steps(I) time_width(B) json_len(I)
+#   JSON  去掉 path / step_times 内容后的存档（这两个键的位置用 null 占位，保留键的顺序）
+#   方向  ceil(steps / 4) 字节，每字节从低位起存 4 个方向码
+#   时间  time_width 为 0 时没有；否则 steps + 1 个有符号整数差值（第一个相对 0）
+
+MAGIC = b"MPTH"
+VERSION = 1
+SUFFIX = ".mpath"
+
+# 方向码：0 上、1 右、2 下、3 左（y 轴向上，与游戏的逻辑坐标一致）
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+DIRECTION_CODES = {d: code for code, d in enumerate(DIRECTIONS)}
+
+_HEADER = struct.Struct("<4sBhhIBI")
+_TIME_FORMATS = {1: "b", 2: "h", 4: "i"}
+
+
+def encode_directions(path):
+    """路径 -> 方向码列表；相邻两点不是上下左右一格时报错"""
+    codes = []
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        code = DIRECTION_CODES.get((x1 - x0, y1 - y0))
+        if code is None:
+            raise ValueError(f"路径中 {(x0, y0)} -> {(x1, y1)} 不是单位步长")
+        codes.append(code)
+    return codes
+
+
+def pack_codes(codes):
+    packed = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        packed[i >> 2] |= code << ((i & 3) * 2)
+    return bytes(packed)
+
+
+def unpack_codes(packed, steps):
+    return [(packed[i >> 2] >> ((i & 3) * 2)) & 3 for i in range(steps)]
+
+
+def _time_width(deltas):
+    low, high = min(deltas), max(deltas)
+    for width in (1, 2, 4):
+        limit = 1 << (width * 8 - 1)
+        if -limit <= low and high < limit:
+            return width
+    raise ValueError("时间差值超出 32 位范围")
+
+
+def encode_archive(archive):
+    """存档字典（generate_archive 的结构）-> 二进制数据"""
+    path = [tuple(p) for p in archive["path"]]
+    if not path:
+        raise ValueError("路径为空")
+    codes = encode_directions(path)
+
+    step_times = archive.get("step_times")
+    time_bytes = b""
+    time_width = 0
+    if step_times is not None:
+        if len(step_times) != len(path):
+            raise ValueError("step_times 与路径点数量不一致")
+        ms = [round(t * 1000) for t in step_times]
+        deltas = [b - a for a, b in zip([0] + ms, ms)]
+        time_width = _time_width(deltas)
+        time_bytes = struct.pack(f"<{len(deltas)}{_TIME_FORMATS[time_width]}", *deltas)
+
+    rest = dict(archive)
+    rest["path"] = None
+    if "step_times" in rest:
+        rest["step_times"] = None
+    text = json.dumps(rest, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+    header = _HEADER.pack(MAGIC, VERSION, path[0][0], path[0][1], len(codes), time_width, len(text))
+    return header + text + pack_codes(codes) + time_bytes
+
+
+def _split(data):
+    magic, version, start_x, start_y, steps, time_width, json_len = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("不是二进制路径存档")
+    if version != VERSION:
+        raise ValueError(f"不支持的版本: {version}")
+    offset = _HEADER.size
+    rest = json.loads(data[offset:offset + json_len].decode("utf-8"))
+    offset += json_len
+    packed = data[offset:offset + (steps + 3) // 4]
+    offset += len(packed)
+    times = data[offset:offset + (steps + 1) * time_width] if time_width else None
+    return (start_x, start_y), steps, time_width, rest, packed, times
+
+
+def decode_archive(data):
+    """二进制数据 -> 与原 JSON 存档内容相同的字典（路径点为 [x, y] 列表）"""
+    start, steps, time_width, archive, packed, times = _split(data)
+    x, y = start
+    path = [[x, y]]
+    for code in unpack_codes(packed, steps):
+        dx, dy = DIRECTIONS[code]
+        x += dx
+        y += dy
+        path.append([x, y])
+    archive["path"] = path
+    if times is not None:
+        deltas = struct.unpack(f"<{steps + 1}{_TIME_FORMATS[time_width]}", times)
+        total = 0
+        step_times = []
+        for delta in deltas:
+            total += delta
+            step_times.append(total / 1000)
+        archive["step_times"] = step_times
+    return archive
+
+
+def save_binary_archive(archive, filename):
+    with open(filename, "wb") as f:
+        f.write(encode_archive(archive))
+
+
+def load_binary_archive(filename):
+    with open(filename, "rb") as f:
+        return decode_archive(f.read())
+
+
+def load_arrays(filename):
+    """直接解码成 NumPy 数组，适合批量分析
+
+    返回字典：x、y（int32，路径点坐标）、directions（uint8 方向码）、
+    times（float64 秒，存档没有 step_times 时为 None）、archive（其余字段）。
+    """
+    import numpy as np
+
+    with open(filename, "rb") as f:
+        data = f.read()
+    (start_x, start_y), steps, time_width, archive, packed, times = _split(data)
+
+    codes = np.frombuffer(packed, dtype=np.uint8)
+    codes = ((codes[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).reshape(-1)[:steps]
+    table = np.array(DIRECTIONS, dtype=np.int32)
+    x = np.empty(steps + 1, dtype=np.int32)
+    y = np.empty(steps + 1, dtype=np.int32)
+    x[0], y[0] = start_x, start_y
+    np.cumsum(table[codes, 0], out=x[1:])
+    np.cumsum(table[codes, 1], out=y[1:])
+    x[1:] += start_x
+    y[1:] += start_y
+
+    seconds = None
+    if times is not None:
+        deltas = np.frombuffer(times, dtype=f"<i{time_width}")
+        seconds = np.cumsum(deltas, dtype=np.int64) / 1000.0
+    return {"x": x, "y": y, "directions": codes, "times": seconds, "archive": archive}
+
+
+def convert(filename):
+    """archive_xxx.json <-> archive_xxx.mpath，按扩展名决定方向；写入前先校验能无损还原"""
+    if filename.endswith(SUFFIX):
+        archive = load_binary_archive(filename)
+        target = filename[:-len(SUFFIX)] + ".json"
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(archive, f, indent=4, ensure_ascii=False)
+        return target
+
+    with open(filename, encoding="utf-8") as f:
+        archive = json.load(f)
+    data = encode_archive(archive)
+    if decode_archive(data) != archive:
+        raise ValueError(f"{filename} 无法无损转换")
+    target = filename.rsplit(".", 1)[0] + SUFFIX
+    with open(target, "wb") as f:
+        f.write(data)
+    return target
+
+
+if __name__ == "__main__":
+    # 用法：python path_codec.py archive_*.json      JSON -> 二进制
+    #       python path_codec.py archive_*.mpath     二进制 -> JSON
+    import os
+
+    for name in sys.argv[1:]:
+        target = convert(name)
+        print(f"{name} ({os.path.getsize(name)} B) -> {target} ({os.path.getsize(target)} B)")
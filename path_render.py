@@ -0,0 +1,237 @@
+import random
+import time
+
+import pygame
+
+from render_cache import StaticLayerCache, map_key
+
+# ================= 离屏路径绘制 =================
+# 保存路径图片、部分路径快照和批量重绘存档时共用的绘制代码，不依赖 PathGame 和窗口。
+# 背景（网格 + 障碍物）按地图缓存；路径用 PathDrawer 增量绘制，
+# 每次只画新增的线段，不从头重画。
+# 游戏画面上的路径用 PathLayer：一张常驻的路径层（透明色键），移动时只画新线段，撤回时只擦掉并重画局部，
+# 每帧只把路径层贴一次，帧耗时与路径长度无关。
+
+# 离屏图片的背景层单独缓存：保存图片在后台写入线程里进行，不和主循环共用 STATIC_LAYERS
+IMAGE_LAYERS = StaticLayerCache()
+
+
+class MapStyle:
+    """一张地图的图片绘制参数（尺寸、颜色、障碍物、路径线宽）"""
+
+    def __init__(self, grid_size, cell_size, width, height, colors, obstacles=(),
+                 path_color=(0, 0, 0), path_width=3, marker_radius=8):
+        self.grid_size = grid_size
+        self.cell_size = cell_size
+        self.width = width
+        self.height = height
+        self.colors = colors
+        self.obstacles = list(obstacles)
+        self.path_color = path_color
+        self.path_width = path_width
+        self.marker_radius = marker_radius
+
+    @classmethod
+    def from_module(cls, module, **overrides):
+        """从游戏脚本的模块常量（GRID_SIZE、CELL_SIZE、COLORS、ALL_OBSTACLES 等）创建"""
+        options = {
+            "obstacles": getattr(module, "ALL_OBSTACLES", ()),
+            "path_color": module.COLORS.get("path", (0, 0, 0)),
+        }
+        options.update(overrides)
+        return cls(module.GRID_SIZE, module.CELL_SIZE, module.WIDTH, module.HEIGHT,
+                   module.COLORS, **options)
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def key(self):
+        return map_key("image", self.grid_size, self.cell_size, self.size, self.colors, self.obstacles)
+
+    def convert_coords(self, x, y):
+        return (x * self.cell_size, (self.grid_size - y) * self.cell_size)
+
+    def build_background(self, surface):
+        """网格和障碍物（与各游戏原来的 save_path_image 相同）"""
+        surface.fill(self.colors['background'])
+        for i in range(self.grid_size + 1):
+            pygame.draw.line(surface, self.colors['grid'],
+                             (i * self.cell_size, 0), (i * self.cell_size, self.height))
+            pygame.draw.line(surface, self.colors['grid'],
+                             (0, i * self.cell_size), (self.width, i * self.cell_size))
+        for ox, oy, ow, oh in self.obstacles:
+            pygame.draw.rect(surface, self.colors['obstacle'],
+                             (ox * self.cell_size, (self.grid_size - oy - oh) * self.cell_size,
+                              ow * self.cell_size, oh * self.cell_size))
+
+    def background(self):
+        """缓存的背景层（不要直接在上面画，先 copy）"""
+        return IMAGE_LAYERS.get(self.key(), self.size, self.build_background)
+
+    def draw_marker(self, surface, pos, color=None):
+        color = color or self.colors.get('current', (255, 0, 0))
+        pygame.draw.circle(surface, color, self.convert_coords(*pos), self.marker_radius)
+
+
+class PathDrawer:
+    """在背景副本上增量绘制一条路径
+
+    extend_to(i) 只补画 path[已画到的位置 : i + 1] 这一段，
+    依次取 30%、50%、70%、100% 时总共只画一遍路径。
+    """
+
+    def __init__(self, style, path, surface=None):
+        self.style = style
+        self.path = path
+        self.surface = surface if surface is not None else style.background().copy()
+        self.drawn = 0  # 已经画到的路径点下标
+
+    def extend_to(self, index):
+        index = min(index, len(self.path) - 1)
+        if index > self.drawn:
+            points = [self.style.convert_coords(x, y) for x, y in self.path[self.drawn:index + 1]]
+            pygame.draw.lines(self.surface, self.style.path_color, False, points, self.style.path_width)
+            self.drawn = index
+        return self.surface
+
+
+class PathLayer:
+    """游戏画面上的常驻路径层（用透明色键的 Surface，贴图比逐像素 alpha 混合快几倍）
+
+    线段 i 连接 path[i] 和 path[i + 1]。push 只画新增的一段；pop 擦掉最后一段所在的矩形，
+    再重画端点附近（相邻 3x3 个路径点）的线段，这些线段是唯一可能落在擦除区域里的。
+    要求 cell_size 大于 2 * (线宽 + 1)，各游戏的 15 像素格子满足。
+    """
+
+    def __init__(self, convert_coords, size, color=(0, 0, 0), width=2, path=()):
+        self.convert_coords = convert_coords
+        self.color = color
+        self.width = width
+        self.key = (255, 0, 255) if tuple(color) != (255, 0, 255) else (0, 255, 255)
+        self.surface = pygame.Surface(size)
+        self.surface.set_colorkey(self.key)
+        self.reset(path)
+
+    def reset(self, path=()):
+        """整条路径被替换时（新游戏、恢复会话）从头重画"""
+        self.surface.fill(self.key)
+        self.bounds = None  # 画过线段的区域，blit 时只贴这一块
+        self.path = []
+        self.points = []  # 屏幕坐标，与 path 一一对应
+        self.segments_at = {}  # 路径点 -> 以它为端点的线段编号
+        for pos in path:
+            self.push(pos)
+
+    def segment_rect(self, i):
+        (x1, y1), (x2, y2) = self.points[i], self.points[i + 1]
+        pad = self.width + 1
+        return pygame.Rect(min(x1, x2) - pad, min(y1, y2) - pad,
+                           abs(x2 - x1) + 2 * pad + 1, abs(y2 - y1) + 2 * pad + 1)
+
+    def draw_segment(self, i):
+        pygame.draw.line(self.surface, self.color, self.points[i], self.points[i + 1], self.width)
+
+    def push(self, pos):
+        pos = tuple(pos)
+        self.path.append(pos)
+        self.points.append(self.convert_coords(*pos))
+        if len(self.path) > 1:
+            i = len(self.path) - 2
+            self.segments_at.setdefault(self.path[i], []).append(i)
+            self.segments_at.setdefault(pos, []).append(i)
+            self.draw_segment(i)
+            rect = self.segment_rect(i)
+            self.bounds = rect if self.bounds is None else self.bounds.union(rect)
+
+    def pop(self):
+        if len(self.path) <= 1:
+            return
+        i = len(self.path) - 2
+        rect = self.segment_rect(i)
+        removed = self.path.pop()
+        self.points.pop()
+        for pos in (removed, self.path[-1]):
+            # 最后一段的编号最大，一定在两个端点列表的末尾
+            segments = self.segments_at[pos]
+            segments.pop()
+            if not segments:
+                del self.segments_at[pos]
+
+        self.surface.fill(self.key, rect)
+        nearby = set()
+        for px, py in (removed, self.path[-1]):
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    nearby.update(self.segments_at.get((px + dx, py + dy), ()))
+        for j in sorted(nearby):
+            self.draw_segment(j)
+
+    def sync(self, path):
+        """与游戏的 path 对齐：只处理末尾的增删（移动和撤回），通常每帧只比较一个点"""
+        common = min(len(self.path), len(path))
+        while common and self.path[common - 1] != tuple(path[common - 1]):
+            common -= 1
+        if common == 0:
+            self.reset(path)
+            return
+        while len(self.path) > common:
+            self.pop()
+        for pos in path[len(self.path):]:
+            self.push(pos)
+
+    def draw(self, target, path=None):
+        """（可选先 sync）把路径层贴到 target 上"""
+        if path is not None:
+            self.sync(path)
+        if self.bounds is not None:
+            target.blit(self.surface, self.bounds.topleft, self.bounds)
+
+
+# ================= 基准测试 =================
+
+def random_walk(steps, size=50, seed=0):
+    rng = random.Random(seed)
+    path = [(size // 2, size // 2)]
+    while len(path) <= steps:
+        dx, dy = rng.choice(((0, 1), (1, 0), (0, -1), (-1, 0)))
+        x, y = path[-1][0] + dx, path[-1][1] + dy
+        if 0 <= x < size and 0 <= y < size:
+            path.append((x, y))
+    return path
+
+
+def benchmark(steps, frames=200, grid_size=49, cell_size=15, width=3):
+    """每帧的路径绘制耗时（毫秒）：原来的整条 draw.lines 与 PathLayer（每帧走一步或撤回一步）"""
+    def convert(x, y):
+        return (x * cell_size, (grid_size - y) * cell_size)
+
+    screen = pygame.Surface((grid_size * cell_size, grid_size * cell_size))
+    path = random_walk(steps + frames, grid_size + 1)
+    base = path[:steps + 1]
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        current = path[:steps + 1 + frame]
+        points = [convert(x, y) for x, y in current]
+        pygame.draw.lines(screen, (0, 0, 0), False, points, width)
+    full_ms = (time.perf_counter() - start) / frames * 1000
+
+    layer = PathLayer(convert, screen.get_size(), (0, 0, 0), width, base)
+    current = list(base)
+    start = time.perf_counter()
+    for frame in range(frames):
+        if frame % 4 == 3:
+            current.pop()
+        else:
+            current.append(path[len(current)])
+        layer.draw(screen, current)
+    layer_ms = (time.perf_counter() - start) / frames * 1000
+    return full_ms, layer_ms
+
+
+if __name__ == "__main__":
+    print(f"{'步数':>8} {'整条重画(ms)':>12} {'路径层(ms)':>12}")
+    for steps in (100, 1000, 10000):
+        full_ms, layer_ms = benchmark(steps)
+        print(f"{steps:>8} {full_ms:>12.3f} {layer_ms:>12.3f}")
@@ -0,0 +1,239 @@
+import time
+from array import array
+
+from path_codec import DIRECTION_CODES
+
+# ================= 路径状态 =================
+# 与 PathGame.path 同步维护的辅助结构，让每次按键的检查不再随路径长度变慢。
+
+
+class VisitedCells:
+    """已访问坐标的计数表
+
+    每个坐标一个计数器：path.append 时 push，path.pop 时 pop，
+    因此撤回（BACKSPACE）后计数与路径始终一致，查询和撤回都是 O(1)。
+    size 为每个方向上的坐标个数（坐标范围 0..GRID_SIZE 时传 GRID_SIZE + 1）。
+    """
+
+    def __init__(self, size, path=()):
+        self.size = size
+        self.counts = array('I', bytes(4 * size * size))
+        for pos in path:
+            self.push(pos)
+
+    def _index(self, pos):
+        x, y = pos
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return y * self.size + x
+        return -1
+
+    def push(self, pos):
+        """记录新加入路径的坐标，返回该坐标此前被访问的次数"""
+        i = self._index(pos)
+        if i < 0:
+            raise IndexError(f"坐标超出范围: {pos}")
+        before = self.counts[i]
+        self.counts[i] = before + 1
+        return before
+
+    def pop(self, pos):
+        """撤回路径末尾的坐标"""
+        i = self._index(pos)
+        if i < 0 or self.counts[i] == 0:
+            raise KeyError(f"坐标不在路径中: {pos}")
+        self.counts[i] -= 1
+
+    def count(self, pos):
+        i = self._index(pos)
+        return self.counts[i] if i >= 0 else 0
+
+    def __contains__(self, pos):
+        return self.count(pos) > 0
+
+
+class PathStats:
+    """路径的增量统计：步数、转弯次数、重复访问次数和包围盒
+
+    每一步的方向存成整数方向码（path_codec.DIRECTIONS，0 上、1 右、2 下、3 左）。
+    相邻两步方向码奇偶性不同（互相垂直）才算转弯：直行方向码相同，原路折返相差 2，都不算。
+    每一步是否转弯、是否重复访问、加入前的包围盒都压栈保存，
+    撤回时直接弹栈恢复，push 和 pop 都是 O(1)，撤回后统计与路径始终一致。
+    """
+
+    def __init__(self, size, path):
+        self.path = [tuple(path[0])]
+        self.visited = VisitedCells(size, self.path)
+        self.directions = array('b')
+        self.turn_flags = array('b')
+        self.revisit_flags = array('b')
+        x, y = self.path[0]
+        self.bounds = [(x, x, y, y)]
+        self.turns = 0
+        self.revisits = 0
+        for pos in path[1:]:
+            self.push(pos)
+
+    @property
+    def steps(self):
+        return len(self.path) - 1
+
+    @property
+    def direction(self):
+        """最后一步的方向码，还没有移动时为 None"""
+        return self.directions[-1] if self.directions else None
+
+    def bbox(self):
+        """(min_x, max_x, min_y, max_y)"""
+        return self.bounds[-1]
+
+    def push(self, pos):
+        """路径末尾加入相邻坐标，返回这一步是否是转弯"""
+        x, y = pos
+        last_x, last_y = self.path[-1]
+        code = DIRECTION_CODES.get((x - last_x, y - last_y))
+        if code is None:
+            raise ValueError(f"{self.path[-1]} -> {pos} 不是单位步长")
+        turn = bool(self.directions) and (code ^ self.directions[-1]) & 1 == 1
+        revisit = self.visited.push(pos) > 0
+
+        self.path.append((x, y))
+        self.directions.append(code)
+        self.turn_flags.append(turn)
+        self.revisit_flags.append(revisit)
+        self.turns += turn
+        self.revisits += revisit
+        min_x, max_x, min_y, max_y = self.bounds[-1]
+        self.bounds.append((min(min_x, x), max(max_x, x), min(min_y, y), max(max_y, y)))
+        return turn
+
+    def pop(self):
+        """撤回最后一步，返回 (撤回的坐标, 这一步是否是转弯)"""
+        if len(self.path) < 2:
+            raise IndexError("路径只剩起点，无法撤回")
+        pos = self.path.pop()
+        self.visited.pop(pos)
+        self.directions.pop()
+        turn = bool(self.turn_flags.pop())
+        self.turns -= turn
+        self.revisits -= self.revisit_flags.pop()
+        self.bounds.pop()
+        return pos, turn
+
+
+def count_turns_batch(paths):
+    """一次性重新计算一批存档路径的转弯次数（NumPy 向量化），规则与 PathStats 相同
+
+    paths：坐标序列的列表（例如各存档的 "path"），返回每条路径转弯次数的 int64 数组。
+    """
+    import numpy as np
+
+    lengths = np.array([len(p) for p in paths], dtype=np.int64)
+    if lengths.sum() == 0:
+        return np.zeros(len(paths), dtype=np.int64)
+    points = np.concatenate([np.asarray(p, dtype=np.int64).reshape(-1, 2) for p in paths])
+    # 相邻两点的位移 -> 方向码；跨越两条路径边界的位移在下面被排除
+    delta = np.diff(points, axis=0)
+    table = np.full((3, 3), -1, dtype=np.int8)
+    for (dx, dy), code in DIRECTION_CODES.items():
+        table[dx + 1, dy + 1] = code
+    owner = np.repeat(np.arange(len(paths)), lengths)[1:]  # 每个位移属于哪条路径
+    starts = np.cumsum(lengths)[:-1]
+    inside = np.ones(len(delta), dtype=bool)
+    # 只排除真正夹在两条路径之间的位移（开头或结尾的空路径不对应任何位移）
+    boundaries = starts[(starts > 0) & (starts < len(points))]
+    inside[boundaries - 1] = False
+    if (np.abs(delta[inside]).sum(axis=1) != 1).any():
+        raise ValueError("路径中有不是单位步长的移动")
+    delta = np.clip(delta, -1, 1)
+    codes = np.where(inside, table[delta[:, 0] + 1, delta[:, 1] + 1], -1)
+
+    # 同一条路径里连续两步方向码奇偶不同即为转弯
+    prev, cur = codes[:-1], codes[1:]
+    turn = (prev >= 0) & (cur >= 0) & (((prev ^ cur) & 1) == 1)
+    return np.bincount(owner[1:][turn], minlength=len(paths))
+
+
+# ================= 基准测试 =================
+
+def serpentine_path(size, steps):
+    """生成不重复的蛇形路径（逐行来回），用来模拟很长的会话"""
+    path = [(0, 0)]
+    x, y, dx = 0, 0, 1
+    while len(path) <= steps:
+        if 0 <= x + dx < size:
+            x += dx
+        else:
+            y += 1
+            dx = -dx
+        path.append((x, y))
+    return path
+
+
+def benchmark(checkpoints=(100, 1000, 10000, 40000), window=200):
+    """在不同路径长度下测量每步（重复检查 + 追加）以及撤回的平均耗时，单位微秒"""
+    size = 201
+    full = serpentine_path(size, max(checkpoints) + window)
+    rows = []
+    for length in checkpoints:
+        prefix = full[:length + 1]
+        moves = full[length + 1:length + 1 + window]
+
+        path = list(prefix)
+        start = time.perf_counter()
+        for pos in moves:
+            if pos in path:
+                continue
+            path.append(pos)
+        scan_us = (time.perf_counter() - start) / window * 1e6
+
+        path = list(prefix)
+        visited = VisitedCells(size, path)
+        start = time.perf_counter()
+        for pos in moves:
+            if pos in visited:
+                continue
+            path.append(pos)
+            visited.push(pos)
+        move_us = (time.perf_counter() - start) / window * 1e6
+
+        start = time.perf_counter()
+        for _ in range(window):
+            visited.pop(path.pop())
+        undo_us = (time.perf_counter() - start) / window * 1e6
+
+        rows.append((length, scan_us, move_us, undo_us))
+    return rows
+
+
+def check_turns_batch(count=500, seed=0):
+    """用随机路径（含空路径和只有起点的路径，随机排在批次的开头、中间和结尾）核对
+    count_turns_batch 与逐步 PathStats 的结果，返回不一致的路径下标列表"""
+    import random
+
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        length = rng.choice((0, 0, 1, 1, 2, 3, rng.randint(4, 60)))
+        path = [(rng.randint(0, 20), rng.randint(0, 20))][:length]
+        while 0 < len(path) < length:
+            dx, dy = rng.choice(((0, 1), (1, 0), (0, -1), (-1, 0)))
+            path.append((path[-1][0] + dx, path[-1][1] + dy))
+        paths.append(path)
+    # 批次整体只有空路径 / 开头是空路径 / 结尾是空路径的情况各核对一次
+    batches = [paths, [[], []], [[]] + paths[:10], paths[:10] + [[]], [[(3, 3)]]]
+    mismatched = []
+    for batch in batches:
+        counts = count_turns_batch(batch)
+        for i, path in enumerate(batch):
+            expected = PathStats(64, [(p[0] + 20, p[1] + 20) for p in path]).turns if path else 0
+            if counts[i] != expected:
+                mismatched.append(i)
+    return mismatched
+
+
+if __name__ == "__main__":
+    mismatched = check_turns_batch()
+    print(f"count_turns_batch 与 PathStats 核对：{'一致' if not mismatched else f'{len(mismatched)} 条不一致'}")
+    print(f"{'路径长度':>8} {'列表扫描(us/步)':>14} {'计数表(us/步)':>14} {'撤回(us/步)':>12}")
+    for length, scan_us, move_us, undo_us in benchmark():
+        print(f"{length:>8} {scan_us:>14.2f} {move_us:>14.3f} {undo_us:>12.3f}")
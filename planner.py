@@ -0,0 +1,256 @@
+import argparse
+import heapq
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from distance_fields import UNREACHABLE, compute_fields, map_hash
+from occupancy import compile_obstacles, random_obstacles
+from path_codec import DIRECTIONS
+
+# ================= 欺骗性路径的参考规划 =================
+# 给每张地图、每个真实终点算出三条参考路径，用来和参与者实际走出的路径对比：
+#   shortest   起点到真实终点的最短路径；
+#   deceptive  "最后欺骗点"策略（Masters & Sardina）：先走最短路到最后欺骗点 LDP，再走最短路到真实终点。
+#              LDP 是观察者仍认为某个假终点不比真实终点可能性低的格子中，离真实终点最近的一个；
+#   ambiguous  最大模糊路径：Dijkstra，每进入一个"真实终点已经明显占优"的格子都要额外付出代价，
+#              路径因此尽量沿着观察者分不清真假终点的区域前进。
+# 代价差与 goal_recognition 相同：cdiff_g(n) = d(start, n) + d(n, g) - d(start, g)。
+# 障碍物规则与 game_with_obstacle.py 一致：坐标 0..GRID_SIZE，障碍物边界也不可通过，路径不重复经过格子。
+# 结果按地图哈希缓存成 JSON；--random 会生成多张随机地图，用进程池并行规划所有起点/终点组合。
+
+CACHE_DIR = "planner_cache"
+AMBIGUITY_WEIGHT = 1.0  # 每进入一格"真实终点占优"的格子额外付出的代价（乘以占优的步数）
+
+
+def neighbours(blocked, pos):
+    x, y = pos
+    size = blocked.shape[0]
+    for dx, dy in DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < size and 0 <= ny < size and not blocked[ny, nx]:
+            yield nx, ny
+
+
+def descend(field, start):
+    """从 start 沿距离场逐步下降到距离为 0 的格子，返回路径（最短路径之一）"""
+    size = field.shape[0]
+    x, y = start
+    remaining = int(field[y, x])
+    if remaining == UNREACHABLE:
+        raise ValueError(f"{tuple(start)} 到不了目标")
+    path = [(x, y)]
+    while remaining:
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size and field[ny, nx] == remaining - 1:
+                x, y = nx, ny
+                break
+        remaining -= 1
+        path.append((x, y))
+    return path
+
+
+def remove_loops(path):
+    """两段最短路径拼接后可能经过同一格子，去掉中间的环，保证不重复访问"""
+    result = []
+    index = {}
+    for pos in path:
+        if pos in index:
+            for removed in result[index[pos] + 1:]:
+                del index[removed]
+            del result[index[pos] + 1:]
+        else:
+            index[pos] = len(result)
+            result.append(pos)
+    return result
+
+
+def cost_differences(fields, start_field, start):
+    """每个终点的代价差数组 cdiff[k, y, x]（int64），到不了的格子为一个很大的数"""
+    sx, sy = start
+    costs = fields.astype(np.int64)
+    from_start = start_field.astype(np.int64)
+    cdiff = from_start[None, :, :] + costs - costs[:, sy, sx][:, None, None]
+    unreachable = (fields == UNREACHABLE) | (start_field == UNREACHABLE)[None, :, :]
+    cdiff[unreachable] = np.iinfo(np.int32).max
+    return cdiff
+
+
+def last_deceptive_point(cdiff, true_index, true_field, start_field):
+    """最后欺骗点：某个假终点的代价差不大于真实终点的格子中，离真实终点最近的一个（平局取离起点近的）"""
+    others = np.delete(cdiff, true_index, axis=0)
+    reachable = (true_field != UNREACHABLE) & (start_field != UNREACHABLE)
+    deceptive = reachable & (others.min(axis=0) <= cdiff[true_index])
+    ys, xs = np.nonzero(deceptive)
+    order = np.lexsort((xs, ys, start_field[ys, xs], true_field[ys, xs]))
+    return int(xs[order[0]]), int(ys[order[0]])
+
+
+def ambiguous_path(blocked, start, goal, penalty, weight=AMBIGUITY_WEIGHT):
+    """Dijkstra：进入格子 (x, y) 的代价为 1 + weight * penalty[y, x]"""
+    start, goal = tuple(start), tuple(goal)
+    best = {start: 0.0}
+    parent = {start: None}
+    heap = [(0.0, start)]
+    while heap:
+        cost, pos = heapq.heappop(heap)
+        if pos == goal:
+            break
+        if cost > best[pos]:
+            continue
+        for nxt in neighbours(blocked, pos):
+            new_cost = cost + 1.0 + weight * float(penalty[nxt[1], nxt[0]])
+            if new_cost < best.get(nxt, float("inf")):
+                best[nxt] = new_cost
+                parent[nxt] = pos
+                heapq.heappush(heap, (new_cost, nxt))
+    if goal not in parent:
+        raise ValueError(f"{start} 到不了 {goal}")
+    path = []
+    pos = goal
+    while pos is not None:
+        path.append(pos)
+        pos = parent[pos]
+    return path[::-1]
+
+
+def plan_map(obstacles, points, size, inclusive=True, weight=AMBIGUITY_WEIGHT):
+    """一张地图上以每个终点为真实终点的三条参考路径：{终点名: {...}}
+
+    points：{'start': (x, y), 终点名: (x, y), ...}；size 与 inclusive 的含义同 occupancy.OccupancyGrid。
+    """
+    start = tuple(points['start'])
+    goals = {name: tuple(pos) for name, pos in points.items() if name != 'start'}
+    names = list(goals)
+    blocked = compile_obstacles(obstacles, size, inclusive).as_array().copy()
+    fields = compute_fields(obstacles, {**goals, 'start': start}, size, inclusive)
+    goal_fields, start_field = fields[:-1], fields[-1]
+    cdiff = cost_differences(goal_fields, start_field, start)
+
+    plans = {}
+    for k, name in enumerate(names):
+        if goal_fields[k][start[1], start[0]] == UNREACHABLE:
+            plans[name] = None
+            continue
+        # 终点格子总是可走（与 distance_fields.bfs_field 一致）
+        walls = blocked.copy()
+        walls[goals[name][1], goals[name][0]] = False
+        ldp = last_deceptive_point(cdiff, k, goal_fields[k], start_field)
+        deceptive = remove_loops(descend(start_field, ldp)[::-1] + descend(goal_fields[k], ldp)[1:])
+        if len(names) > 1:
+            others = np.delete(cdiff, k, axis=0).min(axis=0)
+            penalty = np.clip(others - cdiff[k], 0, None)
+        else:
+            penalty = np.zeros_like(cdiff[k])
+        plans[name] = {
+            "shortest": descend(goal_fields[k], start),
+            "last_deceptive_point": ldp,
+            "deceptive": deceptive,
+            "ambiguous": ambiguous_path(walls, start, goals[name], penalty, weight),
+        }
+    return plans
+
+
+def load_plans(obstacles, points, size, inclusive=True, weight=AMBIGUITY_WEIGHT, cache_dir=CACHE_DIR):
+    """读取（或规划并写入）一张地图的参考路径缓存，文件名为地图哈希 + 模糊代价权重"""
+    key = map_hash(obstacles, points, size, inclusive)
+    filename = os.path.join(cache_dir, f"plans_{key}_w{weight:g}.json")
+    if os.path.exists(filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    plans = json.loads(json.dumps(plan_map(obstacles, points, size, inclusive, weight)))
+    os.makedirs(cache_dir, exist_ok=True)
+    # 先写临时文件再替换，并行规划同一张地图时不会读到写了一半的文件
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(plans, f, separators=(',', ':'))
+    os.replace(tmp, filename)
+    return plans
+
+
+def plans_for_module(module, weight=AMBIGUITY_WEIGHT, cache_dir=CACHE_DIR):
+    """游戏脚本的参考路径（障碍物规则按 game_with_obstacle：GRID_SIZE + 1、边界不可通过）"""
+    return load_plans(getattr(module, "ALL_OBSTACLES", ()), module.POINTS, module.GRID_SIZE + 1,
+                      True, weight, cache_dir)
+
+
+# ================= 批量规划 =================
+
+def random_map(grid_size, obstacle_count, goal_count=4, seed=0):
+    """随机地图：occupancy.random_obstacles 的条状障碍物 + 随机放在空地上的起点和终点"""
+    obstacles = random_obstacles(grid_size, obstacle_count, seed)
+    blocked = compile_obstacles(obstacles, grid_size + 1, True)
+    rng = random.Random(seed + 1)
+    points = {}
+    while len(points) < goal_count + 1:
+        pos = (rng.randrange(grid_size + 1), rng.randrange(grid_size + 1))
+        if not blocked.is_blocked(*pos) and pos not in points.values():
+            points['start' if not points else f"goal {len(points)}"] = pos
+    return {"obstacles": obstacles, "points": points, "size": grid_size + 1}
+
+
+def _plan_task(task):
+    spec, weight, cache_dir = task
+    try:
+        plans = load_plans(spec["obstacles"], spec["points"], spec["size"], True, weight, cache_dir)
+        return spec, plans, None
+    except Exception as exc:
+        return spec, None, str(exc)
+
+
+def plan_many(maps, weight=AMBIGUITY_WEIGHT, cache_dir=CACHE_DIR, workers=None):
+    """并行规划多张地图（random_map 格式的字典），按输入顺序逐个产出 (spec, plans, error)"""
+    tasks = [(spec, weight, cache_dir) for spec in maps]
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(_plan_task, tasks, chunksize=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="计算各地图的最短 / 最后欺骗点 / 最大模糊参考路径")
+    parser.add_argument("maps", nargs="*", default=["game_with_obstacle"], help="游戏脚本名")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="另外生成 N 张随机地图并行规划")
+    parser.add_argument("--size", type=int, default=49, help="随机地图的 GRID_SIZE")
+    parser.add_argument("--obstacles", type=int, default=34, help="随机地图的障碍物条数")
+    parser.add_argument("--goals", type=int, default=4, help="随机地图的终点个数")
+    parser.add_argument("--weight", type=float, default=AMBIGUITY_WEIGHT, help="最大模糊路径的代价权重")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    for name in args.maps:
+        module = importlib.import_module(name)
+        plans = plans_for_module(module, args.weight, args.cache_dir)
+        print(f"{name}: start {tuple(module.POINTS['start'])}")
+        for goal, plan in plans.items():
+            if plan is None:
+                print(f"  {goal}: 到不了")
+                continue
+            print(f"  {goal}: 最短 {len(plan['shortest']) - 1} 步，"
+                  f"LDP {tuple(plan['last_deceptive_point'])} 欺骗 {len(plan['deceptive']) - 1} 步，"
+                  f"模糊 {len(plan['ambiguous']) - 1} 步")
+
+    if args.random:
+        start = time.perf_counter()
+        maps = (random_map(args.size, args.obstacles, args.goals, seed) for seed in range(args.random))
+        planned = failed = 0
+        for spec, plans, error in plan_many(maps, args.weight, args.cache_dir, args.workers):
+            if error:
+                print(f"跳过地图 {spec['points']}: {error}", file=sys.stderr)
+                failed += 1
+            else:
+                planned += sum(plan is not None for plan in plans.values())
+        elapsed = time.perf_counter() - start
+        print(f"{args.random} 张随机地图，{planned} 组起点/终点，失败 {failed}，用时 {elapsed:.1f} 秒",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
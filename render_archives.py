@@ -0,0 +1,132 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from snapshots import MAPS, load_archive
+
+# ================= 从存档批量重绘路径图 =================
+# 不需要运行游戏：读取 archive_*.json / .mpath，按游戏脚本里的 convert_coords、COLORS、ALL_OBSTACLES
+# 重新画出 path_<时间戳>.png。改了颜色、线宽、格子大小或障碍物后直接用命令行参数重绘即可。
+# 子进程使用 SDL 的 dummy 驱动；每个进程里同一张地图的背景层只画一次（path_render.IMAGE_LAYERS）。
+#
+# 用法：python render_archives.py archive_*.json --map 障碍地图 -o figures --cell-size 20 --path-width 2
+
+# 与各脚本原来的 save_path_image 一致：空地图 在 30%、50%、70% 处画红色圆点
+DEFAULT_HIGHLIGHTS = {
+    "空地图": (0.3, 0.5, 0.7),
+}
+
+
+def parse_color(text):
+    """"255,0,0" -> (255, 0, 0)"""
+    color = tuple(int(v) for v in text.split(","))
+    if len(color) != 3:
+        raise argparse.ArgumentTypeError(f"颜色格式应为 R,G,B: {text}")
+    return color
+
+
+def build_style(map_name, cell_size=None, path_width=None, path_color=None, colors=None,
+                obstacles=True, panel=True):
+    """按游戏脚本的地图常量创建 MapStyle，参数不为 None 时覆盖对应的设置"""
+    from path_render import MapStyle
+
+    module = importlib.import_module(map_name)
+    cell_size = cell_size or module.CELL_SIZE
+    height = module.GRID_SIZE * cell_size
+    width = height + (getattr(module, "PANEL_WIDTH", 0) if panel else 0)
+    merged = dict(module.COLORS)
+    merged.update(colors or {})
+    return MapStyle(
+        module.GRID_SIZE, cell_size, width, height, merged,
+        obstacles=getattr(module, "ALL_OBSTACLES", ()) if obstacles else (),
+        path_color=path_color or merged.get("path", (0, 0, 0)),
+        path_width=path_width or MAPS[map_name]["path_width"],
+        marker_radius=MAPS[map_name]["marker_radius"],
+    )
+
+
+def render_archive(archive, style, output, highlights=()):
+    """把一个存档（load_archive 的结果）画成一张路径图"""
+    import pygame
+    from path_render import PathDrawer
+
+    path = [tuple(p) for p in archive["path"]]
+    surface = PathDrawer(style, path).extend_to(len(path) - 1)
+    if len(path) > 1:
+        for percent in highlights:
+            pos = style.convert_coords(*path[int((len(path) - 1) * percent)])
+            pygame.draw.circle(surface, style.colors.get('highlight', (255, 0, 0)), pos, 6)
+    pygame.image.save(surface, output)
+    return output
+
+
+# 每个子进程的绘制参数，在 _init_worker 里创建一次
+_STYLE = None
+_HIGHLIGHTS = ()
+
+
+def _init_worker(style_options, highlights):
+    global _STYLE, _HIGHLIGHTS
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    _STYLE = build_style(**style_options)
+    _HIGHLIGHTS = highlights
+
+
+def _render_task(task):
+    filename, directory = task
+    try:
+        archive = load_archive(filename)
+        output = os.path.join(directory or os.path.dirname(filename), f"path_{archive['meta']['timestamp']}.png")
+        return filename, render_archive(archive, _STYLE, output, _HIGHLIGHTS), None
+    except Exception as exc:
+        return filename, None, str(exc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="从存档批量重绘路径图（无窗口、多进程）")
+    parser.add_argument("archives", nargs="+", help="archive_*.json / .mpath 文件")
+    parser.add_argument("--map", default="障碍地图", choices=sorted(MAPS), help="存档来自哪个游戏脚本")
+    parser.add_argument("-o", "--output", help="图片输出目录，默认与存档相同（会覆盖原来的 path_*.png）")
+    parser.add_argument("--cell-size", type=int, help="格子边长（像素）")
+    parser.add_argument("--path-width", type=int, help="路径线宽")
+    parser.add_argument("--path-color", type=parse_color, help="路径颜色 R,G,B")
+    parser.add_argument("--color", action="append", default=[], metavar="NAME=R,G,B",
+                        help="覆盖 COLORS 中的颜色，例如 --color grid=230,230,230，可重复")
+    parser.add_argument("--no-obstacles", action="store_true", help="不画障碍物")
+    parser.add_argument("--no-panel", action="store_true", help="去掉右侧面板的空白区域，只保留地图")
+    parser.add_argument("--highlight", type=float, nargs="*", default=None,
+                        help="在这些比例处画圆点标记（默认沿用脚本原来的设置）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    colors = {}
+    for item in args.color:
+        name, _, value = item.partition("=")
+        colors[name] = parse_color(value)
+    style_options = {
+        "map_name": args.map, "cell_size": args.cell_size, "path_width": args.path_width,
+        "path_color": args.path_color, "colors": colors,
+        "obstacles": not args.no_obstacles, "panel": not args.no_panel,
+    }
+    highlights = tuple(args.highlight) if args.highlight is not None else DEFAULT_HIGHLIGHTS.get(args.map, ())
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    failed = 0
+    tasks = [(name, args.output) for name in args.archives]
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(style_options, highlights)) as pool:
+        for name, output, error in pool.map(_render_task, tasks, chunksize=16):
+            if error:
+                print(f"跳过 {name}: {error}", file=sys.stderr)
+                failed += 1
+    elapsed = time.perf_counter() - start
+    print(f"共 {len(tasks)} 个存档，失败 {failed}，用时 {elapsed:.1f} 秒", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+import pygame
+
+# ================= 静态背景层缓存 =================
+# 网格、7x7 分区边框、障碍物和固定的坐标点在一个试次内不会变化，
+# 只需画一次到离屏 Surface 上，之后每帧整张 blit 即可。
+
+
+def freeze(value):
+    """把地图配置（dict / list / tuple 嵌套）转成可哈希的缓存键"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def map_key(*parts):
+    """由网格尺寸、障碍物、坐标点、颜色等配置生成地图的缓存键，配置变了键就变"""
+    return freeze(parts)
+
+
+class StaticLayerCache:
+    """按地图缓存背景 Surface；键不变就一直复用，键变化（换地图 / 改配置）时重新绘制"""
+
+    def __init__(self, max_layers=8):
+        self.max_layers = max_layers
+        self.layers = OrderedDict()
+
+    def get(self, key, size, build):
+        """返回 key 对应的背景层，没有缓存时调用 build(surface) 绘制一次"""
+        layer = self.layers.get(key)
+        if layer is None or layer.get_size() != tuple(size):
+            layer = pygame.Surface(size)
+            build(layer)
+            # 转成与窗口相同的像素格式，之后每帧 blit 不需要再做格式转换
+            if pygame.display.get_surface() is not None:
+                layer = layer.convert()
+            self.layers[key] = layer
+            while len(self.layers) > self.max_layers:
+                self.layers.popitem(last=False)
+        else:
+            self.layers.move_to_end(key)
+        return layer
+
+    def invalidate(self, key=None):
+        """丢弃某张地图（或全部）的缓存"""
+        if key is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(key, None)
+
+
+STATIC_LAYERS = StaticLayerCache()
+
+
+def get_static_layer(key, size, build):
+    return STATIC_LAYERS.get(key, size, build)
+
+
+def invalidate_static_layers(key=None):
+    STATIC_LAYERS.invalidate(key)
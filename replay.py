@@ -0,0 +1,240 @@
+import argparse
+import os
+import sys
+import time
+from bisect import bisect_right
+
+from snapshots import MAPS, load_archive, map_style
+
+# ================= 存档回放 =================
+# 逐步复查一次会话：按存档里的 path 和 step_times 以任意倍速播放、暂停，跳到任意一步或任意时刻。
+# 路径用与游戏保存图片相同的 MapStyle / PathDrawer 绘制；加载时每隔 keyframe_every 步
+# 缓存一张已画好路径的关键帧，跳转时二分查找之前最近的关键帧，复制后只补画不超过 keyframe_every 段，
+# 不会从第 0 步重画。没有 step_times 的旧存档按 meta.duration 把时间平均分到每一步。
+#
+# 用法：python replay.py archive_xxx.json --map 障碍地图              打开回放窗口
+#       python replay.py archive_xxx.json --export frames --fps 30 --speed 4   无窗口导出逐帧 PNG
+# 窗口操作：空格 暂停/继续，←/→ 单步，Shift+←/→ 跳 10%，↑/↓ 加速/减速，Home/End 跳到首尾，点击底部进度条跳转
+
+KEYFRAME_EVERY = 256  # 关键帧间隔（步）
+MAX_KEYFRAMES = 64  # 关键帧最多这么多张，路径很长时自动加大间隔
+SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
+BAR_HEIGHT = 6  # 底部进度条高度（像素）
+
+
+def step_times_of(archive):
+    """每个路径点的到达时间（秒）；旧存档没有 step_times 时按总用时平均分配"""
+    steps = len(archive["path"]) - 1
+    times = archive.get("step_times")
+    if times is not None and len(times) == steps + 1:
+        return [float(t) for t in times]
+    duration = float(archive.get("meta", {}).get("duration") or steps)
+    return [duration * i / steps if steps else 0.0 for i in range(steps + 1)]
+
+
+class Replay:
+    """一个存档的回放状态：当前步、关键帧索引和绘制好路径的 Surface
+
+    seek(step) 和 seek_time(t) 都是 O(log n) 的查找加上至多 keyframe_every 段的补画。
+    """
+
+    def __init__(self, archive, style, keyframe_every=KEYFRAME_EVERY):
+        from path_render import PathDrawer
+
+        self.archive = archive
+        self.style = style
+        self.path = [tuple(p) for p in archive["path"]]
+        self.times = step_times_of(archive)
+        self.steps = len(self.path) - 1
+        self.keyframe_every = max(keyframe_every, -(-self.steps // MAX_KEYFRAMES))
+
+        # 顺着路径画一遍，每隔 keyframe_every 步复制一张关键帧
+        self.drawer = PathDrawer(style, self.path)
+        self.key_steps = []
+        self.keyframes = []
+        for step in range(0, self.steps + 1, self.keyframe_every):
+            self.key_steps.append(step)
+            self.keyframes.append(self.drawer.extend_to(step).copy())
+        self.step = -1
+        self.seek(0)
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+    def step_at(self, t):
+        """时刻 t 时所在的路径点（t 之前最后到达的点）"""
+        return max(0, bisect_right(self.times, t) - 1)
+
+    def seek(self, step):
+        """跳到第 step 步，返回画好路径（不含位置标记）的 Surface"""
+        step = min(max(int(step), 0), self.steps)
+        drawn = self.drawer.drawn
+        if not (self.step >= 0 and drawn <= step <= drawn + self.keyframe_every):
+            # 不是从当前位置小幅前进：换成之前最近的关键帧再补画
+            k = bisect_right(self.key_steps, step) - 1
+            self.drawer.surface.blit(self.keyframes[k], (0, 0))
+            self.drawer.drawn = self.key_steps[k]
+        self.step = step
+        return self.drawer.extend_to(step)
+
+    def seek_time(self, t):
+        return self.seek(self.step_at(t))
+
+    def frame(self, step=None, target=None):
+        """第 step 步的画面（路径 + 当前位置标记），画在 target（默认新建副本）上"""
+        surface = self.seek(self.step if step is None else step)
+        if target is None:
+            target = surface.copy()
+        else:
+            target.blit(surface, (0, 0))
+        self.style.draw_marker(target, self.path[self.step])
+        return target
+
+
+def load_replay(filename, map_name="障碍地图", keyframe_every=KEYFRAME_EVERY):
+    return Replay(load_archive(filename), map_style(map_name), keyframe_every)
+
+
+# ================= 无窗口导出 =================
+
+def export_frames(replay, directory, fps=30, speed=1.0, start=0.0, end=None):
+    """按播放速度每 1/fps 秒（回放时间）导出一帧 PNG，返回文件名列表"""
+    import pygame
+
+    os.makedirs(directory, exist_ok=True)
+    end = replay.duration if end is None else min(end, replay.duration)
+    frame_count = int((end - start) * fps / speed) + 1
+    target = replay.style.background().copy()
+    filenames = []
+    for i in range(frame_count):
+        t = start + i * speed / fps
+        replay.frame(replay.step_at(t), target)
+        filename = os.path.join(directory, f"frame_{i:05d}.png")
+        pygame.image.save(target, filename)
+        filenames.append(filename)
+    return filenames
+
+
+# ================= 回放窗口 =================
+
+class ReplayViewer:
+    def __init__(self, replay, title="路径回放"):
+        import pygame
+
+        self.replay = replay
+        width, height = replay.style.size
+        self.screen = pygame.display.set_mode((width, height + BAR_HEIGHT))
+        pygame.display.set_caption(title)
+        self.font = pygame.font.SysFont("simhei,microsoftyahei,pingfangsc,arial", 18)
+        self.clock = pygame.time.Clock()
+        self.speed_index = SPEEDS.index(1)
+        self.playing = True
+        self.t = 0.0  # 回放时间（秒）
+        self.running = True
+
+    @property
+    def speed(self):
+        return SPEEDS[self.speed_index]
+
+    def jump(self, step):
+        self.replay.seek(step)
+        self.t = self.replay.times[self.replay.step]
+
+    def handle_input(self, events):
+        import pygame
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                big = event.mod & pygame.KMOD_SHIFT
+                if event.key == pygame.K_SPACE:
+                    self.playing = not self.playing
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    self.playing = False
+                    delta = max(1, self.replay.steps // 10) if big else 1
+                    self.jump(self.replay.step + (delta if event.key == pygame.K_RIGHT else -delta))
+                elif event.key == pygame.K_UP:
+                    self.speed_index = min(self.speed_index + 1, len(SPEEDS) - 1)
+                elif event.key == pygame.K_DOWN:
+                    self.speed_index = max(self.speed_index - 1, 0)
+                elif event.key == pygame.K_HOME:
+                    self.jump(0)
+                elif event.key == pygame.K_END:
+                    self.jump(self.replay.steps)
+                elif event.key == pygame.K_ESCAPE:
+                    self.running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= self.replay.style.height:
+                self.t = self.replay.duration * event.pos[0] / self.screen.get_width()
+                self.replay.seek_time(self.t)
+
+    def draw(self):
+        import pygame
+
+        replay = self.replay
+        self.screen.fill((240, 240, 240))
+        replay.frame(target=self.screen)
+        width = self.screen.get_width()
+        bar_y = replay.style.height
+        done = int(width * self.t / replay.duration) if replay.duration else width
+        pygame.draw.rect(self.screen, (200, 200, 200), (0, bar_y, width, BAR_HEIGHT))
+        pygame.draw.rect(self.screen, (255, 0, 0), (0, bar_y, done, BAR_HEIGHT))
+        state = "播放" if self.playing else "暂停"
+        lines = [f"第 {replay.step}/{replay.steps} 步",
+                 f"{replay.times[replay.step]:.1f}/{replay.duration:.1f} 秒",
+                 f"{state} x{self.speed:g}"]
+        panel_x = replay.style.grid_size * replay.style.cell_size + 10
+        x = panel_x if panel_x + 150 <= width else 10
+        for i, line in enumerate(lines):
+            self.screen.blit(self.font.render(line, True, (0, 0, 0)), (x, 10 + i * 24))
+        pygame.display.flip()
+
+    def run(self):
+        import pygame
+
+        last = time.perf_counter()
+        while self.running:
+            self.handle_input(pygame.event.get())
+            now = time.perf_counter()
+            if self.playing:
+                self.t = min(self.t + (now - last) * self.speed, self.replay.duration)
+                self.replay.seek_time(self.t)
+                if self.t >= self.replay.duration:
+                    self.playing = False
+            last = now
+            self.draw()
+            self.clock.tick(60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="回放存档：可变速播放、暂停、按步或按时间跳转，或无窗口导出逐帧图片")
+    parser.add_argument("archive", help="archive_*.json / .mpath 文件")
+    parser.add_argument("--map", default="障碍地图", choices=sorted(MAPS), help="存档来自哪个游戏脚本")
+    parser.add_argument("--keyframe-every", type=int, default=KEYFRAME_EVERY, help="关键帧间隔（步）")
+    parser.add_argument("--export", metavar="DIR", help="不打开窗口，把逐帧 PNG 写到这个目录")
+    parser.add_argument("--fps", type=float, default=30, help="导出的帧率")
+    parser.add_argument("--speed", type=float, default=1.0, help="导出的播放倍速")
+    parser.add_argument("--start", type=float, default=0.0, help="导出的起始时间（秒）")
+    parser.add_argument("--end", type=float, default=None, help="导出的结束时间（秒）")
+    args = parser.parse_args(argv)
+
+    if args.export:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    pygame.init()
+    start = time.perf_counter()
+    replay = load_replay(args.archive, args.map, args.keyframe_every)
+    print(f"{args.archive}: {replay.steps} 步，{replay.duration:.1f} 秒，"
+          f"{len(replay.keyframes)} 张关键帧，加载 {time.perf_counter() - start:.2f} 秒", file=sys.stderr)
+    if args.export:
+        filenames = export_frames(replay, args.export, args.fps, args.speed, args.start, args.end)
+        print(f"导出 {len(filenames)} 帧到 {args.export}", file=sys.stderr)
+    else:
+        ReplayViewer(replay, f"回放 {os.path.basename(args.archive)}").run()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
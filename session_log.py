@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+import time
+
+# ================= 会话事件日志 =================
+# 每一步移动、撤回、暂停和转弯都在发生时追加到 sessions/session_<时间戳>.jsonl，
+# 中途退出或程序崩溃时已经发生的操作不会丢失。
+# 事件先在内存里攒成一批，再交给后台写入线程一次性追加到文件，主循环不直接碰磁盘。
+# archive_*.json 的汇总格式可以随时从日志重新推导（archive_from_log）。
+
+LOG_DIR = "sessions"
+
+
+class SessionLog:
+    """追加写入的 JSONL 事件日志
+
+    writer：ArchiveWriter 实例时批量写入在后台线程完成；为 None 时在调用线程同步写入。
+    batch_size / flush_interval：攒够多少条或距上次写入多少秒就写一批。
+    """
+
+    def __init__(self, path, writer=None, batch_size=32, flush_interval=1.0):
+        self.path = path
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.seq = 0
+        self.last_flush = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def log(self, event, **fields):
+        record = {"seq": self.seq, "event": event}
+        record.update(fields)
+        self.seq += 1
+        self.buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def poll(self):
+        """每帧调用：缓冲区里有事件且超过 flush_interval 没写时写一批"""
+        if self.buffer and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        text = "\n".join(self.buffer) + "\n"
+        self.buffer = []
+        if self.writer is not None:
+            self.writer.submit(self._append, text)
+        else:
+            self._append(text)
+
+    def _append(self, text):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+def session_log_path(timestamp, directory=LOG_DIR):
+    return os.path.join(directory, f"session_{timestamp}.jsonl")
+
+
+def read_events(path):
+    """逐行读取日志；最后一行如果因为崩溃只写了一半就忽略"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def archive_from_log(path):
+    """从事件日志推导出与 PathGame.generate_archive 相同结构的存档数据"""
+    timestamp = None
+    current_path = []
+    step_times = []
+    turn_events = []
+    duration = 0.0
+    for record in read_events(path):
+        event = record["event"]
+        duration = record.get("t", duration)
+        if event == "start":
+            timestamp = record["timestamp"]
+            current_path = [tuple(record["pos"])]
+            step_times = [0.0]
+        elif event == "move":
+            current_path.append(tuple(record["pos"]))
+            step_times.append(record["t"])
+        elif event == "undo":
+            if len(current_path) > 1:
+                current_path.pop()
+                step_times.pop()
+            # 撤回转弯的那一步时，日志里记着撤回后的转弯次数
+            if "turns" in record:
+                del turn_events[record["turns"]:]
+        elif event == "turn":
+            turn_events.append({"turn": record["turn"], "time": record["time"]})
+        elif event == "finish":
+            # 存档文件名用的是到达终点时的时间戳
+            timestamp = record.get("timestamp", timestamp)
+    if timestamp is None:
+        raise ValueError(f"日志中没有 start 事件: {path}")
+    return {
+        "meta": {
+            "timestamp": timestamp,
+            "duration": round(duration, 1),
+            "steps": len(current_path) - 1,
+            "turns": len(turn_events)
+        },
+        "path": current_path,
+        "step_times": step_times,
+        "turn_events": turn_events
+    }
+
+
+if __name__ == "__main__":
+    # 用法：python session_log.py sessions/session_xxx.jsonl ...
+    # 为每个日志（例如中途退出的会话）生成 archive_<时间戳>.json
+    for log_path in sys.argv[1:]:
+        archive = archive_from_log(log_path)
+        filename = f"archive_{archive['meta']['timestamp']}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(archive, f, indent=4, ensure_ascii=False)
+        print(f"{log_path} -> {filename}")
@@ -0,0 +1,142 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+from path_codec import SUFFIX, load_binary_archive
+
+# ================= 部分路径快照 =================
+# 自动生成走到 30%、50%、70% 时的路径图片，不用再手动截图。
+# 截取位置可以按步数比例（'step'），也可以按用时比例（'time'，需要存档里的 step_times）。
+# 所有快照画在同一张 Surface 上：每张快照只在上一张的基础上补画新增的路径。
+#
+# 两种用法：
+#   游戏到达终点保存存档时自动生成（障碍地图 / 空地图 的 SNAPSHOT_FRACTIONS、SNAPSHOT_BY）；
+#   对已有存档批量生成：python snapshots.py archive_*.json --map 障碍地图 --by time -j 4
+
+SNAPSHOT_FRACTIONS = (0.3, 0.5, 0.7)
+SNAPSHOT_MODES = ('step', 'time')
+
+# 批量模式可用的地图：脚本名 -> 与该脚本 save_path_image 一致的绘制参数
+MAPS = {
+    "障碍地图": {"path_width": 3, "marker_radius": 8},
+    "空地图": {"path_width": 2, "marker_radius": 6},
+}
+
+
+def snapshot_indices(path_length, fractions=SNAPSHOT_FRACTIONS, step_times=None, by='step'):
+    """每个比例对应的路径点下标
+
+    'step'：第 int((点数 - 1) * 比例) 个点（与 空地图 原来标记关键点的算法相同）；
+    'time'：用时达到 总用时 * 比例 之前走到的最后一个点。
+    """
+    if by not in SNAPSHOT_MODES:
+        raise ValueError(f"未知的快照方式: {by}")
+    if by == 'step':
+        return [int((path_length - 1) * f) for f in fractions]
+    if step_times is None:
+        raise ValueError("存档里没有 step_times，无法按用时截取")
+    total = step_times[-1]
+    return [max(0, bisect_right(step_times, total * f) - 1) for f in fractions]
+
+
+def snapshot_filename(timestamp, fraction, by='step', directory=""):
+    """path_<时间戳>_30.png（按步数）或 path_<时间戳>_t30.png（按用时）"""
+    tag = ("t" if by == 'time' else "") + str(int(round(fraction * 100)))
+    return os.path.join(directory, f"path_{timestamp}_{tag}.png")
+
+
+def save_snapshots(drawer, timestamp, fractions=SNAPSHOT_FRACTIONS, step_times=None,
+                   by='step', directory="", marker=True):
+    """按比例从小到大依次补画并保存快照，返回生成的文件名列表
+
+    drawer 是 path_render.PathDrawer；保存完后 drawer 停在最后一个快照的位置，
+    调用方可以继续 extend_to 画完整路径。marker 为 True 时在快照的末端画出当时的位置。
+    """
+    import pygame
+
+    indices = snapshot_indices(len(drawer.path), fractions, step_times, by)
+    filenames = []
+    for fraction, index in sorted(zip(fractions, indices)):
+        surface = drawer.extend_to(index)
+        if marker:
+            # 位置标记画在副本上，不影响后面继续补画路径
+            surface = surface.copy()
+            drawer.style.draw_marker(surface, drawer.path[index])
+        filename = snapshot_filename(timestamp, fraction, by, directory)
+        pygame.image.save(surface, filename)
+        filenames.append(filename)
+    return filenames
+
+
+# ================= 批量模式 =================
+
+def load_archive(filename):
+    if filename.endswith(SUFFIX):
+        return load_binary_archive(filename)
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def map_style(name):
+    """按脚本名导入游戏模块，取它的地图常量创建 MapStyle"""
+    from path_render import MapStyle
+
+    return MapStyle.from_module(importlib.import_module(name), **MAPS[name])
+
+
+def _init_worker():
+    # 子进程不需要窗口：用 dummy 驱动，只在离屏 Surface 上绘制
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def snapshot_archive(filename, map_name, fractions=SNAPSHOT_FRACTIONS, by='step', directory=None):
+    """为一个存档生成快照（在子进程里执行），图片默认写在存档旁边"""
+    from path_render import PathDrawer
+
+    archive = load_archive(filename)
+    path = [tuple(p) for p in archive["path"]]
+    timestamp = archive["meta"]["timestamp"]
+    if directory is None:
+        directory = os.path.dirname(filename)
+    drawer = PathDrawer(map_style(map_name), path)
+    return save_snapshots(drawer, timestamp, fractions, archive.get("step_times"), by, directory)
+
+
+def _safe_snapshot(args):
+    try:
+        return args[0], snapshot_archive(*args), None
+    except Exception as exc:
+        return args[0], [], str(exc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="为已有存档批量生成部分路径快照")
+    parser.add_argument("archives", nargs="+", help="archive_*.json / .mpath 文件")
+    parser.add_argument("--map", default="障碍地图", choices=sorted(MAPS), help="存档来自哪个游戏脚本")
+    parser.add_argument("--fractions", type=float, nargs="+", default=list(SNAPSHOT_FRACTIONS))
+    parser.add_argument("--by", choices=SNAPSHOT_MODES, default='step', help="按步数还是按用时截取")
+    parser.add_argument("-o", "--output", help="图片输出目录，默认与存档相同")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    _init_worker()
+    tasks = [(name, args.map, args.fractions, args.by, args.output) for name in args.archives]
+    failed = 0
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        for name, filenames, error in pool.map(_safe_snapshot, tasks, chunksize=8):
+            if error:
+                print(f"跳过 {name}: {error}", file=sys.stderr)
+                failed += 1
+            else:
+                print(f"{name} -> {', '.join(filenames)}")
+    print(f"共 {len(tasks)} 个存档，失败 {failed}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import pygame  
 from pygame.locals import *  
+from render_cache import get_static_layer, map_key
+from event_loop import wait_events
 
 # 游戏配置  
 GRID_SIZE = 50  
 CELL_SIZE = 10  
 WIDTH = HEIGHT = GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待事件，地图是静态的，只在窗口需要重绘时才画
 
 # 颜色配置  
 COLORS = {  
@@ -83,52 +86,68 @@ MIRRORED_OBSTACLES = [
 ALL_OBSTACLES = ORIGINAL_OBSTACLES + MIRRORED_OBSTACLES  
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("对称障碍物路径游戏")  
         self.clock = pygame.time.Clock()  
         self.running = True  
+        self.event_driven = event_driven  
+        # 整张地图都是静态的，缓存成一张背景层
+        self.map_key = map_key(GRID_SIZE, CELL_SIZE, ALL_OBSTACLES, POINTS, COLORS)  
 
     def convert_coords(self, x, y):  
         """将逻辑坐标转换为屏幕坐标（左下原点转左上原点）"""  
         return (x * CELL_SIZE, (GRID_SIZE - y - 1) * CELL_SIZE)  
 
-    def draw_grid(self):  
+    def draw_grid(self, surface):  
         """绘制网格系统"""  
         for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(self.screen, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                            (i*CELL_SIZE, 0), (i*CELL_SIZE, HEIGHT))  
-            pygame.draw.line(self.screen, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                            (0, i*CELL_SIZE), (WIDTH, i*CELL_SIZE))  
 
-    def draw_obstacles(self):  
+    def draw_obstacles(self, surface):  
         """绘制所有障碍物"""  
         for x, y, w, h in ALL_OBSTACLES:  
-            pygame.draw.rect(self.screen, COLORS['obstacle'],  
+            pygame.draw.rect(surface, COLORS['obstacle'],  
                            (x*CELL_SIZE, (GRID_SIZE - y - h)*CELL_SIZE,  
                             w*CELL_SIZE, h*CELL_SIZE))  
 
-    def draw_points(self):  
+    def draw_points(self, surface):  
         """绘制所有关键点"""  
         for name, (x, y) in POINTS.items():  
             pos = self.convert_coords(x, y)  
-            pygame.draw.circle(self.screen, COLORS.get(name, (0,0,0)), pos, 6)  
+            pygame.draw.circle(surface, COLORS.get(name, (0,0,0)), pos, 6)  
+
+    def build_background(self, surface):  
+        """静态背景层：网格、障碍物和关键点，只在缓存失效时绘制"""  
+        surface.fill(COLORS['background'])  
+        self.draw_grid(surface)  
+        self.draw_obstacles(surface)  
+        self.draw_points(surface)  
 
     def run(self):  
         """主游戏循环"""  
+        needs_redraw = True  
         while self.running:  
-            for event in pygame.event.get():  
+            events = wait_events() if self.event_driven else pygame.event.get()  
+            for event in events:  
                 if event.type == QUIT:  
                     self.running = False  
-
-            self.screen.fill(COLORS['background'])  
-            self.draw_grid()  
-            self.draw_obstacles()  
-            self.draw_points()  
+                if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):  
+                    needs_redraw = True  
+
+            if self.event_driven and not needs_redraw:  
+                continue  
+            needs_redraw = False  
+            background = get_static_layer(self.map_key, (WIDTH, HEIGHT), self.build_background)  
+            self.screen.blit(background, (0, 0))  
             
             pygame.display.flip()  
-            self.clock.tick(30)  
+            if not self.event_driven:  
+                self.clock.tick(30)  
         
         pygame.quit()  
 
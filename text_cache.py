@@ -0,0 +1,79 @@
+import re
+from collections import OrderedDict
+
+import pygame
+
+# ================= 文字 Surface 缓存 =================
+# font.render（尤其是 simhei.ttf 的中文字形）是每帧最贵的操作之一。
+# 渲染结果按 (字号, 文字, 颜色) 缓存在有上限的 LRU 里；
+# 文字中的数字逐个字符单独缓存，计时、步数、转弯次数等数值变化时只需拼接已缓存的字形。
+
+_NUMBER_CHARS = re.compile(r'([0-9.\-])')
+
+
+class TextCache:
+    """有上限的 LRU 文字缓存
+
+    font_loader：按字号创建字体的函数（各脚本里的 get_font，或 SysFont 的包装）
+    size：默认字号
+    """
+
+    def __init__(self, font_loader, size=20, maxsize=256):
+        self.font_loader = font_loader
+        self.default_size = size
+        self.maxsize = maxsize
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size=None):
+        size = size or self.default_size
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = self.font_loader(size)
+        return font
+
+    def render(self, text, color, size=None, antialias=True):
+        """渲染整段文字（命中缓存时不再调用 font.render）"""
+        size = size or self.default_size
+        key = (size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size).render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.maxsize:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def pieces(self, text):
+        """把文字拆成普通片段和单个数字字符，例如 "时间: 12.3秒" -> ["时间: ", "1", "2", ".", "3", "秒"]"""
+        return [piece for piece in _NUMBER_CHARS.split(text) if piece]
+
+    def blit(self, surface, text, pos, color, size=None):
+        """用缓存的片段拼出文字并画到 surface 上，返回占用的区域"""
+        x, y = pos
+        height = self.font(size).get_height()
+        for piece in self.pieces(text):
+            piece_surface = self.render(piece, color, size)
+            surface.blit(piece_surface, (x, y))
+            x += piece_surface.get_width()
+            height = max(height, piece_surface.get_height())
+        return pygame.Rect(pos, (x - pos[0], height))
+
+    def size(self, text, size=None):
+        """文字拼接后的尺寸，与 blit 的结果一致（用于计算脏矩形）"""
+        font = self.font(size)
+        width = sum(font.size(piece)[0] for piece in self.pieces(text))
+        return width, font.get_height()
+
+    def render_page(self, page_size, background, items):
+        """把整页静态文字预先画到一张 Surface 上；items 为 (文字, 位置, 颜色, 字号) 列表"""
+        page = pygame.Surface(page_size)
+        page.fill(background)
+        for text, pos, color, size in items:
+            if text:
+                page.blit(self.font(size).render(text, True, color), pos)
+        if pygame.display.get_surface() is not None:
+            page = page.convert()
+        return page
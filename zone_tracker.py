@@ -0,0 +1,88 @@
+# ================= 7x7 分区（实时） =================
+# 游戏里给主试实时显示分区用的 ZoneTracker 和分区编号表，只用标准库：
+# 游戏脚本不装 NumPy 也能运行，批量统计和命令行在 zones.py 里。
+# 分区编号规则见 zones.py：zy * 7 + zx（zx = x // 7，zy = y // 7，从左下角开始数），最后一行/列归最后一个分区。
+
+ZONE_CELLS = 7  # 每个分区的边长（格）
+ZONES_PER_SIDE = 7
+ZONE_COUNT = ZONES_PER_SIDE * ZONES_PER_SIDE
+
+_TABLES = {}
+
+
+def zone_table(size):
+    """[y][x] 下标的分区编号表（嵌套列表），size 为每个方向上的坐标个数（GRID_SIZE + 1）"""
+    table = _TABLES.get(size)
+    if table is None:
+        cells = [min(i // ZONE_CELLS, ZONES_PER_SIDE - 1) for i in range(size)]
+        table = _TABLES[size] = [[zy * ZONES_PER_SIDE + zx for zx in cells] for zy in cells]
+    return table
+
+
+class ZoneTracker:
+    """随路径增量更新的分区统计，给主试实时查看；撤回时回退
+
+    zones[i] 是 path[i] 所在的分区，entries 是依次进入的分区，
+    time[z] 是到最后一个路径点为止在分区 z 的停留时间，transitions[a][b] 是 a -> b 的次数。
+    """
+
+    def __init__(self, size, path, step_times=None):
+        self.table = zone_table(size)
+        self.zones = []
+        self.entries = []
+        self.time = [0.0] * ZONE_COUNT
+        self.transitions = [[0] * ZONE_COUNT for _ in range(ZONE_COUNT)]
+        self.last_time = None
+        self.clock = []  # clock[i] 为走到 path[i] 时累计的停留时间，撤回时直接弹出
+        self.entered = []  # entries 中每次进入时的路径点下标
+        times = step_times if step_times is not None else [None] * len(path)
+        for pos, t in zip(path, times):
+            self.push(pos, t)
+
+    @property
+    def current(self):
+        return self.zones[-1]
+
+    def push(self, pos, t=None):
+        x, y = pos
+        zone = self.table[y][x]
+        if self.zones:
+            previous = self.zones[-1]
+            dwell = t - self.last_time if t is not None and self.last_time is not None else 0.0
+            self.time[previous] += dwell
+            self.clock.append(self.clock[-1] + dwell)
+            if zone != previous:
+                self.entries.append(zone)
+                self.entered.append(len(self.zones))
+                self.transitions[previous][zone] += 1
+        else:
+            self.clock.append(0.0)
+            self.entries.append(zone)
+            self.entered.append(0)
+        self.zones.append(zone)
+        self.last_time = t
+        return zone
+
+    def pop(self, t=None):
+        """撤回最后一个路径点；t 为撤回后最后一个点的到达时间"""
+        if len(self.zones) <= 1:
+            return self.zones[-1]
+        zone = self.zones.pop()
+        previous = self.zones[-1]
+        dwell = self.clock.pop()
+        self.time[previous] -= dwell - self.clock[-1]
+        if zone != previous:
+            self.entries.pop()
+            self.entered.pop()
+            self.transitions[previous][zone] -= 1
+        self.last_time = t
+        return previous
+
+    def current_time(self):
+        """当前分区这一次进入以来的停留时间（到最后一个路径点为止）"""
+        return self.clock[-1] - self.clock[self.entered[-1]]
+
+
+def zone_name(zone):
+    """分区编号 -> "(zx, zy)" 形式的名字（从左下角数起）"""
+    return f"({zone % ZONES_PER_SIDE}, {zone // ZONES_PER_SIDE})"
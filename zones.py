@@ -0,0 +1,126 @@
+import argparse
+import csv
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analyze_archives import find_archives, load_path
+from zone_tracker import ZONE_CELLS, ZONES_PER_SIDE, ZONE_COUNT, ZoneTracker, zone_name  # noqa: F401
+
+# ================= 7x7 分区 =================
+# 分格障碍物.py 把地图画成 7x7 个分区，每个分区 7x7 格。路径点落在格线交点上，
+# 分区编号为 zy * 7 + zx（zx = x // 7，zy = y // 7，从左下角开始数）；
+# 正好压在分区边线上的点归右边/上边的分区，最右和最上一条边线（坐标 GRID_SIZE）归最后一个分区。
+# 每种地图尺寸预先算好一张坐标 -> 分区编号的查找表，整条路径用一次花式索引转成分区编号。
+# 在此基础上统计各分区的停留时间、进入顺序和分区之间的转移矩阵：
+# 离线时按会话批量计算（python zones.py 数据目录 -o zones.csv），游戏里由 zone_tracker.ZoneTracker 逐步更新
+# （那边只用标准库，游戏不装 NumPy 也能运行）。
+
+_LOOKUP = {}
+
+
+def zone_lookup(size):
+    """(y, x) 下标的 int8 查找表，size 为每个方向上的坐标个数（GRID_SIZE + 1）"""
+    lookup = _LOOKUP.get(size)
+    if lookup is None:
+        cells = np.minimum(np.arange(size) // ZONE_CELLS, ZONES_PER_SIDE - 1)
+        lookup = _LOOKUP[size] = (cells[:, None] * ZONES_PER_SIDE + cells[None, :]).astype(np.int8)
+        lookup.flags.writeable = False
+    return lookup
+
+
+def zone_ids(points, size):
+    """[(x, y), ...] 或 (N, 2) 数组 -> 每个点的分区编号（int8 数组）；超出地图的点归入最近的边缘分区"""
+    points = np.clip(np.asarray(points, dtype=np.intp).reshape(-1, 2), 0, size - 1)
+    return zone_lookup(size)[points[:, 1], points[:, 0]]
+
+
+def session_zones(points, size, times=None):
+    """单个会话的分区统计（整条路径一次转换成分区编号后全部向量化计算）
+
+    points：(N, 2) 坐标；size 同 zone_lookup；times：每个路径点的到达时间（秒），None 时停留时间按步数计。
+    返回 {"zones": 每个点的分区, "entries": 依次进入的分区（连续相同的只记一次）,
+          "steps": 各分区的路径点数, "time": 各分区的停留时间, "transitions": 49x49 转移次数}。
+    第 i 个点的停留时间为 times[i + 1] - times[i]，记在第 i 个点所在的分区上。
+    """
+    zones = zone_ids(points, size).astype(np.intp)
+    changed = np.flatnonzero(zones[1:] != zones[:-1])
+    entries = zones[np.concatenate(([0], changed + 1))] if len(zones) else zones
+    if times is None:
+        dwell = np.ones(max(len(zones) - 1, 0))
+    else:
+        dwell = np.diff(np.asarray(times, dtype=np.float64))
+    return {
+        "zones": zones,
+        "entries": entries,
+        "steps": np.bincount(zones, minlength=ZONE_COUNT),
+        "time": np.bincount(zones[:-1], weights=dwell, minlength=ZONE_COUNT),
+        "transitions": np.bincount(zones[changed] * ZONE_COUNT + zones[changed + 1],
+                                   minlength=ZONE_COUNT * ZONE_COUNT).reshape(ZONE_COUNT, ZONE_COUNT),
+    }
+
+
+# ================= 批量统计 =================
+
+def _session_task(task):
+    filename, size = task
+    try:
+        points, times, archive = load_path(filename)
+        return filename, archive.get("meta", {}), session_zones(points, size, times), None
+    except Exception as exc:
+        return filename, None, None, str(exc)
+
+
+def iter_sessions(files, size, workers=None):
+    """并行计算每个存档的分区统计，按 files 的顺序产出 (文件名, meta, 统计, 错误信息)"""
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(_session_task, [(filename, size) for filename in files], chunksize=16)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="7x7 分区统计：停留时间、进入顺序和分区转移矩阵")
+    parser.add_argument("paths", nargs="*", default=["."], help="存档文件、通配符或目录（递归查找）")
+    parser.add_argument("--map", default="障碍地图", help="存档来自哪个游戏脚本（决定 GRID_SIZE）")
+    parser.add_argument("-o", "--output", default="zones.csv", help="每个会话一行的 CSV")
+    parser.add_argument("--transitions", default="zone_transitions.csv", help="汇总的分区转移矩阵 CSV")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    size = importlib.import_module(args.map).GRID_SIZE + 1
+    files = find_archives(args.paths)
+    transitions = np.zeros((ZONE_COUNT, ZONE_COUNT), dtype=np.int64)
+    time_total = np.zeros(ZONE_COUNT)
+    done = failed = 0
+    columns = ["file", "timestamp", "zones_visited", "entries", "transitions"] + [f"time_{z}" for z in range(ZONE_COUNT)]
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for filename, meta, stats, error in iter_sessions(files, size, args.workers):
+            if error:
+                print(f"跳过 {filename}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+            pairs = np.argwhere(stats["transitions"])
+            writer.writerow([
+                filename, meta.get("timestamp", ""), int((stats["steps"] > 0).sum()),
+                "-".join(str(z) for z in stats["entries"].tolist()),
+                ";".join(f"{a}>{b}:{stats['transitions'][a, b]}" for a, b in pairs),
+            ] + [round(t, 3) for t in stats["time"].tolist()])
+            transitions += stats["transitions"]
+            time_total += stats["time"]
+            done += 1
+
+    with open(args.transitions, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["from"] + list(range(ZONE_COUNT)))
+        for zone, row in enumerate(transitions.tolist()):
+            writer.writerow([zone] + row)
+    busiest = np.argsort(time_total)[::-1][:3]
+    print(f"共 {len(files)} 个存档，成功 {done}，失败 {failed}；停留最久的分区："
+          + "，".join(f"{zone_name(z)} {time_total[z]:.0f}" for z in busiest), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import pygame
 import time
+from render_cache import get_static_layer, map_key
+from event_loop import wait_events
 
 # ================= 游戏配置 =================  
 GRID_SIZE = 49  
 CELL_SIZE = 15  
 WIDTH, HEIGHT = GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待事件，地图是静态的，只在窗口需要重绘时才画
 
 # 颜色配置
 COLORS = {  
@@ -49,7 +52,7 @@ MIRRORED_OBSTACLES = [
 ALL_OBSTACLES = ORIGINAL_OBSTACLES + MIRRORED_OBSTACLES  
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("对称障碍物路径游戏")  
@@ -62,59 +65,78 @@ class PathGame:
         self.start_time = time.time()  
         self.running = True  
         self.finished = False  
+        self.event_driven = event_driven  
+
+        # 网格、分区、障碍物和坐标点缓存成一张背景层
+        self.map_key = map_key(GRID_SIZE, CELL_SIZE, ALL_OBSTACLES, POINTS, COLORS)  
 
     def convert_coords(self, x, y):  
         return (x * CELL_SIZE, (GRID_SIZE - y) * CELL_SIZE)  
 
-    def draw_grid(self):  
+    def draw_grid(self, surface):  
         # 绘制基础网格
         for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(self.screen, COLORS['grid'],
+            pygame.draw.line(surface, COLORS['grid'],
                             (i * CELL_SIZE, 0), (i * CELL_SIZE, HEIGHT))  
-            pygame.draw.line(self.screen, COLORS['grid'],
+            pygame.draw.line(surface, COLORS['grid'],
                             (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))  
 
         # 绘制7x7分区边框
         for i in range(0, GRID_SIZE, 7):  # 每7个格子画一个边框
             for j in range(0, GRID_SIZE, 7):
-                pygame.draw.rect(self.screen, COLORS['grid'], 
+                pygame.draw.rect(surface, COLORS['grid'], 
                                  (j * CELL_SIZE, i * CELL_SIZE, 7 * CELL_SIZE, 7 * CELL_SIZE), 
                                  width=3)  # 3像素宽的边框
 
-    def draw_obstacles(self):  
+    def draw_obstacles(self, surface):  
         for x, y, w, h in ALL_OBSTACLES:  
             # pygame坐标系默认左上角为原点，需要转换
             rect_x = x * CELL_SIZE
             rect_y = (GRID_SIZE - y - h) * CELL_SIZE  
-            pygame.draw.rect(self.screen, COLORS['obstacle'],
+            pygame.draw.rect(surface, COLORS['obstacle'],
                             (rect_x, rect_y, w * CELL_SIZE, h * CELL_SIZE))
 
-    def draw_points(self):  
+    def draw_points(self, surface):  
         for name, (x, y) in POINTS.items():  
             pos = self.convert_coords(x, y)  
             color = COLORS.get(name, (0,0,0))  
-            pygame.draw.circle(self.screen, color, pos, 6)  
+            pygame.draw.circle(surface, color, pos, 6)  
+
+    def build_background(self, surface):
+        """静态背景层：网格、7x7分区、障碍物和坐标点，只在缓存失效时绘制"""
+        surface.fill(COLORS['background'])
+        self.draw_grid(surface)
+        self.draw_obstacles(surface)
+        self.draw_points(surface)
+
+    def draw_current(self):
         pygame.draw.circle(self.screen, COLORS['current'],
                           self.convert_coords(*self.current_pos), 6)  
 
     def run(self):
         """主游戏循环"""
+        needs_redraw = True
         while self.running:
-            # 监听事件
-            for event in pygame.event.get():
+            # 监听事件（事件驱动模式下阻塞等待）
+            events = wait_events() if self.event_driven else pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    needs_redraw = True
+
+            if self.event_driven and not needs_redraw:
+                continue
+            needs_redraw = False
 
-            # 填充背景颜色
-            self.screen.fill(COLORS['background'])
-            
-            # 绘制网格、障碍物和关键点
-            self.draw_grid()
-            self.draw_obstacles()
-            self.draw_points()
+            # 绘制缓存的背景层（网格、障碍物和关键点）以及当前位置
+            background = get_static_layer(self.map_key, (WIDTH, HEIGHT), self.build_background)
+            self.screen.blit(background, (0, 0))
+            self.draw_current()
 
             pygame.display.flip()  # 更新屏幕
-            self.clock.tick(30)  # 控制帧率
+            if not self.event_driven:
+                self.clock.tick(30)  # 控制帧率
 
         pygame.quit()
 
@@ -1,17 +1,35 @@
 import pygame  
 import time  
-import math  
 import json  
+import argparse  
 from datetime import datetime  
 from pygame.locals import *  
+from event_loop import wait_events
+from text_cache import TextCache
+from archive_writer import ArchiveWriter
+from session_log import SessionLog, session_log_path
+from path_codec import save_binary_archive, SUFFIX
+from path_state import PathStats
+from goal_recognition import GoalRecognizer, load_goal_fields
+from path_render import MapStyle, PathDrawer, PathLayer
+from snapshots import save_snapshots
+from checkpoint import (CHECKPOINT_EVERY, checkpoint_path, write_checkpoint, read_checkpoint,
+                        remove_checkpoint, read_tail, truncate_log, latest_checkpoint,
+                        map_identity, check_identity)
 
 # ================= 配置参数 =================  
+GAME_NAME = "空地图"  # 会话日志和检查点里的游戏名（几个游戏共用 sessions/ 目录）  
 FONT_PATH = "C:/Windows/Fonts/simhei.ttf"  
 GRID_SIZE = 49  
 CELL_SIZE = 15  
 PANEL_WIDTH = 200  # 右侧面板宽度  
 WIDTH = GRID_SIZE * CELL_SIZE + PANEL_WIDTH  
 HEIGHT = GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待输入，没有输入时不重画
+SNAPSHOT_FRACTIONS = (0.3, 0.5, 0.7)  # 到达终点时另存走到这些比例时的路径快照；() 表示不保存
+SNAPSHOT_BY = 'step'  # 'step' 按步数比例截取；'time' 按用时比例截取
+GOAL_RECOGNITION = True  # 用观察者模型逐步估计参与者的目标，后验轨迹写入存档（需要 NumPy）
+ARCHIVE_FORMAT = 'json'  # 'json' 原来的 JSON 存档；'binary' 紧凑的 .mpath 存档（path_codec）；'both' 两种都写
 
 COLORS = {  
     'background': (255, 255, 255),  
@@ -40,27 +58,48 @@ def get_font(size):
     return pygame.font.Font(FONT_PATH, size)  
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("路径迷宫")  
         self.clock = pygame.time.Clock()  
-        self.font = get_font(20)  
+        # 文字渲染结果缓存；面板的静态部分预渲染成一张 Surface  
+        self.text = TextCache(get_font, 20)  
+        self.panel_surface = None  
+        self.event_driven = event_driven  
+        # 存档和路径图片在后台线程写入，不阻塞主循环  
+        self.writer = ArchiveWriter()  
+        # 日志和检查点里记录的游戏名和地图指纹，--resume 时只恢复同一张地图的会话  
+        self.identity = map_identity(GAME_NAME, GRID_SIZE, (), POINTS)  
+        # 保存路径图片和快照用的离屏绘制参数  
+        self.path_style = MapStyle(GRID_SIZE, CELL_SIZE, WIDTH, HEIGHT, COLORS,  
+                                   path_color=COLORS['path'], path_width=2, marker_radius=6)  
+        # 各终点的距离场（磁盘缓存），供观察者模型逐步查询  
+        self.goal_fields = load_goal_fields((), POINTS, GRID_SIZE + 1) if GOAL_RECOGNITION else None  
         self.reset_game()  
 
     def reset_game(self):  
         """初始化游戏状态"""  
         self.current_pos = list(POINTS['start'])  
         self.path = [tuple(self.current_pos)]  
-        self.turn_count = 0  
+        self.step_times = [0.0]  # 每个路径点的到达时间（秒），与 path 一一对应  
         self.start_time = 0  
         self.paused = False  
         self.running = True  
         self.finished = False  
         self.game_started = False    
-        self.previous_direction = None  
+        self.turn_count = 0  
         self.turn_times = []  
+        # 步数、转弯、重复访问的增量统计，撤回时同步回退  
+        self.stats = PathStats(GRID_SIZE + 1, self.path)  
+        self.reset_recognizer()  
+        # 常驻路径层：移动只画新线段，撤回只重画局部  
+        self.path_layer = PathLayer(self.convert_coords, (WIDTH, HEIGHT), COLORS['path'], 2, self.path)  
         self.pause_start = 0  
+        self.finish_deadline = None  # 到达终点后结束画面保持到这个时间点  
+        self.session_log = None  # 点击开始后创建，逐条记录本次会话的操作  
+        self.session_timestamp = None  
+        self.events_since_checkpoint = 0  
 
     def convert_coords(self, x, y):  
         """坐标转换（逻辑坐标 → 屏幕坐标）"""  
@@ -87,23 +126,20 @@ class PathGame:
 
     def draw_path(self):  
         """绘制玩家路径"""  
-        if len(self.path) > 1:  
-            points = [self.convert_coords(x, y) for x, y in self.path]  
-            pygame.draw.lines(self.screen, COLORS['path'], False, points, 2)  
-
-    def calculate_angle(self, p1, p2, p3):  
-        """计算路径夹角"""  
-        v1 = (p1[0] - p2[0], p1[1] - p2[1])  
-        v2 = (p3[0] - p2[0], p3[1] - p2[1])  
-        dot_product = v1[0] * v2[0] + v1[1] * v2[1]  
-        magnitude_v1 = math.sqrt(v1[0]**2 + v1[1]**2)  
-        magnitude_v2 = math.sqrt(v2[0]**2 + v2[1]**2)  
-        cos_angle = dot_product / (magnitude_v1 * magnitude_v2)  
-        return math.degrees(math.acos(cos_angle))  
-
-    def handle_input(self):  
+        self.path_layer.draw(self.screen, self.path)  
+
+    def next_events(self):  
+        """轮询模式直接取事件；事件驱动模式阻塞到有输入为止（界面上没有计时显示）"""  
+        if not self.event_driven:  
+            return pygame.event.get()  
+        if self.finish_deadline is not None:  
+            # 结束画面需要按时关闭  
+            return wait_events((self.finish_deadline - time.time()) * 1000)  
+        return wait_events()  
+
+    def handle_input(self, events):  
         """处理输入事件"""  
-        for event in pygame.event.get():  
+        for event in events:  
             if event.type == QUIT:  
                 self.running = False  
             
@@ -114,14 +150,17 @@ class PathGame:
                     HEIGHT//2 - 25 < event.pos[1] < HEIGHT//2 + 25):  
                     self.game_started = True  
                     self.start_time = time.time()  
+                    self.start_session()  
 
             if event.type == KEYDOWN:  
                 # 暂停逻辑（仅在游戏开始后生效）  
-                if self.game_started and event.key == K_ESCAPE:  
+                if self.game_started and not self.finished and event.key == K_ESCAPE:  
                     if not self.paused:  
                         self.pause_start = time.time()  
+                        self.log_event("pause")  
                     else:  
                         self.start_time += time.time() - self.pause_start  
+                        self.log_event("resume")  
                     self.paused = not self.paused  
                 
                 # 游戏操作（仅在开始且非暂停状态）  
@@ -130,7 +169,10 @@ class PathGame:
                     if event.key == K_BACKSPACE:  
                         if len(self.path) > 1:  
                             self.path.pop()  
+                            self.step_times.pop()  
+                            self.rollback_stats()  
                             self.current_pos = list(self.path[-1])  
+                            self.log_event("undo", pos=list(self.current_pos), turns=self.turn_count)  
                     
                     # 移动控制  
                     dx, dy = 0, 0  
@@ -151,18 +193,129 @@ class PathGame:
                     if abs(new_x - self.current_pos[0]) + abs(new_y - self.current_pos[1]) != 1:  
                         return  
                     
-                    # 转弯检测  
-                    if len(self.path) > 1:  
-                        angle = self.calculate_angle(self.path[-2], self.path[-1], (new_x, new_y))  
-                        if angle >= 25 and self.previous_direction != (dx, dy):  
-                            self.turn_count += 1  
-                            elapsed_time = time.time() - self.start_time  
-                            self.turn_times.append((self.turn_count, round(elapsed_time, 1)))  
-
                     # 更新状态  
                     self.current_pos = [new_x, new_y]  
                     self.path.append(tuple(self.current_pos))  
-                    self.previous_direction = (dx, dy)  
+                    step_time = self.elapsed()  
+                    self.step_times.append(step_time)  
+
+                    # 转弯检测：与上一步方向垂直即为转弯（整数方向码比较）  
+                    if self.stats.push(self.path[-1]):  
+                        self.turn_count = self.stats.turns  
+                        self.turn_times.append((self.turn_count, round(step_time, 1)))  
+                        self.log_event("turn", t=step_time, turn=self.turn_count, time=round(step_time, 1))  
+                    if self.recognizer is not None:  
+                        self.recognizer.push(self.path[-1])  
+                    self.log_event("move", t=step_time, pos=[new_x, new_y])  
+
+    def elapsed(self):  
+        return round(time.time() - self.start_time, 3)  
+
+    def start_session(self):  
+        """点击开始后创建本次会话的事件日志"""  
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  
+        self.session_timestamp = timestamp  
+        self.session_log = SessionLog(session_log_path(timestamp), self.writer)  
+        self.session_log.log("start", t=0.0, timestamp=timestamp, pos=list(self.current_pos), **self.identity)  
+        self.save_checkpoint()  
+
+    def log_event(self, event, t=None, **fields):  
+        if self.session_log is not None:  
+            self.session_log.log(event, t=self.elapsed() if t is None else t, **fields)  
+            self.events_since_checkpoint += 1  
+
+    def checkpoint_state(self):  
+        """检查点内容：恢复会话所需的全部状态，seq 之前的日志事件都已包含在内"""  
+        # 暂停期间计时停在 pause_start  
+        now = self.pause_start if self.paused else time.time()  
+        return {  
+            **self.identity,  
+            "seq": self.session_log.seq,  
+            "timestamp": self.session_timestamp,  
+            "elapsed": round(now - self.start_time, 3),  
+            "paused": self.paused,  
+            "current_pos": list(self.current_pos),  
+            "path": [list(p) for p in self.path],  
+            "step_times": list(self.step_times),  
+            "turn_count": self.turn_count,  
+            "turn_times": [list(t) for t in self.turn_times],  
+        }  
+
+    def save_checkpoint(self):  
+        """先把缓冲的日志交给写入线程，再在同一线程里写检查点（记录此时的日志长度）"""  
+        self.session_log.flush()  
+        self.writer.submit(write_checkpoint, checkpoint_path(self.session_log.path),  
+                           self.checkpoint_state(), self.session_log.path)  
+        self.events_since_checkpoint = 0  
+
+    def resume_session(self, checkpoint_file):  
+        """从检查点和日志尾部恢复未完成的会话；恢复后处于暂停状态，按 Esc 继续"""  
+        state = read_checkpoint(checkpoint_file)  
+        check_identity(state, self.identity, checkpoint_file)  
+        self.current_pos = list(state["current_pos"])  
+        self.path = [tuple(p) for p in state["path"]]  
+        self.step_times = list(state["step_times"])  
+        self.turn_count = state["turn_count"]  
+        self.turn_times = [tuple(t) for t in state["turn_times"]]  
+        self.stats = PathStats(GRID_SIZE + 1, self.path)  
+        self.reset_recognizer()  
+        self.path_layer.reset(self.path)  
+        elapsed = state["elapsed"]  
+        seq = state["seq"]  
+
+        # 只重放检查点之后的日志尾部  
+        log_path = state["log_path"]  
+        records, end = read_tail(log_path, state["log_offset"], seq)  
+        for record in records:  
+            self.replay_event(record)  
+            elapsed = record.get("t", elapsed)  
+            seq = record["seq"] + 1  
+        truncate_log(log_path, end)  
+
+        self.game_started = True  
+        self.paused = True  
+        self.pause_start = time.time()  
+        self.start_time = self.pause_start - elapsed  
+        self.session_timestamp = state["timestamp"]  
+        self.session_log = SessionLog(log_path, self.writer)  
+        self.session_log.seq = seq  
+        self.session_log.log("recover", t=elapsed)  
+        self.save_checkpoint()  
+        return len(records)  
+
+    def rollback_stats(self):  
+        """撤回一步时回退统计；撤回的是转弯的那一步时同时删掉对应的转弯记录"""  
+        _, turned = self.stats.pop()  
+        if turned:  
+            self.turn_times.pop()  
+        self.turn_count = self.stats.turns  
+        if self.recognizer is not None:  
+            self.recognizer.pop()  
+
+    def reset_recognizer(self):  
+        """按当前路径重建观察者模型（新游戏或恢复会话时）"""  
+        self.recognizer = GoalRecognizer(self.goal_fields, self.path) if self.goal_fields is not None else None  
+
+    def replay_event(self, record):  
+        """把一条日志事件重新作用到游戏状态上（不经过输入检查）"""  
+        event = record["event"]  
+        if event == "move":  
+            pos = tuple(record["pos"])  
+            self.path.append(pos)  
+            self.step_times.append(record["t"])  
+            self.stats.push(pos)  
+            if self.recognizer is not None:  
+                self.recognizer.push(pos)  
+            self.current_pos = list(pos)  
+        elif event == "undo":  
+            if len(self.path) > 1:  
+                self.path.pop()  
+                self.step_times.pop()  
+                self.rollback_stats()  
+                self.current_pos = list(self.path[-1])  
+        elif event == "turn":  
+            self.turn_count = record["turn"]  
+            self.turn_times.append((record["turn"], record["time"]))  
 
     def check_finish(self):  
         """终点检测"""  
@@ -175,44 +328,47 @@ class PathGame:
 
     def generate_archive(self):  
         """生成存档数据"""  
-        return {  
+        archive = {  
             "meta": {  
                 "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),  
                 "duration": round(time.time() - self.start_time, 1),  
                 "steps": len(self.path) - 1,  
                 "turns": self.turn_count  
             },  
-            "path": self.path,  
+            "path": list(self.path),  
+            "step_times": list(self.step_times),  
             "turn_events": [{"turn": t[0], "time": t[1]} for t in self.turn_times]  
         }  
+        if self.recognizer is not None:  
+            archive["goal_posterior"] = self.recognizer.archive_data()  
+        return archive  
 
     def save_archive(self, archive_data):  
         """保存存档文件"""  
+        timestamp = archive_data['meta']['timestamp']  
         # 保存JSON数据  
-        filename = f"archive_{archive_data['meta']['timestamp']}.json"  
-        with open(filename, "w", encoding='utf-8') as f:  
-            json.dump(archive_data, f, indent=4, ensure_ascii=False)  
+        if ARCHIVE_FORMAT in ('json', 'both'):  
+            filename = f"archive_{timestamp}.json"  
+            with open(filename, "w", encoding='utf-8') as f:  
+                json.dump(archive_data, f, indent=4, ensure_ascii=False)  
+        # 紧凑的二进制存档  
+        if ARCHIVE_FORMAT in ('binary', 'both'):  
+            save_binary_archive(archive_data, f"archive_{timestamp}{SUFFIX}")  
         
         # 生成路径图片  
-        self.save_path_image(archive_data['meta']['timestamp'])  
+        self.save_path_image(timestamp, archive_data['path'], archive_data['step_times'])  
 
-    def save_path_image(self, timestamp):  
-        """生成带标记的路径图"""  
-        surface = pygame.Surface((WIDTH, HEIGHT))  
-        surface.fill(COLORS['background'])  
-        
-        # 绘制网格  
-        for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(surface, COLORS['grid'],  
-                            (i*CELL_SIZE, 0), (i*CELL_SIZE, HEIGHT))  
-            pygame.draw.line(surface, COLORS['grid'],  
-                            (0, i*CELL_SIZE), (WIDTH, i*CELL_SIZE))  
-        
-        # 绘制路径  
-        points = [self.convert_coords(x, y) for x, y in self.path]  
+    def save_path_image(self, timestamp, path, step_times):  
+        """生成带标记的路径图（在后台写盘线程里运行，只用存档里的 path 和 step_times）"""  
+        # 部分路径快照：在网格背景上依次补画到 30%、50%、70%  
+        drawer = PathDrawer(self.path_style, path)  
+        if SNAPSHOT_FRACTIONS:  
+            save_snapshots(drawer, timestamp, SNAPSHOT_FRACTIONS, step_times, SNAPSHOT_BY)  
+
+        # 在同一张图上补画剩下的路径  
+        surface = drawer.extend_to(len(path) - 1)  
+        points = [self.convert_coords(x, y) for x, y in path]  
         if len(points) > 1:  
-            pygame.draw.lines(surface, COLORS['path'], False, points, 2)  
-            
             # 标记关键点  
             for percent in [0.3, 0.5, 0.7]:  
                 idx = int((len(points)-1) * percent)  
@@ -225,23 +381,18 @@ class PathGame:
     def draw_control_panel(self):  
         """绘制右侧控制面板"""  
         panel_x = GRID_SIZE * CELL_SIZE  
-        # 绘制面板背景  
-        pygame.draw.rect(self.screen, (240, 240, 240),   
-                        (panel_x, 0, PANEL_WIDTH, HEIGHT))  
-
-        # 绘制操作说明  
-        text_y = 50  
-        controls = [  
-            "操作说明：",  
-            "↑ 上移",  
-            "↓ 下移",  
-            "← 左移",  
-            "→ 右移",      
-        ]  
-        for line in controls:  
-            text = self.font.render(line, True, (0,0,0))  
-            self.screen.blit(text, (panel_x + 20, text_y))  
-            text_y += 30  
+        # 面板背景和操作说明只渲染一次  
+        if self.panel_surface is None:  
+            controls = [  
+                "操作说明：",  
+                "↑ 上移",  
+                "↓ 下移",  
+                "← 左移",  
+                "→ 右移",      
+            ]  
+            items = [(line, (20, 50 + i*30), (0,0,0), None) for i, line in enumerate(controls)]  
+            self.panel_surface = self.text.render_page((PANEL_WIDTH, HEIGHT), (240, 240, 240), items)  
+        self.screen.blit(self.panel_surface, (panel_x, 0))  
 
         # 绘制开始按钮  
         button_rect = pygame.Rect(panel_x + 50, HEIGHT//2 - 25, 100, 50)  
@@ -249,14 +400,27 @@ class PathGame:
         btn_color = COLORS['button_hover'] if button_rect.collidepoint(mouse_pos) else COLORS['button']  
         
         pygame.draw.rect(self.screen, btn_color, button_rect, border_radius=5)  
-        btn_text = self.font.render("开始游戏" if not self.game_started else "进行中", True, (255,255,255))  
-        self.screen.blit(btn_text, (panel_x + 65, HEIGHT//2 - 10))  
+        btn_text = "开始游戏" if not self.game_started else "进行中"  
+        self.text.blit(self.screen, btn_text, (panel_x + 65, HEIGHT//2 - 10), (255,255,255))  
 
     def run(self):  
         """主游戏循环"""  
+        drawn = False  
         while self.running:  
+            events = self.next_events()  
+            self.handle_input(events)  
+            # 检查点只在两次输入之间写，保证状态与日志序号对应  
+            if self.events_since_checkpoint >= CHECKPOINT_EVERY:  
+                self.save_checkpoint()  
+            if self.finish_deadline is not None and time.time() >= self.finish_deadline:  
+                self.running = False  
+            if self.session_log is not None:  
+                self.session_log.poll()  
+            # 事件驱动模式下没有输入就不重画（第一帧除外）  
+            if self.event_driven and not events and drawn:  
+                continue  
+            drawn = True  
             self.screen.fill(COLORS['background'])  
-            self.handle_input()  
 
             # 绘制游戏地图  
             self.draw_grid()  
@@ -274,24 +438,50 @@ class PathGame:
                 ]  
                 for i, text in enumerate(info_texts):  
                     if text:  
-                        text_surface = self.font.render(text, True, (0,0,0))  
-                        self.screen.blit(text_surface, (10, 10 + i*25))  
+                        self.text.blit(self.screen, text, (10, 10 + i*25), (0,0,0))  
 
             # 完成检测  
             if self.game_started and not self.paused and (result := self.check_finish()):  
-                finish_text = self.font.render(f"到达 {result}！", True, (0,0,255))  
-                self.screen.blit(finish_text, (WIDTH//2-50, HEIGHT//2))  
+                self.text.blit(self.screen, f"到达 {result}！", (WIDTH//2-50, HEIGHT//2), (0,0,255))  
                 
-                archive_data = self.generate_archive()  
-                self.save_archive(archive_data)  
-                pygame.time.wait(2000)  
-                self.running = False  
+                if self.finish_deadline is None:  
+                    # 存档交给后台线程写入，结束画面照常绘制 2 秒后退出  
+                    archive_data = self.generate_archive()  
+                    self.log_event("finish", goal=result, timestamp=archive_data['meta']['timestamp'])  
+                    self.session_log.flush()  
+                    self.writer.submit(self.save_archive, archive_data)  
+                    self.writer.submit(remove_checkpoint, checkpoint_path(self.session_log.path))  
+                    self.finish_deadline = time.time() + 2  
 
             pygame.display.flip()  
-            self.clock.tick(30)  
+            if not self.event_driven:  
+                self.clock.tick(30)  
             
+        # 中途关闭窗口时日志里记一条 quit 并写最后一个检查点（之后可以用 --resume 继续）；  
+        # 关闭前等待后台写完所有日志和存档  
+        if self.session_log is not None:  
+            if not self.finished:  
+                self.log_event("quit")  
+                self.save_checkpoint()  
+            self.session_log.flush()  
+        self.writer.close()  
         pygame.quit()  
 
 if __name__ == "__main__":  
+    parser = argparse.ArgumentParser(description="路径迷宫")  
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="CHECKPOINT",  
+                        help="恢复上一次未完成的会话（也可以指定 sessions/ 下的 .ckpt.json 文件）")  
+    args = parser.parse_args()  
+
     game = PathGame()  
+    if args.resume:  
+        checkpoint_file = latest_checkpoint(identity=game.identity) if args.resume == "latest" else args.resume  
+        if checkpoint_file is None:  
+            print("没有找到未完成的会话")  
+        else:  
+            try:  
+                replayed = game.resume_session(checkpoint_file)  
+            except ValueError as exc:  
+                parser.error(str(exc))  
+            print(f"已从 {checkpoint_file} 恢复（重放 {replayed} 条日志事件）")  
     game.run()  
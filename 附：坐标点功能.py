@@ -1,11 +1,13 @@
 import pygame  
 import time  
 from pygame.locals import *  
+from event_loop import wait_events
 
 
 GRID_SIZE = 49  
 CELL_SIZE = 15  
 WIDTH, HEIGHT = GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE  
+EVENT_DRIVEN = False  # True 时阻塞等待鼠标事件，格子坐标变化时才重画
 
 # 颜色配置  
 COLORS = {  
@@ -67,20 +69,28 @@ def display_coordinates(coords):
 
 # 主循环
 running = True
+shown_coords = None  # 当前画面上显示的坐标
 while running:
-    draw_grid()
+    # 事件驱动模式下阻塞到有鼠标/窗口事件为止
+    events = wait_events() if EVENT_DRIVEN else pygame.event.get()
+    for event in events:
+        if event.type == QUIT:
+            running = False
+        if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+            shown_coords = None
     
     # 获取鼠标当前位置
     mouse_x, mouse_y = pygame.mouse.get_pos()
     grid_x, grid_y = get_grid_from_mouse((mouse_x, mouse_y))
-    display_coordinates((grid_x, grid_y))
     
-    pygame.display.flip()  # 更新显示
-
-    for event in pygame.event.get():
-        if event.type == QUIT:
-            running = False
+    # 鼠标所在格子没变时不重画 2401 个格子
+    if not EVENT_DRIVEN or (grid_x, grid_y) != shown_coords:
+        draw_grid()
+        display_coordinates((grid_x, grid_y))
+        pygame.display.flip()  # 更新显示
+        shown_coords = (grid_x, grid_y)
     
-    time.sleep(0.05)
+    if not EVENT_DRIVEN:
+        time.sleep(0.05)
 
 pygame.quit()
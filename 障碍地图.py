@@ -1,12 +1,27 @@
 import pygame  
 import time  
-import math  
 import json  
+import argparse  
 from datetime import datetime  
 from pygame.locals import *  
+from render_cache import get_static_layer, map_key
+from dirty_rects import DirtyRectRenderer
+from event_loop import wait_events
+from text_cache import TextCache
+from archive_writer import ArchiveWriter
+from session_log import SessionLog, session_log_path
+from path_codec import save_binary_archive, SUFFIX
+from path_state import PathStats
+from goal_recognition import GoalRecognizer, load_goal_fields
+from path_render import MapStyle, PathDrawer, PathLayer
+from snapshots import save_snapshots
+from checkpoint import (CHECKPOINT_EVERY, checkpoint_path, write_checkpoint, read_checkpoint,
+                        remove_checkpoint, read_tail, truncate_log, latest_checkpoint,
+                        map_identity, check_identity)
 
 # ================= 全局配置 =================  
 
+GAME_NAME = "障碍地图"  # 会话日志和检查点里的游戏名（几个游戏共用 sessions/ 目录）
 FONT_PATH = "/System/Volumes/Data/Users/mimimi/Desktop/mapexperimentcode/simhei.ttf"
 
 # 游戏配置
@@ -15,6 +30,15 @@ CELL_SIZE = 15
 PANEL_WIDTH = 200  
 WIDTH = GRID_SIZE * CELL_SIZE + PANEL_WIDTH  
 HEIGHT = GRID_SIZE * CELL_SIZE  
+RENDER_MODE = 'full'  # 'full' 每帧整屏刷新；'dirty' 只刷新发生变化的区域
+EVENT_DRIVEN = False  # True 时阻塞等待输入，只在画面变化时重画
+MARKER_PAD = 11  # 位置标记半径 + 路径线宽，用于计算一步移动的重画区域
+SNAPSHOT_FRACTIONS = (0.3, 0.5, 0.7)  # 到达终点时另存走到这些比例时的路径快照；() 表示不保存
+SNAPSHOT_BY = 'step'  # 'step' 按步数比例截取；'time' 按用时比例截取
+GOAL_RECOGNITION = True  # 用观察者模型逐步估计参与者的目标，后验轨迹写入存档（需要 NumPy）
+SHOW_OBSERVER = False  # True 时在右侧面板实时显示观察者对各终点的判断（给主试看，正式实验时关闭）
+SHOW_ZONES = False  # True 时在右侧面板实时显示当前 7x7 分区和停留时间（给主试看，正式实验时关闭）
+ARCHIVE_FORMAT = 'json'  # 'json' 原来的 JSON 存档；'binary' 紧凑的 .mpath 存档（path_codec）；'both' 两种都写
 
 # 颜色配置
 COLORS = {  
@@ -87,62 +111,95 @@ def get_font(size):
     return pygame.font.Font(FONT_PATH, size)    
 
 class PathGame:  
-    def __init__(self):  
+    def __init__(self, render_mode=RENDER_MODE, event_driven=EVENT_DRIVEN):  
         pygame.init()  
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))  
         pygame.display.set_caption("迷宫路径-完整障碍物版")  
         self.clock = pygame.time.Clock()  
-        self.font = get_font(20)  
+        # 文字渲染结果缓存；面板的静态部分预渲染成一张 Surface
+        self.text = TextCache(get_font, 20)  
+        self.panel_surface = None  
+        self.renderer = DirtyRectRenderer(render_mode, (WIDTH, HEIGHT))  
+        self.event_driven = event_driven  
+        # 存档和路径图片在后台线程写入，不阻塞主循环
+        self.writer = ArchiveWriter()  
+        # 静态背景层的缓存键，地图配置变化时自动重绘
+        self.map_key = map_key(GRID_SIZE, CELL_SIZE, ALL_OBSTACLES, POINTS, COLORS)  
+        # 日志和检查点里记录的游戏名和地图指纹，--resume 时只恢复同一张地图的会话  
+        self.identity = map_identity(GAME_NAME, GRID_SIZE, ALL_OBSTACLES, POINTS)  
+        # 保存路径图片和快照用的离屏绘制参数
+        self.path_style = MapStyle(GRID_SIZE, CELL_SIZE, WIDTH, HEIGHT, COLORS, ALL_OBSTACLES, path_width=3)  
+        # 各终点的距离场（磁盘缓存），供观察者模型逐步查询  
+        self.goal_fields = load_goal_fields(ALL_OBSTACLES, POINTS, GRID_SIZE + 1) if GOAL_RECOGNITION else None  
         self.reset_game()  
 
     def reset_game(self):  
         self.current_pos = list(POINTS['start'])  
         self.path = [tuple(self.current_pos)]  
-        self.turn_count = 0  
+        self.step_times = [0.0]  # 每个路径点的到达时间（秒），与 path 一一对应  
         self.start_time = 0  
         self.paused = False  
         self.running = True  
         self.finished = False  
         self.game_started = False  
-        self.previous_direction = None  
+        self.turn_count = 0  
         self.turn_times = []  
+        # 步数、转弯、重复访问的增量统计，撤回时同步回退  
+        self.stats = PathStats(GRID_SIZE + 1, self.path)  
+        self.reset_zone_tracker()  
+        self.reset_recognizer()  
+        # 常驻路径层：移动只画新线段，撤回只重画局部  
+        self.path_layer = PathLayer(self.convert_coords, (WIDTH, HEIGHT), (0,0,0), 3, self.path)  
         self.pause_start = 0  
+        self.finish_deadline = None  # 到达终点后结束画面保持到这个时间点  
+        self.session_log = None  # 点击开始后创建，逐条记录本次会话的操作  
+        self.session_timestamp = None  
+        self.events_since_checkpoint = 0  
 
     def convert_coords(self, x, y):  
         return (x * CELL_SIZE, (GRID_SIZE - y) * CELL_SIZE)  
 
-    def draw_grid(self):  
+    def draw_grid(self, surface):  
         for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(self.screen, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                              (i * CELL_SIZE, 0), (i * CELL_SIZE, HEIGHT))  
-            pygame.draw.line(self.screen, COLORS['grid'],  
+            pygame.draw.line(surface, COLORS['grid'],  
                              (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))  
 
-    def draw_obstacles(self):  
+    def draw_obstacles(self, surface):  
         for obstacle in ALL_OBSTACLES:  
             ox, oy, ow, oh = obstacle  
             screen_x = ox * CELL_SIZE  
             screen_y = (GRID_SIZE - oy - oh) * CELL_SIZE  
             width = ow * CELL_SIZE  
             height = oh * CELL_SIZE  
-            pygame.draw.rect(self.screen, COLORS['obstacle'],   
+            pygame.draw.rect(surface, COLORS['obstacle'],   
                              (screen_x, screen_y, width, height))  
 
-    def draw_points(self):  
-        self.draw_obstacles()  
+    def draw_points(self, surface):  
+        self.draw_obstacles(surface)  
         
         for name, (x, y) in POINTS.items():  
             pos = self.convert_coords(x, y)  
             color = COLORS.get(name, (0,0,0))  
-            pygame.draw.circle(self.screen, color, pos, 8)  
-            
+            pygame.draw.circle(surface, color, pos, 8)  
+
+    def build_background(self, surface):  
+        """静态背景层：网格、障碍物和固定坐标点，只在缓存失效时绘制"""  
+        surface.fill(COLORS['background'])  
+        self.draw_grid(surface)  
+        self.draw_points(surface)  
+
+    def draw_background(self):  
+        background = get_static_layer(self.map_key, (WIDTH, HEIGHT), self.build_background)  
+        self.screen.blit(background, (0, 0))  
+
+    def draw_current(self):  
         pygame.draw.circle(self.screen, COLORS['current'],  
                            self.convert_coords(*self.current_pos), 8)  
 
     def draw_path(self):  
-        if len(self.path) > 1:  
-            points = [self.convert_coords(x, y) for x, y in self.path]  
-            pygame.draw.lines(self.screen, (0,0,0), False, points, 3)  
+        self.path_layer.draw(self.screen, self.path)  
 
     def is_in_obstacle(self, x, y):  
         """Return True if (x, y) is inside or on the edge of an obstacle."""  
@@ -167,19 +224,24 @@ class PathGame:
         # If none of the above conditions block us, it's valid
         return True  
 
-    def calculate_angle(self, p1, p2, p3):  
-        v1 = (p1[0] - p2[0], p1[1] - p2[1])  
-        v2 = (p3[0] - p2[0], p3[1] - p2[1])  
-        dot_product = v1[0] * v2[0] + v1[1] * v2[1]  
-        magnitude_v1 = math.sqrt(v1[0]**2 + v1[1]**2)  
-        magnitude_v2 = math.sqrt(v2[0]**2 + v2[1]**2)  
-        cos_angle = dot_product / (magnitude_v1 * magnitude_v2)  
-        return math.degrees(math.acos(cos_angle))  
-
-    def handle_input(self):  
-        for event in pygame.event.get():  
+    def next_events(self):  
+        """轮询模式直接取事件；事件驱动模式阻塞到有输入为止（界面上没有计时显示）"""  
+        if not self.event_driven:  
+            return pygame.event.get()  
+        if self.finish_deadline is not None:  
+            # 结束画面需要按时关闭  
+            return wait_events((self.finish_deadline - time.time()) * 1000)  
+        return wait_events()  
+
+    def handle_input(self, events):  
+        for event in events:  
             if event.type == QUIT:  
                 self.running = False  
+            if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):  
+                self.renderer.mark_all()  
+            if event.type in (MOUSEMOTION, MOUSEBUTTONDOWN):  
+                # 按钮的悬停颜色/文字可能变化
+                self.renderer.mark(self.start_button_rect())  
             
             if event.type == MOUSEBUTTONDOWN and not self.game_started:  
                 panel_x = GRID_SIZE * CELL_SIZE  
@@ -187,20 +249,27 @@ class PathGame:
                     HEIGHT//2 - 25 < event.pos[1] < HEIGHT//2 + 25):  
                     self.game_started = True  
                     self.start_time = time.time()  
+                    self.start_session()  
 
             if event.type == KEYDOWN:  
-                if self.game_started and event.key == K_ESCAPE:  
+                if self.game_started and not self.finished and event.key == K_ESCAPE:  
                     if not self.paused:  
                         self.pause_start = time.time()  
+                        self.log_event("pause")  
                     else:  
                         self.start_time += time.time() - self.pause_start  
+                        self.log_event("resume")  
                     self.paused = not self.paused  
                 
                 if self.game_started and not self.paused and not self.finished:  
                     if event.key == K_BACKSPACE:  
                         if len(self.path) > 1:  
-                            self.path.pop()  
+                            removed = self.path.pop()  
+                            self.step_times.pop()  
+                            self.rollback_stats()  
                             self.current_pos = list(self.path[-1])  
+                            self.log_event("undo", pos=list(self.current_pos), turns=self.turn_count)  
+                            self.mark_step(removed, self.path[-1])  
                     
                     dx, dy = 0, 0  
                     if event.key == K_UP: dy = 1  
@@ -215,16 +284,147 @@ class PathGame:
                     if not self.is_valid_move(new_x, new_y):  
                         return  
 
-                    if len(self.path) > 1:  
-                        angle = self.calculate_angle(self.path[-2], self.path[-1], (new_x, new_y))  
-                        if angle >= 25 and self.previous_direction != (dx, dy):  
-                            self.turn_count += 1  
-                            elapsed_time = time.time() - self.start_time  
-                            self.turn_times.append((self.turn_count, round(elapsed_time, 1)))  
-
                     self.current_pos = [new_x, new_y]  
                     self.path.append(tuple(self.current_pos))  
-                    self.previous_direction = (dx, dy)  
+                    step_time = self.elapsed()  
+                    self.step_times.append(step_time)  
+                    # 与上一步方向垂直即为转弯（整数方向码比较）  
+                    if self.stats.push(self.path[-1]):  
+                        self.turn_count = self.stats.turns  
+                        self.turn_times.append((self.turn_count, round(step_time, 1)))  
+                        self.log_event("turn", t=step_time, turn=self.turn_count, time=round(step_time, 1))  
+                    if self.recognizer is not None:  
+                        self.recognizer.push(self.path[-1])  
+                    if self.zone_tracker is not None:  
+                        self.zone_tracker.push(self.path[-1], step_time)  
+                    self.log_event("move", t=step_time, pos=[new_x, new_y])  
+                    self.mark_step(self.path[-2], self.path[-1])  
+
+    def elapsed(self):  
+        return round(time.time() - self.start_time, 3)  
+
+    def start_session(self):  
+        """点击开始后创建本次会话的事件日志"""  
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  
+        self.session_timestamp = timestamp  
+        self.session_log = SessionLog(session_log_path(timestamp), self.writer)  
+        self.session_log.log("start", t=0.0, timestamp=timestamp, pos=list(self.current_pos), **self.identity)  
+        self.save_checkpoint()  
+
+    def log_event(self, event, t=None, **fields):  
+        if self.session_log is not None:  
+            self.session_log.log(event, t=self.elapsed() if t is None else t, **fields)  
+            self.events_since_checkpoint += 1  
+
+    def checkpoint_state(self):  
+        """检查点内容：恢复会话所需的全部状态，seq 之前的日志事件都已包含在内"""  
+        # 暂停期间计时停在 pause_start  
+        now = self.pause_start if self.paused else time.time()  
+        return {  
+            **self.identity,  
+            "seq": self.session_log.seq,  
+            "timestamp": self.session_timestamp,  
+            "elapsed": round(now - self.start_time, 3),  
+            "paused": self.paused,  
+            "current_pos": list(self.current_pos),  
+            "path": [list(p) for p in self.path],  
+            "step_times": list(self.step_times),  
+            "turn_count": self.turn_count,  
+            "turn_times": [list(t) for t in self.turn_times],  
+        }  
+
+    def save_checkpoint(self):  
+        """先把缓冲的日志交给写入线程，再在同一线程里写检查点（记录此时的日志长度）"""  
+        self.session_log.flush()  
+        self.writer.submit(write_checkpoint, checkpoint_path(self.session_log.path),  
+                           self.checkpoint_state(), self.session_log.path)  
+        self.events_since_checkpoint = 0  
+
+    def resume_session(self, checkpoint_file):  
+        """从检查点和日志尾部恢复未完成的会话；恢复后处于暂停状态，按 Esc 继续"""  
+        state = read_checkpoint(checkpoint_file)  
+        check_identity(state, self.identity, checkpoint_file)  
+        self.current_pos = list(state["current_pos"])  
+        self.path = [tuple(p) for p in state["path"]]  
+        self.step_times = list(state["step_times"])  
+        self.turn_count = state["turn_count"]  
+        self.turn_times = [tuple(t) for t in state["turn_times"]]  
+        self.stats = PathStats(GRID_SIZE + 1, self.path)  
+        self.reset_zone_tracker()  
+        self.reset_recognizer()  
+        self.path_layer.reset(self.path)  
+        elapsed = state["elapsed"]  
+        seq = state["seq"]  
+
+        # 只重放检查点之后的日志尾部  
+        log_path = state["log_path"]  
+        records, end = read_tail(log_path, state["log_offset"], seq)  
+        for record in records:  
+            self.replay_event(record)  
+            elapsed = record.get("t", elapsed)  
+            seq = record["seq"] + 1  
+        truncate_log(log_path, end)  
+
+        self.game_started = True  
+        self.paused = True  
+        self.pause_start = time.time()  
+        self.start_time = self.pause_start - elapsed  
+        self.session_timestamp = state["timestamp"]  
+        self.session_log = SessionLog(log_path, self.writer)  
+        self.session_log.seq = seq  
+        self.session_log.log("recover", t=elapsed)  
+        self.save_checkpoint()  
+        self.renderer.mark_all()  
+        return len(records)  
+
+    def rollback_stats(self):  
+        """撤回一步时回退统计；撤回的是转弯的那一步时同时删掉对应的转弯记录"""  
+        _, turned = self.stats.pop()  
+        if turned:  
+            self.turn_times.pop()  
+        self.turn_count = self.stats.turns  
+        if self.recognizer is not None:  
+            self.recognizer.pop()  
+        if self.zone_tracker is not None:  
+            self.zone_tracker.pop(self.step_times[-1])  
+
+    def reset_recognizer(self):  
+        """按当前路径重建观察者模型（新游戏或恢复会话时）"""  
+        self.recognizer = GoalRecognizer(self.goal_fields, self.path) if self.goal_fields is not None else None  
+
+    def reset_zone_tracker(self):  
+        """按当前路径重建分区统计；只在 SHOW_ZONES 打开时创建"""  
+        self.zone_tracker = None  
+        if SHOW_ZONES:  
+            from zone_tracker import ZoneTracker  
+            self.zone_tracker = ZoneTracker(GRID_SIZE + 1, self.path, self.step_times)  
+
+    def replay_event(self, record):  
+        """把一条日志事件重新作用到游戏状态上（不经过输入检查）"""  
+        event = record["event"]  
+        if event == "move":  
+            pos = tuple(record["pos"])  
+            self.path.append(pos)  
+            self.step_times.append(record["t"])  
+            self.stats.push(pos)  
+            if self.recognizer is not None:  
+                self.recognizer.push(pos)  
+            if self.zone_tracker is not None:  
+                self.zone_tracker.push(pos, record["t"])  
+            self.current_pos = list(pos)  
+        elif event == "undo":  
+            if len(self.path) > 1:  
+                self.path.pop()  
+                self.step_times.pop()  
+                self.rollback_stats()  
+                self.current_pos = list(self.path[-1])  
+        elif event == "turn":  
+            self.turn_count = record["turn"]  
+            self.turn_times.append((record["turn"], record["time"]))  
+
+    def mark_step(self, p1, p2):  
+        """记录一步移动/撤回所影响的屏幕区域（脏矩形模式下只重画这部分）"""  
+        self.renderer.mark_step(self.convert_coords(*p1), self.convert_coords(*p2), MARKER_PAD)  
 
     def check_finish(self):  
         current = tuple(self.current_pos)  
@@ -235,110 +435,172 @@ class PathGame:
         return None  
 
     def generate_archive(self):  
-        return {  
+        archive = {  
             "meta": {  
                 "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),  
                 "duration": round(time.time() - self.start_time, 1),  
                 "steps": len(self.path) - 1,  
                 "turns": self.turn_count  
             },  
-            "path": self.path,  
+            "path": list(self.path),  
+            "step_times": list(self.step_times),  
             "turn_events": [{"turn": t[0], "time": t[1]} for t in self.turn_times]  
         }  
+        if self.recognizer is not None:  
+            archive["goal_posterior"] = self.recognizer.archive_data()  
+        return archive  
 
     def save_archive(self, archive_data):  
-        filename = f"archive_{archive_data['meta']['timestamp']}.json"  
-        with open(filename, "w", encoding='utf-8') as f:  
-            json.dump(archive_data, f, indent=4, ensure_ascii=False)  
-        self.save_path_image(archive_data['meta']['timestamp'])  
-
-    def save_path_image(self, timestamp):  
-        surface = pygame.Surface((WIDTH, HEIGHT))  
-        surface.fill(COLORS['background'])  
-
-        for i in range(GRID_SIZE + 1):  
-            pygame.draw.line(surface, COLORS['grid'],  
-                             (i * CELL_SIZE, 0), (i * CELL_SIZE, HEIGHT))  
-            pygame.draw.line(surface, COLORS['grid'],  
-                             (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))  
-
-        for obstacle in ALL_OBSTACLES:  
-            ox, oy, ow, oh = obstacle  
-            screen_x = ox * CELL_SIZE  
-            screen_y = (GRID_SIZE - oy - oh) * CELL_SIZE  
-            width = ow * CELL_SIZE  
-            height = oh * CELL_SIZE  
-            pygame.draw.rect(surface, COLORS['obstacle'],   
-                             (screen_x, screen_y, width, height))  
-
-        points = [self.convert_coords(x, y) for x, y in self.path]  
-        if len(points) > 1:  
-            pygame.draw.lines(surface, (0,0,0), False, points, 3)  
-
+        timestamp = archive_data['meta']['timestamp']  
+        if ARCHIVE_FORMAT in ('json', 'both'):  
+            filename = f"archive_{timestamp}.json"  
+            with open(filename, "w", encoding='utf-8') as f:  
+                json.dump(archive_data, f, indent=4, ensure_ascii=False)  
+        if ARCHIVE_FORMAT in ('binary', 'both'):  
+            save_binary_archive(archive_data, f"archive_{timestamp}{SUFFIX}")  
+        self.save_path_image(timestamp, archive_data['path'], archive_data['step_times'])  
+
+    def save_path_image(self, timestamp, path, step_times):  
+        """先保存部分路径快照，再在同一张图上补画剩下的路径，保存完整路径图（在后台写盘线程里运行，只用存档里的 path 和 step_times）"""  
+        drawer = PathDrawer(self.path_style, path)  
+        if SNAPSHOT_FRACTIONS:  
+            save_snapshots(drawer, timestamp, SNAPSHOT_FRACTIONS, step_times, SNAPSHOT_BY)  
+        surface = drawer.extend_to(len(path) - 1)  
         pygame.image.save(surface, f"path_{timestamp}.png")  
 
+    def start_button_rect(self):  
+        panel_x = GRID_SIZE * CELL_SIZE  
+        return pygame.Rect(panel_x + 50, HEIGHT//2 - 25, 100, 50)  
+
     def draw_control_panel(self):  
         panel_x = GRID_SIZE * CELL_SIZE  
-        pygame.draw.rect(self.screen, (240, 240, 240),   
-                         (panel_x, 0, PANEL_WIDTH, HEIGHT))  
-
-        text_y = 50  
-        controls = [  
-            "操作说明：",  
-            "↑ 上移",  
-            "↓ 下移",  
-            "← 左移",  
-            "→ 右移",
-            "不可以穿过",
-            "灰色障碍物"   
-        ]  
-        for line in controls:  
-            text = self.font.render(line, True, (0,0,0))  
-            self.screen.blit(text, (panel_x + 20, text_y))  
-            text_y += 30  
-
-        button_rect = pygame.Rect(panel_x + 50, HEIGHT//2 - 25, 100, 50)  
+        if self.panel_surface is None:  
+            controls = [  
+                "操作说明：",  
+                "↑ 上移",  
+                "↓ 下移",  
+                "← 左移",  
+                "→ 右移",
+                "不可以穿过",
+                "灰色障碍物"   
+            ]  
+            items = [(line, (20, 50 + i*30), (0,0,0), None) for i, line in enumerate(controls)]  
+            self.panel_surface = self.text.render_page((PANEL_WIDTH, HEIGHT), (240, 240, 240), items)  
+        self.screen.blit(self.panel_surface, (panel_x, 0))  
+
+        button_rect = self.start_button_rect()  
         mouse_pos = pygame.mouse.get_pos()  
         btn_color = COLORS['button_hover'] if button_rect.collidepoint(mouse_pos) else COLORS['button']  
         
         pygame.draw.rect(self.screen, btn_color, button_rect, border_radius=5)  
-        btn_text = self.font.render("开始游戏" if not self.game_started else "进行中", True, (255,255,255))  
-        self.screen.blit(btn_text, (panel_x + 65, HEIGHT//2 - 10))  
+        btn_text = "开始游戏" if not self.game_started else "进行中"  
+        self.text.blit(self.screen, btn_text, (panel_x + 65, HEIGHT//2 - 10), (255,255,255))  
+
+    def hud_texts(self, result=None):  
+        """状态信息：(文字, 位置, 颜色) 列表"""  
+        texts = []  
+        if self.game_started:  
+            info_texts = [  
+                f"转弯次数: {self.turn_count}",  
+                "暂停中" if self.paused else ""  
+            ]  
+            for i, text in enumerate(info_texts):  
+                texts.append((text, (10, 10 + i*25), (0,0,0)))  
+        if SHOW_OBSERVER and self.recognizer is not None:  
+            panel_x = GRID_SIZE * CELL_SIZE  
+            texts.append(("观察者判断：", (panel_x + 20, HEIGHT - 160), (0,0,0)))  
+            for i, (goal, p) in enumerate(zip(self.recognizer.names, self.recognizer.posterior)):  
+                texts.append((f"{goal}: {p:.0%}", (panel_x + 20, HEIGHT - 130 + i*25), COLORS.get(goal, (0,0,0))))  
+        if self.zone_tracker is not None:  
+            from zone_tracker import zone_name  
+            panel_x = GRID_SIZE * CELL_SIZE  
+            tracker = self.zone_tracker  
+            texts.append((f"分区 {zone_name(tracker.current)}: {tracker.current_time():.1f}秒", (panel_x + 20, HEIGHT//2 + 50), (0,0,0)))  
+            texts.append((f"进入分区 {len(tracker.entries)} 次", (panel_x + 20, HEIGHT//2 + 75), (0,0,0)))  
+        if result:  
+            texts.append((f"到达 {result}！", (WIDTH//2-50, HEIGHT//2), (0,0,255)))  
+        return texts  
 
     def run(self):  
         while self.running:  
-            self.screen.fill(COLORS['background'])  
-            self.handle_input()  
-
-            self.draw_grid()  
-            self.draw_points()  
-            self.draw_path()  
-            self.draw_control_panel()  
-
-            if self.game_started:  
-                info_texts = [  
-                    f"转弯次数: {self.turn_count}",  
-                    "暂停中" if self.paused else ""  
-                ]  
-                for i, text in enumerate(info_texts):  
-                    if text:  
-                        text_surface = self.font.render(text, True, (0,0,0))  
-                        self.screen.blit(text_surface, (10, 10 + i*25))  
-
-            if self.game_started and not self.paused and (result := self.check_finish()):  
-                finish_text = self.font.render(f"到达 {result}！", True, (0,0,255))  
-                self.screen.blit(finish_text, (WIDTH//2-50, HEIGHT//2))  
-                
-                archive_data = self.generate_archive()  
-                self.save_archive(archive_data)  
-                pygame.time.wait(2000)  
+            self.handle_input(self.next_events())  
+            # 检查点只在两次输入之间写，保证状态与日志序号对应  
+            if self.events_since_checkpoint >= CHECKPOINT_EVERY:  
+                self.save_checkpoint()  
+
+            result = None  
+            if self.game_started and not self.paused:  
+                result = self.check_finish()  
+
+            if result and self.finish_deadline is None:  
+                # 存档交给后台线程写入，结束画面照常绘制 2 秒后退出
+                self.finish_session(result)  
+                self.finish_deadline = time.time() + 2  
+            if self.finish_deadline is not None and time.time() >= self.finish_deadline:  
                 self.running = False  
+            if self.session_log is not None:  
+                self.session_log.poll()  
+
+            # 文字变化时标记新旧两块区域
+            hud = self.hud_texts(result)  
+            for slot, (text, pos, color) in enumerate(hud):  
+                self.renderer.mark_text(slot, text, (pos, self.text.size(text)))  
+
+            # 事件驱动模式下画面没有变化就直接回去等待输入
+            if self.event_driven and not self.renderer.has_changes():  
+                continue  
+
+            # 整屏模式下 regions() 只有一个 None；脏矩形模式下逐块裁剪重画
+            for clip in self.renderer.regions():  
+                self.screen.set_clip(clip)  
+                self.draw_background()  
+                self.draw_current()  
+                self.draw_path()  
+                self.draw_control_panel()  
+                for text, pos, color in hud:  
+                    if text:  
+                        self.text.blit(self.screen, text, pos, color)  
+            self.screen.set_clip(None)  
 
-            pygame.display.flip()  
-            self.clock.tick(30)  
+            self.renderer.present(self.screen)  
+            if not self.event_driven:  
+                self.clock.tick(30)  
 
+        self.close_session()  
         pygame.quit()  
 
+    def finish_session(self, result):  
+        """到达终点：记 finish 事件，把存档和删除检查点交给后台线程"""  
+        archive_data = self.generate_archive()  
+        self.log_event("finish", goal=result, timestamp=archive_data['meta']['timestamp'])  
+        self.session_log.flush()  
+        self.writer.submit(self.save_archive, archive_data)  
+        self.writer.submit(remove_checkpoint, checkpoint_path(self.session_log.path))  
+
+    def close_session(self):  
+        """退出前收尾：中途退出时日志里记一条 quit 并写最后一个检查点（之后可以用 --resume 继续），再等待后台写完所有日志和存档"""  
+        if self.session_log is not None:  
+            if not self.finished:  
+                self.log_event("quit")  
+                self.save_checkpoint()  
+            self.session_log.flush()  
+        self.writer.close()  
+
 if __name__ == "__main__":  
+    parser = argparse.ArgumentParser(description="迷宫路径-完整障碍物版")  
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="CHECKPOINT",  
+                        help="恢复上一次未完成的会话（也可以指定 sessions/ 下的 .ckpt.json 文件）")  
+    args = parser.parse_args()  
+
     game = PathGame()  
+    if args.resume:  
+        checkpoint_file = latest_checkpoint(identity=game.identity) if args.resume == "latest" else args.resume  
+        if checkpoint_file is None:  
+            print("没有找到未完成的会话")  
+        else:  
+            try:  
+                replayed = game.resume_session(checkpoint_file)  
+            except ValueError as exc:  
+                parser.error(str(exc))  
+            print(f"已从 {checkpoint_file} 恢复（重放 {replayed} 条日志事件）")  
     game.run()  